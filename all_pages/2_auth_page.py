@@ -1,12 +1,12 @@
-import io
-
 import streamlit as st
-import qrcode
 
+from services import otp_qr, rerun_profiler
 from services.auth_service import AuthService
+from services.prefetch import prefetcher
+from settings import PREFETCH_ON_SIGNIN
 
 
-auth_service = AuthService()
+auth_service = AuthService
 
 st.set_page_config(page_title="Auth • Nuu", page_icon="🔐", layout="centered")
 st.title("🔐 Sign Up / Sign In")
@@ -31,13 +31,17 @@ if st.session_state.token is None:
             if not u or not p:
                 st.warning("Please enter both username and password.")
             else:
-                is_authenticated, details = auth_service.authenticate_user(u, p)
+                with rerun_profiler.section("sign_in"):
+                    is_authenticated, details = auth_service.authenticate_user(u, p)
 
                 if is_authenticated:
                     st.session_state.username = u
                     st.session_state.token = details.get('access_token')
                     st.session_state.membership = details.get('membership')
                     st.session_state.is_authenticated = True
+                    # Load the Equipo B dashboard in the background while the user is still here
+                    if PREFETCH_ON_SIGNIN:
+                        prefetcher.start(st.session_state.token)
                     st.rerun()
                 else:
                     st.warning(details)
@@ -63,21 +67,23 @@ else:
 
     with col1:
         if st.button("Call who am I Endpoint!"):
-            response = auth_service.whoami(st.session_state.token)
+            with rerun_profiler.section("whoami"):
+                response = auth_service.whoami(st.session_state.token)
             st.info(response)
     with col2:
         if st.button("Configure OTP"):
-            url = auth_service.configure_otp(st.session_state.token)
-            qr = qrcode.QRCode(
-                version=1, box_size=10, border=4,  # tweak sizing if you want
-                error_correction=qrcode.constants.ERROR_CORRECT_M,
-            )
-            qr.add_data(url)
-            qr.make(fit=True)
-            img = qr.make_image(fill_color="black", back_color="white")
-            buf = io.BytesIO()
-            img.save(buf, format="PNG")
-            st.image(buf.getvalue(), caption="Scan this QR in your authenticator app")
+            with rerun_profiler.section("configure_otp"):
+                st.session_state.otp_url = auth_service.configure_otp(st.session_state.token)
+            if not st.session_state.otp_url:
+                st.warning("Could not fetch your OTP configuration. Please try again later.")
+        # The QR is rendered once per otpauth URL and survives reruns
+        if st.session_state.get("otp_url"):
+            with rerun_profiler.section("otp_qr"):
+                st.image(
+                    otp_qr.qr_image(st.session_state.otp_url),
+                    caption="Scan this QR in your authenticator app",
+                    output_format="PNG",
+                )
 
         with st.form("otp-configurar"):
             otp_code = str(int(st.number_input("OTP code", step=1)))
@@ -97,6 +103,11 @@ else:
 
     with col3:
         if st.button("Logout"):
+            auth_service.invalidate_whoami(st.session_state.token)
+            prefetcher.cancel(st.session_state.token)
+            if st.session_state.get("otp_url"):
+                otp_qr.forget(st.session_state.otp_url)
+                st.session_state.otp_url = None
             st.session_state.token = None
             st.session_state.username = None
             st.experimental_set_query_params()  # clear URL state, optional
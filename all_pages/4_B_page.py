@@ -1,7 +1,7 @@
 import streamlit as st
-import pandas as pd
-from datetime import datetime
+from services import dataset_service, history_pager, rerun_profiler, token_claims
 from services.auth_service import AuthService
+from services.prefetch import prefetcher
 
 st.title("Equipo B - Dashboard Financiero")
 
@@ -14,14 +14,17 @@ if 'token' not in st.session_state or not st.session_state.token:
     st.error("❌ Token no encontrado. Por favor inicia sesión.")
     st.stop()
 
-# Cargar datos desde CSV
-@st.cache_data
+# Un único dataset por proceso, compartido (sin copias) por todas las sesiones
+# y por la precarga que arranca al iniciar sesión. Incorpora en segundo plano
+# los movimientos nuevos de historial_alertas.csv
+def servicio_datos():
+    return dataset_service.shared()
+
+# Backend de datos según DATA_BACKEND: la copia columnar (Arrow, memory-mapped)
+# de los CSV, que se recarga si los CSV cambian, o el archivo SQLite indexado,
+# que se consulta por cliente. Ambos responden las mismas consultas (FinancialBackend).
 def cargar_datos():
-    clientes = pd.read_csv('data/clientes.csv')
-    cuentas = pd.read_csv('data/cuentas_debito.csv')
-    historial = pd.read_csv('data/historial_alertas.csv')
-    scoring = pd.read_csv('data/scoring_crediticio.csv')
-    return clientes, cuentas, historial, scoring
+    return servicio_datos().get()
 
 # Función para extraer UUID del mensaje de whoami
 def extraer_uuid_del_whoami(mensaje_whoami):
@@ -52,28 +55,79 @@ def extraer_uuid_del_whoami(mensaje_whoami):
     match = re.search(uuid_pattern, str(mensaje_whoami))
     return match.group(0) if match else None
 
-llamada_whoiam = AuthService.whoami(st.session_state.token)
+# Los montos se formatean en el navegador, no fila por fila en el servidor
+FORMATO_MOVIMIENTOS = {
+    "Monto": st.column_config.NumberColumn(format="dollar"),
+    "Saldo anterior": st.column_config.NumberColumn(format="dollar"),
+    "Saldo posterior": st.column_config.NumberColumn(format="dollar"),
+}
+
+# Comparación por cohortes: nombre de cada grupo y percentiles como barras de 0 a 100
+NOMBRES_COHORTE = {
+    "ciudad": "Ciudad",
+    "estrato_socioeconomico": "Estrato",
+    "categoria_riesgo": "Categoría de riesgo",
+}
+PERCENTIL = st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.0f")
+FORMATO_COHORTES = {"Puntaje": PERCENTIL, "Deuda/ingreso": PERCENTIL, "Utilización": PERCENTIL}
+
+def mostrar_movimientos(total, cargar_ventana, clave, columnas, tamano_pagina=None):
+    """
+    Muestra el historial (más reciente primero) página por página.
+    Solo se piden al backend y se formatean las filas de la página visible
+    (``cargar_ventana(inicio, cantidad)``), así que el costo no depende de la
+    longitud del historial.
+    """
+    if tamano_pagina is None:
+        tamano_pagina = st.selectbox(
+            "Movimientos por página", [25, 50, 100, 250], index=1, key=f"{clave}_tamano"
+        )
+    paginas = history_pager.page_count(total, tamano_pagina)
+    pagina = 1
+    if paginas > 1:
+        pagina = int(st.number_input(
+            f"Página (de {paginas})", min_value=1, max_value=paginas, value=1, step=1, key=f"{clave}_pagina"
+        ))
+    inicio = history_pager.page_start(total, pagina, tamano_pagina)
+    with rerun_profiler.section("tabla_movimientos"):
+        ventana = cargar_ventana(inicio, tamano_pagina)
+        st.dataframe(
+            history_pager.format_movements(ventana, columnas),
+            hide_index=True,
+            column_config=FORMATO_MOVIMIENTOS,
+        )
+    st.caption(f"Movimientos {inicio + 1}–{inicio + len(ventana)} de {total}")
+
+# Lo precargado al iniciar sesión (identidad, dataset y datos del cliente);
+# solo sirve para el primer render, los siguientes reruns consultan el dataset
+precarga = prefetcher.take(st.session_state.token)
+
+# Resolver el UUID localmente desde el JWT; solo se llama a whoami si el token no lo trae
+with rerun_profiler.section("identidad"):
+    id_usuario = precarga["id_usuario"] if precarga else token_claims.user_id(st.session_state.token)
+    llamada_whoiam = None
+    if not id_usuario:
+        llamada_whoiam = AuthService.whoami(st.session_state.token)
+        id_usuario = extraer_uuid_del_whoami(llamada_whoiam)
+
 try:
-    clientes_df, cuentas_df, historial_df, scoring_df = cargar_datos()
-    
-    # Extraer UUID del mensaje de whoami
-    id_usuario = extraer_uuid_del_whoami(llamada_whoiam)
+    with rerun_profiler.section("cargar_datos"):
+        datos = cargar_datos()
     
     if not id_usuario:
         st.error("❌ No se pudo extraer el ID del usuario del mensaje whoami.")
         st.info("Respuesta whoami recibida: " + str(llamada_whoiam))
         st.stop()
     
-    # Buscar el cliente por UUID directamente en el CSV
-    cliente_match = clientes_df[clientes_df['id_cliente'] == id_usuario]
+    # Buscar el cliente por UUID en el índice
+    cliente = datos.cliente(id_usuario)
     
-    if len(cliente_match) == 0:
+    if cliente is None:
         st.error(f"❌ No se encontró información financiera para el usuario ID: {id_usuario}")
         st.info("💡 Contacta a soporte para registrar tus datos financieros.")
         st.stop()
     
     # Obtener datos del cliente
-    cliente = cliente_match.iloc[0]
     id_cliente = cliente['id_cliente']
     email_usuario = cliente['email']
     
@@ -86,11 +140,17 @@ try:
         f"Usuario: {email_usuario} | ID: {id_cliente[:8]}... | Membresía: {st.session_state.membership}"
     )
     
-    # Filtrar datos del cliente
-    cliente = clientes_df[clientes_df['id_cliente'] == id_cliente].iloc[0]
-    cuentas_cliente = cuentas_df[cuentas_df['id_cliente'] == id_cliente]
-    historial_cliente = historial_df[historial_df['id_cliente'] == id_cliente]
-    scoring_cliente = scoring_df[scoring_df['id_cliente'] == id_cliente].iloc[0] if len(scoring_df[scoring_df['id_cliente'] == id_cliente]) > 0 else None
+    # Datos del cliente desde el backend, o de la precarga si se hizo sobre este mismo dataset.
+    # Los movimientos no se cargan completos: se piden filtrados y por página.
+    if precarga is not None and (precarga["datos"]() is not datos or precarga.get("id_cliente") != id_cliente):
+        precarga = None
+    with rerun_profiler.section("consultas_cliente"):
+        if precarga is not None:
+            cuentas_cliente = precarga["cuentas"]
+            scoring_cliente = precarga["scoring"]
+        else:
+            cuentas_cliente = datos.cuentas_cliente(id_cliente)
+            scoring_cliente = datos.scoring_cliente(id_cliente)
     
     st.divider()
     
@@ -137,20 +197,19 @@ try:
         # Movimientos limitados - filtrar por las entidades de las cuentas limitadas
         st.markdown("### 📊 Últimos Movimientos (Limitado)")
         entidades_limitadas = cuentas_limitadas['entidad_financiera'].tolist()
-        movimientos_free = historial_cliente[
-            historial_cliente['entidad_financiera'].isin(entidades_limitadas)
-        ].head(3)
+        with rerun_profiler.section("filtros"):
+            movimientos_free = datos.movimientos(
+                id_cliente, 0, 3, {'entidad_financiera': entidades_limitadas}
+            )
         
         if len(movimientos_free) > 0:
-            for idx, mov in movimientos_free.iterrows():
-                monto = mov['pago_realizado'] if pd.notna(mov['pago_realizado']) else 0
-                categoria = mov['categoria_gasto'] if pd.notna(mov['categoria_gasto']) else 'Sin categoría'
-                canal = mov['canal_transaccion'] if pd.notna(mov['canal_transaccion']) else 'N/A'
-                
-                with st.expander(f"{str(mov['fecha_registro'])[:10]} - {mov['entidad_financiera']} - ${monto:,.0f}"):
-                    st.write(f"**Tipo:** {mov['tipo_operacion']}")
-                    st.write(f"**Categoría:** {categoria}")
-                    st.write(f"**Canal:** {canal}")
+            mostrar_movimientos(
+                len(movimientos_free),
+                lambda inicio, cantidad: movimientos_free.iloc[inicio:inicio + cantidad],
+                "free",
+                history_pager.FREE_COLUMNS,
+                tamano_pagina=3,
+            )
         else:
             st.info("No hay movimientos recientes disponibles.")
         
@@ -176,12 +235,19 @@ try:
         # ========== VERSIÓN PREMIUM ==========
         st.success("⭐ Plan PREMIUM - Acceso completo")
         
+        # Métricas precalculadas al cargar los datos (una sola búsqueda por cliente)
+        with rerun_profiler.section("agregados"):
+            if precarga is not None and "agregados" in precarga:
+                agregados = precarga["agregados"]
+            else:
+                agregados = datos.agregados_cliente(id_cliente)
+        
         # Todas las cuentas
         st.markdown("### 💳 Todas tus Cuentas de Débito")
         
-        total_saldo = cuentas_cliente['saldo_actual'].sum()
+        total_saldo = agregados['total_saldo']
         st.metric("💰 Saldo Total", f"${total_saldo:,.2f}", 
-                 delta=f"{len(cuentas_cliente)} cuenta(s) activa(s)")
+                 delta=f"{agregados['num_cuentas']} cuenta(s) activa(s)")
         
         # Mostrar cuentas en columnas
         num_cuentas = len(cuentas_cliente)
@@ -213,6 +279,32 @@ try:
             with col4:
                 st.metric("Percentil Nacional", f"{int(scoring_cliente['percentil_nacional'])}%")
             
+            # Comparación con clientes similares: percentiles por búsqueda binaria
+            # sobre los valores de cada grupo, ordenados al cargar los datos
+            with rerun_profiler.section("cohortes"):
+                cohortes = datos.cohortes_cliente(id_cliente)
+            if cohortes:
+                with st.expander("👥 Comparación con clientes similares"):
+                    st.caption(
+                        "Percentil: porcentaje de clientes del grupo con un valor menor; los empates cuentan como la mitad. "
+                        "En puntaje, más alto es mejor; en deuda/ingreso y utilización, más bajo es mejor."
+                    )
+                    st.dataframe(
+                        [
+                            {
+                                "Grupo": NOMBRES_COHORTE[c['dimension']],
+                                "Valor": str(c['cohort']),
+                                "Clientes": c['peers'],
+                                "Puntaje": c['puntaje_credito'],
+                                "Deuda/ingreso": c['ratio_deuda_ingreso'],
+                                "Utilización": c['utilizacion_credito_promedio'],
+                            }
+                            for c in cohortes
+                        ],
+                        hide_index=True,
+                        column_config=FORMATO_COHORTES,
+                    )
+            
             # Detalles del score
             with st.expander("📈 Ver análisis detallado"):
                 col1, col2 = st.columns(2)
@@ -236,71 +328,81 @@ try:
         # Historial completo de movimientos
         st.markdown("### 📊 Historial Completo de Movimientos")
         
-        if len(historial_cliente) > 0:
+        if agregados['num_movimientos'] > 0:
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Total Movimientos", len(historial_cliente))
+                st.metric("Total Movimientos", agregados['num_movimientos'])
             with col2:
-                debitos = historial_cliente[historial_cliente['tipo_operacion'] == 'Debito']
-                total_debitos = debitos['pago_realizado'].sum() if len(debitos) > 0 else 0
-                st.metric("Total Débitos", f"${total_debitos:,.0f}")
+                st.metric("Total Débitos", f"${agregados['total_debitos']:,.0f}")
             with col3:
-                creditos = historial_cliente[historial_cliente['tipo_operacion'] == 'Credito']
-                total_creditos = creditos['pago_realizado'].sum() if len(creditos) > 0 else 0
-                st.metric("Total Créditos", f"${total_creditos:,.0f}")
+                st.metric("Total Créditos", f"${agregados['total_creditos']:,.0f}")
             
             # Filtros
             col1, col2 = st.columns(2)
             with col1:
+                tipos = datos.valores_historial(id_cliente, 'tipo_operacion')
                 tipo_filtro = st.multiselect(
                     "Filtrar por tipo de operación",
-                    options=historial_cliente['tipo_operacion'].unique(),
-                    default=historial_cliente['tipo_operacion'].unique()
+                    options=tipos,
+                    default=tipos
                 )
             with col2:
+                entidades = datos.valores_historial(id_cliente, 'entidad_financiera')
                 entidad_filtro = st.multiselect(
                     "Filtrar por entidad",
-                    options=historial_cliente['entidad_financiera'].unique(),
-                    default=historial_cliente['entidad_financiera'].unique()
+                    options=entidades,
+                    default=entidades
                 )
             
-            # Aplicar filtros
-            historial_filtrado = historial_cliente[
-                (historial_cliente['tipo_operacion'].isin(tipo_filtro)) &
-                (historial_cliente['entidad_financiera'].isin(entidad_filtro))
-            ].sort_values('fecha_registro', ascending=False)
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                categorias = datos.valores_historial(id_cliente, 'categoria_gasto')
+                categoria_filtro = st.multiselect(
+                    "Filtrar por categoría",
+                    options=categorias,
+                    default=categorias
+                )
+            with col2:
+                canales = datos.valores_historial(id_cliente, 'canal_transaccion')
+                canal_filtro = st.multiselect(
+                    "Filtrar por canal",
+                    options=canales,
+                    default=canales
+                )
+            with col3:
+                fecha_min, fecha_max = datos.rango_fechas(id_cliente)
+                rango = ()
+                if fecha_min is not None:
+                    rango = st.date_input(
+                        "Rango de fechas",
+                        value=(fecha_min.date(), fecha_max.date()),
+                        min_value=fecha_min.date(),
+                        max_value=fecha_max.date(),
+                    )
             
-            # Tabla de movimientos
-            for idx, mov in historial_filtrado.head(10).iterrows():
-                color = "🔴" if mov['tipo_operacion'] == 'Debito' else "🟢"
-                monto = mov['pago_realizado'] if pd.notna(mov['pago_realizado']) else 0
-                categoria = mov['categoria_gasto'] if pd.notna(mov['categoria_gasto']) else 'Sin categoría'
-                
-                with st.expander(f"{color} {str(mov['fecha_registro'])[:10]} - {mov['entidad_financiera']} - ${monto:,.0f}"):
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.write(f"**Tipo:** {mov['tipo_operacion']}")
-                        st.write(f"**Categoría:** {categoria}")
-                        st.write(f"**Tipo de registro:** {mov['tipo_registro']}")
-                        if pd.notna(mov['canal_transaccion']):
-                            st.write(f"**Canal:** {mov['canal_transaccion']}")
-                    with col2:
-                        if pd.notna(mov['saldo_anterior']):
-                            st.write(f"**Saldo anterior:** ${mov['saldo_anterior']:,.2f}")
-                        if pd.notna(mov['saldo_posterior']):
-                            st.write(f"**Saldo posterior:** ${mov['saldo_posterior']:,.2f}")
-                        if pd.notna(mov['estado_cuenta']):
-                            st.write(f"**Estado:** {mov['estado_cuenta']}")
-                    
-                    # Mostrar alertas si existen
-                    if pd.notna(mov['titulo_alerta']):
-                        st.warning(f"**{mov['titulo_alerta']}**")
-                        st.write(mov['mensaje_alerta'])
-                        if pd.notna(mov['accion_recomendada']):
-                            st.info(f"💡 **Recomendación:** {mov['accion_recomendada']}")
+            # Los filtros se aplican en el backend (el historial viene ordenado, más reciente primero).
+            # Categoría, canal y fechas solo filtran cuando se acotan, para no ocultar por defecto
+            # los movimientos sin categoría, sin canal o sin fecha.
+            filtros = {'tipo_operacion': tipo_filtro, 'entidad_financiera': entidad_filtro}
+            if len(categoria_filtro) < len(categorias):
+                filtros['categoria_gasto'] = categoria_filtro
+            if len(canal_filtro) < len(canales):
+                filtros['canal_transaccion'] = canal_filtro
+            if len(rango) == 2 and tuple(rango) != (fecha_min.date(), fecha_max.date()):
+                filtros['fecha_registro'] = tuple(rango)
+            with rerun_profiler.section("filtros"):
+                total_filtrado = datos.contar_movimientos(id_cliente, filtros)
             
-            if len(historial_filtrado) > 10:
-                st.info(f"Mostrando 10 de {len(historial_filtrado)} movimientos. Ajusta los filtros para ver más.")
+            # Tabla paginada de movimientos
+            if total_filtrado > 0:
+                mostrar_movimientos(
+                    total_filtrado,
+                    lambda inicio, cantidad: datos.movimientos(id_cliente, inicio, cantidad, filtros),
+                    "premium",
+                    history_pager.PREMIUM_COLUMNS,
+                )
+            else:
+                st.info("Ningún movimiento coincide con los filtros seleccionados.")
         else:
             st.info("No hay movimientos registrados para este cliente.")
         
@@ -313,10 +415,7 @@ try:
         
         with col1:
             st.write("**Gastos por Categoría:**")
-            gastos_categoria = historial_cliente[
-                (historial_cliente['tipo_operacion'] == 'Debito') & 
-                (pd.notna(historial_cliente['categoria_gasto']))
-            ].groupby('categoria_gasto')['pago_realizado'].sum().sort_values(ascending=False)
+            gastos_categoria = agregados['gastos_por_categoria']
             
             if len(gastos_categoria) > 0:
                 for cat, monto in gastos_categoria.items():
@@ -326,18 +425,43 @@ try:
         
         with col2:
             st.write("**Distribución de Saldos:**")
-            for idx, cuenta in cuentas_cliente.iterrows():
-                porcentaje = (cuenta['saldo_actual'] / total_saldo * 100) if total_saldo > 0 else 0
-                st.write(f"• {cuenta['entidad_financiera']}: {porcentaje:.1f}%")
+            for entidad, porcentaje in agregados['distribucion_saldos']:
+                st.write(f"• {entidad}: {porcentaje:.1f}%")
         
         with col3:
-            balance = cliente['ingresos_mensuales'] - cliente['gastos_mensuales']
+            balance = agregados['balance_mensual']
             st.metric("Balance Mensual", f"${balance:,.0f}", 
                      delta="Positivo" if balance > 0 else "Negativo")
-            capacidad_ahorro = (balance / cliente['ingresos_mensuales'] * 100) if cliente['ingresos_mensuales'] > 0 else 0
+            capacidad_ahorro = agregados['capacidad_ahorro']
             st.write(f"**Capacidad de ahorro:** {capacidad_ahorro:.1f}%")
             st.write(f"**Personas a cargo:** {int(cliente['personas_a_cargo'])}")
             st.write(f"**Estrato:** {int(cliente['estrato_socioeconomico'])}")
+        
+        # Tendencia mensual: se grafica desde los acumulados por mes (calculados al cargar
+        # los datos y actualizados con los movimientos nuevos), sin recorrer el historial
+        with rerun_profiler.section("tendencia_mensual"):
+            tendencia = datos.tendencia_mensual(id_cliente)
+        
+        if len(tendencia['totales']) > 0:
+            st.markdown("#### 📅 Tendencia Mensual")
+            tab1, tab2, tab3 = st.tabs(["Débitos y créditos", "Gastos por categoría", "Saldo"])
+            with tab1:
+                st.bar_chart(
+                    tendencia['totales'][['debitos', 'creditos']].rename(
+                        columns={'debitos': 'Débitos', 'creditos': 'Créditos'}
+                    ),
+                    stack=False,
+                )
+            with tab2:
+                if len(tendencia['gastos'].columns) > 0:
+                    st.bar_chart(tendencia['gastos'])
+                else:
+                    st.write("Sin datos de gastos")
+            with tab3:
+                if len(tendencia['saldos'].columns) > 0:
+                    st.line_chart(tendencia['saldos'].assign(Total=tendencia['saldo_total']))
+                else:
+                    st.write("Sin datos de saldos")
     
     st.divider()
     st.caption("© 2024 Equipo B - Sistema de Gestión Financiera")
@@ -1,3 +1,86 @@
+import re
+
 import streamlit as st
+from services import chat_backends, chat_context, chat_service, dataset_service, rerun_profiler, token_claims
+from services.auth_service import AuthService
+
+st.title("Equipo C - Asistente Financiero")
+
+# Verificar que el usuario esté autenticado
+if 'is_authenticated' not in st.session_state or not st.session_state.is_authenticated:
+    st.error("❌ No estás autenticado. Por favor inicia sesión.")
+    st.stop()
+
+if 'token' not in st.session_state or not st.session_state.token:
+    st.error("❌ Token no encontrado. Por favor inicia sesión.")
+    st.stop()
+
+# Resolver el UUID localmente desde el JWT; solo se llama a whoami si el token no lo trae
+with rerun_profiler.section("identidad"):
+    id_usuario = token_claims.user_id(st.session_state.token)
+    if not id_usuario:
+        coincidencia = re.search(
+            r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}',
+            str(AuthService.whoami(st.session_state.token)),
+        )
+        id_usuario = coincidencia.group(0) if coincidencia else None
+
+if not id_usuario:
+    st.error("❌ No se pudo obtener el ID del usuario.")
+    st.stop()
+
+try:
+    servicio = chat_service.shared()
+except chat_backends.ChatNotConfigured as e:
+    st.error(f"❌ El asistente no está configurado: {e}")
+    st.stop()
+
+try:
+    # El mismo dataset compartido del dashboard del Equipo B. El resumen del cliente
+    # (saldos, gastos, alertas) se arma una vez y se reutiliza en cada pregunta,
+    # hasta que el dataset cambie
+    with rerun_profiler.section("contexto_chat"):
+        contexto = chat_context.contexts.get(dataset_service.shared().get(), id_usuario)
+except FileNotFoundError as e:
+    st.error(f"❌ Error al cargar los datos: {e}")
+    st.info("Asegúrate de que los archivos CSV estén en la carpeta 'data/'")
+    st.stop()
+except Exception as e:
+    st.error(f"❌ Error inesperado: {e}")
+    st.info("Verifica que los archivos CSV tengan el formato correcto")
+    st.stop()
+
+if contexto is None:
+    st.error(f"❌ No se encontró información financiera para el usuario ID: {id_usuario}")
+    st.info("💡 Contacta a soporte para registrar tus datos financieros.")
+    st.stop()
+
+# Conversación de la sesión; se reinicia si cambia el usuario
+if st.session_state.get('chat_usuario') != id_usuario:
+    st.session_state.chat_usuario = id_usuario
+    st.session_state.chat_mensajes = []
+
+st.caption("Pregunta por tus saldos, tus gastos por categoría, tus alertas o tu puntaje de crédito.")
+
+for mensaje in st.session_state.chat_mensajes:
+    with st.chat_message(mensaje['role']):
+        st.markdown(mensaje['content'])
+
+pregunta = st.chat_input("Escribe tu pregunta")
+if pregunta:
+    st.session_state.chat_mensajes.append({'role': 'user', 'content': pregunta})
+    with st.chat_message('user'):
+        st.markdown(pregunta)
 
-st.title("Equipo C")
+    # La respuesta se muestra palabra por palabra mientras el modelo la genera
+    with st.chat_message('assistant'):
+        try:
+            respuesta = st.write_stream(servicio.stream(st.session_state.chat_mensajes, contexto))
+        except chat_service.ChatUnavailable as e:
+            respuesta = None
+            st.error(f"❌ El asistente no está disponible en este momento: {e}")
+    if respuesta:
+        st.session_state.chat_mensajes.append({'role': 'assistant', 'content': respuesta})
+    else:
+        # Sin respuesta, la pregunta no queda en el historial que se envía al modelo
+        st.session_state.chat_mensajes.pop()
@@ -0,0 +1,127 @@
+import pandas as pd
+import streamlit as st
+
+from services import api_metrics, chat_context, chat_service, otp_qr, rerun_profiler, warmup
+from services.auth_service import AuthService
+from services.prefetch import prefetcher
+
+st.set_page_config(page_title="Diagnostics • Nuu", page_icon="🩺", layout="wide")
+st.title("🩺 Diagnostics")
+
+# Only listed in the navigation for admins, but the URL can still be typed
+if not AuthService.is_admin(st.session_state.get("username")):
+    st.error("❌ This page is only available to administrators.")
+    st.stop()
+
+# ---------- Upstream API ----------
+st.subheader("Upstream API calls")
+st.caption("Every call made through AuthService, since the process started. Percentiles are estimated from the histogram buckets.")
+
+rows = api_metrics.registry.snapshot()
+if rows:
+    table = pd.DataFrame(rows)
+    table["statuses"] = table["statuses"].map(
+        lambda statuses: ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items()))
+    )
+    st.dataframe(
+        table,
+        hide_index=True,
+        column_config={
+            "mean_ms": st.column_config.NumberColumn("mean (ms)", format="%.1f"),
+            "p50_ms": st.column_config.NumberColumn("p50 (ms)", format="%.1f"),
+            "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.1f"),
+            "p99_ms": st.column_config.NumberColumn("p99 (ms)", format="%.1f"),
+            "request_bytes": st.column_config.NumberColumn("sent (B)"),
+            "response_bytes": st.column_config.NumberColumn("received (B)"),
+        },
+    )
+else:
+    st.info("No upstream calls recorded yet.")
+
+resilience = AuthService.resilience_stats()
+coalesced = AuthService.single_flight_stats()
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Circuit breaker", resilience["breaker_state"].replace("_", "-"))
+col2.metric("Times opened", resilience["times_opened"])
+col3.metric("Stale replies served", resilience["stale_served"])
+col4.metric("Calls coalesced", coalesced["shared"], help="whoami/otp calls that joined an identical call in flight")
+st.caption(
+    f"{coalesced['leaders']} whoami/otp calls went upstream, {coalesced['shared']} were saved "
+    f"({coalesced['saved_rate']:.0%}); {coalesced['in_flight']} in flight now."
+)
+
+# ---------- Reruns ----------
+st.subheader("Rerun profile")
+st.caption(
+    f"Sections of the last {len(rerun_profiler.log)} profiled reruns of every session. "
+    "Enable with PROFILE_RERUNS=1 or the ?profile=1 query parameter."
+)
+profile_rows = rerun_profiler.log.aggregate()
+if profile_rows:
+    st.dataframe(
+        pd.DataFrame(profile_rows).sort_values("mean_ms", ascending=False),
+        hide_index=True,
+        column_config={
+            column: st.column_config.NumberColumn(column.replace("_ms", " (ms)"), format="%.1f")
+            for column in ("mean_ms", "p50_ms", "p95_ms", "max_ms")
+        },
+    )
+else:
+    st.info("No profiled reruns recorded yet.")
+
+# ---------- Caches ----------
+st.subheader("Caches")
+col1, col2, col3 = st.columns(3)
+for col, name, stats in (
+    (col1, "whoami", AuthService.whoami_cache_stats()),
+    (col2, "OTP QR", otp_qr.cache_stats()),
+    (col3, "whoami (host-wide)", AuthService.whoami_disk_stats()),
+):
+    if stats is None:
+        continue
+    with col:
+        st.metric(f"{name} hit rate", f"{stats['hit_rate']:.0%}")
+        st.caption(f"{stats['hits']} hits, {stats['misses']} misses, {stats['size']}/{stats['maxsize']} entries")
+
+# ---------- Startup ----------
+if warmup.timings:
+    st.subheader("Background warm-up")
+    st.dataframe(
+        pd.DataFrame({"step": list(warmup.timings), "ms": [t * 1e3 for t in warmup.timings.values()]}),
+        hide_index=True,
+        column_config={"ms": st.column_config.NumberColumn(format="%.1f")},
+    )
+
+# ---------- Prefetch ----------
+st.subheader("Sign-in prefetch")
+counts = prefetcher.stats()
+st.caption(
+    f"{counts['started']} started, {counts['completed']} completed, {counts['used']} used by a first render, "
+    f"{counts['cancelled']} cancelled, {counts['failed']} failed, {counts['skipped']} skipped (queue full); "
+    f"{counts['running']} queued or running."
+)
+
+# ---------- Chat ----------
+st.subheader("Chat assistant")
+try:
+    chat = chat_service.shared().stats()
+except ValueError as exc:
+    st.warning(f"Chat backend misconfigured: {exc}")
+else:
+    col1, col2, col3 = st.columns(3)
+    for col, label, key in ((col1, "Time to first token (p50)", "ttft_p50"), (col2, "p95", "ttft_p95")):
+        col.metric(label, f"{chat[key] * 1e3:.0f} ms" if chat[key] is not None else "–")
+    col3.metric("Chunks per second", f"{chat['chunks_per_second']:.0f}" if chat['chunks_per_second'] else "–")
+    contexts = chat_context.contexts.stats()
+    st.caption(
+        f"{chat['answers']} answers logged, {chat['failed']} failed, {chat['cancelled']} cancelled; "
+        f"client snapshots: {contexts['hits']} hits, {contexts['misses']} misses, "
+        f"{contexts['size']}/{contexts['maxsize']} entries."
+    )
+
+# ---------- Export ----------
+st.subheader("Prometheus export")
+text = api_metrics.registry.prometheus_text()
+st.download_button("Download metrics", text, file_name="metrics.prom", mime="text/plain")
+with st.expander("Raw metrics"):
+    st.code(text, language="text")
@@ -0,0 +1,190 @@
+"""
+Load test of the sign-in / whoami / dashboard flow through ``AuthService``.
+
+Simulated users run concurrently against the local stand-in API. Each one
+signs in, calls ``/whoami`` and then reruns the dashboard ``--reruns`` times,
+doing what ``4_B_page.py`` does per rerun: resolve the user id from the token
+(falling back to the cached whoami) and, with ``--data-dir``, look up the
+client's rows in the shared dataset. Latency, error replies and dropped
+connections can be injected into the stand-in.
+
+Reports p50/p95/p99 latency, errors and requests per second per operation.
+
+Usage:
+    python -m benchmarks.bench_auth_load --users 200 --concurrency 32
+    python -m benchmarks.bench_auth_load --latency-ms 20 --jitter-ms 30 --error-rate 0.02 --output load.json
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pyarrow.csv as pv
+
+from benchmarks.stand_in_api import Faults, start_server
+from services import http_client, token_claims
+from services.auth_service import AuthService
+from services.financial_schema import TABLE_FILES
+
+
+class Recorder:
+    """Thread-safe latency and error samples per operation."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def time(self, operation: str, call):
+        start = time.perf_counter()
+        try:
+            ok, result = call()
+        except Exception:
+            ok, result = False, None
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies[operation].append(elapsed)
+            if not ok:
+                self.errors[operation] += 1
+        return result if ok else None
+
+    def report(self, elapsed: float) -> dict:
+        report = {}
+        for operation, samples in self.latencies.items():
+            ms = np.array(samples) * 1e3
+            report[operation] = {
+                "count": len(samples),
+                "errors": self.errors[operation],
+                "p50_ms": round(float(np.percentile(ms, 50)), 3),
+                "p95_ms": round(float(np.percentile(ms, 95)), 3),
+                "p99_ms": round(float(np.percentile(ms, 99)), 3),
+                "rps": round(len(samples) / elapsed, 1),
+            }
+        return report
+
+
+def _users(data_dir: str, count: int) -> list:
+    """Return ``(user_id, membership)`` pairs, taken from the dataset when one is given."""
+    if data_dir is None:
+        return [(str(uuid.uuid4()), "PREMIUM" if i % 3 == 0 else "FREE") for i in range(count)]
+    clientes = pv.read_csv(
+        os.path.join(data_dir, TABLE_FILES["clientes"]),
+        convert_options=pv.ConvertOptions(include_columns=["id_cliente", "es_cliente_premium"]),
+    ).slice(0, count)
+    return [
+        (cid, "PREMIUM" if premium else "FREE")
+        for cid, premium in zip(clientes["id_cliente"].to_pylist(), clientes["es_cliente_premium"].to_pylist())
+    ]
+
+
+def _simulate_user(recorder: Recorder, email: str, password: str, reruns: int, service):
+    def sign_in():
+        ok, details = AuthService.authenticate_user(email, password)
+        return ok, details
+
+    details = recorder.time("signin", sign_in)
+    if details is None:
+        return
+    token = details["access_token"]
+
+    def whoami():
+        body = AuthService.whoami(token)
+        return "message" in body, body
+
+    recorder.time("whoami", whoami)
+
+    def dashboard():
+        user_id = token_claims.user_id(token)
+        if not user_id:
+            body = AuthService.whoami(token)
+            user_id = token_claims.UUID_PATTERN.search(str(body))
+            user_id = user_id and user_id.group(0)
+        if service is not None and user_id:
+            datos = service.get()
+            cliente = datos.cliente(user_id)
+            if cliente is None:
+                return False, None
+            datos.cuentas_cliente(user_id)
+            datos.historial_cliente(user_id)
+            datos.agregados_cliente(user_id)
+        return bool(user_id), user_id
+
+    for _ in range(reruns):
+        recorder.time("dashboard", dashboard)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--reruns", type=int, default=5, help="dashboard reruns per user")
+    parser.add_argument("--data-dir", default=None, help="dataset to serve dashboard lookups from")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--output", default=None, help="JSON file to write the results to")
+    args = parser.parse_args()
+
+    faults = Faults(
+        latency=args.latency_ms / 1e3, jitter=args.jitter_ms / 1e3,
+        error_rate=args.error_rate, drop_rate=args.drop_rate,
+    )
+    server, base_url = start_server(faults=faults)
+    http_client.API_BASE = base_url
+    http_client.configure(pool_maxsize=args.concurrency)
+
+    service = None
+    if args.data_dir:
+        from services.dataset_service import DatasetService
+        service = DatasetService(data_dir=args.data_dir, store_dir=os.path.join(args.data_dir, ".columnar"))
+        service.get()
+
+    accounts = []
+    for i, (user_id, membership) in enumerate(_users(args.data_dir, args.users)):
+        email = f"usuario{i}@nuu.com.co"
+        server.add_user(email, "secreto", user_id=user_id, membership=membership)
+        accounts.append(email)
+
+    recorder = Recorder()
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for future in [
+                pool.submit(_simulate_user, recorder, email, "secreto", args.reruns, service) for email in accounts
+            ]:
+                future.result()
+    finally:
+        server.shutdown()
+    elapsed = time.perf_counter() - start
+
+    report = recorder.report(elapsed)
+    total = sum(op["count"] for op in report.values())
+    print(f"{args.users} users, concurrency {args.concurrency}, {elapsed:.2f}s, {total / elapsed:.1f} ops/s")
+    print(f"{'operation':<10} {'count':>7} {'errors':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'rps':>9}")
+    for operation, stats in report.items():
+        print(
+            f"{operation:<10} {stats['count']:>7} {stats['errors']:>7} {stats['p50_ms']:>7.2f}ms "
+            f"{stats['p95_ms']:>7.2f}ms {stats['p99_ms']:>7.2f}ms {stats['rps']:>9.1f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "users": args.users,
+                "concurrency": args.concurrency,
+                "reruns": args.reruns,
+                "faults": vars(faults),
+                "elapsed_s": round(elapsed, 3),
+                "operations": report,
+            }, f, indent=2)
+        print(f"\nresults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
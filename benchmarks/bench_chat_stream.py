@@ -0,0 +1,136 @@
+"""
+Time to first token and tokens per second of the Equipo C chat assistant.
+
+Questions go to the PREMIUM client with the most movements of a synthetic
+dataset, through ``ChatService`` over the stand-in backend (``--first-token-ms``
+and ``--token-ms`` simulate a model's prefill and decoding; 0 measures the
+orchestration alone). Per scenario, over ``--questions`` questions:
+
+    csv        context from the CSVs on every question (reading the client's
+               rows only, a lower bound of a per-question rescan)
+    build      context snapshot built on every question from the loaded dataset
+    snapshot   snapshot from the ContextStore (what the page does)
+    direct     snapshot, backend iterated with ``asyncio.run`` in the calling
+               thread (no event-loop thread, no queue): the orchestration floor
+    parallel   snapshot, ``--concurrency`` sessions asking at the same time
+
+Reported: median and p95 time to first token (question to first chunk in
+the script thread) and tokens per second after the first.
+
+Usage:
+    python -m benchmarks.bench_chat_stream [--clients 20000] [--movements 1000000] [--token-ms 0]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+
+from benchmarks.bench_dashboard import pick_clients
+from benchmarks.synthetic_data import write_dataset
+from services import chat_context
+from services.chat_backends import StandInBackend
+from services.chat_service import ChatService
+from services.dataset_service import DatasetService
+from services.financial_schema import TABLE_FILES
+
+QUESTIONS = (
+    "¿Cuál es mi saldo?",
+    "¿En qué categorías gasto más?",
+    "¿Tengo alertas?",
+    "¿Cuál es mi puntaje de crédito?",
+    "¿Cómo me fue el último mes?",
+)
+
+
+def _csv_rows(data_dir: str, id_cliente: str):
+    """Read the client's rows of every table from the CSVs."""
+    for file_name in TABLE_FILES.values():
+        table = pv.read_csv(os.path.join(data_dir, file_name))
+        table.filter(pc.equal(table["id_cliente"], id_cliente))
+
+
+def _ask(service: ChatService, context_for, question: str) -> tuple:
+    start = time.perf_counter()
+    context = context_for()
+    first, answer = None, []
+    for chunk in service.stream([{"role": "user", "content": question}], context):
+        if first is None:
+            first = time.perf_counter()
+        answer.append(chunk)
+    # The stand-in streams one word per token
+    return start, first, time.perf_counter(), len("".join(answer).split())
+
+
+def _ask_direct(backend: StandInBackend, context, question: str) -> tuple:
+    async def consume():
+        first, tokens = None, 0
+        async for _ in backend.stream([{"role": "user", "content": question}], context):
+            first = first or time.perf_counter()
+            tokens += 1
+        return first, tokens
+
+    start = time.perf_counter()
+    first, tokens = asyncio.run(consume())
+    return start, first, time.perf_counter(), tokens
+
+
+def _summary(runs: list) -> str:
+    ttft = sorted(first - start for start, first, _, _ in runs)
+    rates = [(tokens - 1) / (end - first) for _, first, end, tokens in runs if tokens > 1 and end > first]
+    p95 = ttft[min(len(ttft) - 1, int(len(ttft) * 0.95))]
+    rate = f"{statistics.median(rates):>10.0f}" if rates else f"{'-':>10}"
+    return f"{statistics.median(ttft) * 1e3:>9.2f}ms {p95 * 1e3:>9.2f}ms {rate}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20_000)
+    parser.add_argument("--movements", type=int, default=1_000_000)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--first-token-ms", type=float, default=0.0, help="simulated model prefill")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="simulated time per token")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    backend = StandInBackend(args.first_token_ms / 1e3, args.token_ms / 1e3)
+    service = ChatService(backend, max_concurrent=args.concurrency)
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.questions)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_dataset(tmp, args.clients, args.movements)
+        id_cliente = pick_clients(tmp)["PREMIUM"]
+        datos = DatasetService(tmp, os.path.join(tmp, ".columnar")).get()
+        store = chat_context.ContextStore()
+        store.get(datos, id_cliente)
+        print(f"{args.movements} movements over {args.clients} clients; client with "
+              f"{datos.agregados_cliente(id_cliente)['num_movimientos']} movements")
+        print(f"model: first token {args.first_token_ms:g} ms, {args.token_ms:g} ms per token\n")
+        print(f"{'scenario':>10} {'ttft p50':>11} {'ttft p95':>11} {'tokens/s':>10}")
+
+        def csv_context():
+            _csv_rows(tmp, id_cliente)
+            return chat_context.build(datos, id_cliente)
+
+        scenarios = {
+            "csv": lambda q: _ask(service, csv_context, q),
+            "build": lambda q: _ask(service, lambda: chat_context.build(datos, id_cliente), q),
+            "snapshot": lambda q: _ask(service, lambda: store.get(datos, id_cliente), q),
+            "direct": lambda q: _ask_direct(backend, store.get(datos, id_cliente), q),
+        }
+        for name, ask in scenarios.items():
+            runs = [ask(q) for q in (questions[:5] if name == "csv" else questions)]
+            print(f"{name:>10} {_summary(runs)}")
+
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            runs = list(pool.map(scenarios["snapshot"], questions * args.concurrency))
+        print(f"{'parallel':>10} {_summary(runs)}   ({args.concurrency} sessions)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark the PREMIUM analytics panel: per-rerun recomputation vs. ClientAggregates.
+
+Usage:
+    python -m benchmarks.bench_client_aggregates [--movements 100000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from services.client_aggregates import ClientAggregates
+from services.client_index import ClientIndex
+
+
+def _arrow_frame(columns: dict) -> pd.DataFrame:
+    return pa.table(columns).to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def _per_rerun(historial_cliente, cuentas_cliente, cliente):
+    """The computations the page used to run on every rerun."""
+    debitos = historial_cliente[historial_cliente['tipo_operacion'] == 'Debito']
+    creditos = historial_cliente[historial_cliente['tipo_operacion'] == 'Credito']
+    total_saldo = cuentas_cliente['saldo_actual'].sum()
+    return {
+        "total_debitos": debitos['pago_realizado'].sum(),
+        "total_creditos": creditos['pago_realizado'].sum(),
+        "gastos": historial_cliente[
+            (historial_cliente['tipo_operacion'] == 'Debito') &
+            (pd.notna(historial_cliente['categoria_gasto']))
+        ].groupby('categoria_gasto')['pago_realizado'].sum().sort_values(ascending=False),
+        "distribucion": [s / total_saldo * 100 for s in cuentas_cliente['saldo_actual']],
+        "balance": cliente['ingresos_mensuales'] - cliente['gastos_mensuales'],
+    }
+
+
+def _timeit(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--movements", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(3)
+    n = args.movements
+    clientes = _arrow_frame({
+        "id_cliente": ["heavy"], "ingresos_mensuales": [5e6], "gastos_mensuales": [3e6],
+    })
+    cuentas = _arrow_frame({
+        "id_cliente": ["heavy"] * 4,
+        "entidad_financiera": ["Bancolombia", "Davivienda", "Nequi", "BBVA"],
+        "saldo_actual": rng.random(4) * 1e6,
+    })
+    historial = _arrow_frame({
+        "id_cliente": ["heavy"] * n,
+        "tipo_operacion": rng.choice(["Debito", "Credito"], n),
+        "pago_realizado": rng.random(n) * 1e5,
+        "categoria_gasto": rng.choice(["Comida", "Transporte", "Salud", "Ocio", None], n),
+    })
+
+    historial_cliente = ClientIndex(historial).rows("heavy")
+    cuentas_cliente = ClientIndex(cuentas).rows("heavy")
+    cliente = ClientIndex(clientes).first("heavy")
+
+    start = time.perf_counter()
+    agregados = ClientAggregates(clientes, cuentas, historial)
+    build = time.perf_counter() - start
+
+    before = _timeit(lambda: _per_rerun(historial_cliente, cuentas_cliente, cliente), args.repeat)
+    after = _timeit(lambda: agregados.lookup("heavy"), args.repeat * 10)
+    print(f"movements={n} one-off build={build * 1e3:.1f}ms")
+    print(f"per-rerun recompute: {before * 1e3:8.3f}ms")
+    print(f"aggregates lookup:   {after * 1e3:8.3f}ms  ({before / after:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark per-client lookups: full-column boolean masks vs. ClientIndex.
+
+Usage:
+    python -m benchmarks.bench_client_index [--scales 10000:500000,100000:5000000]
+
+Each scale is ``clients:movements``. The production target is
+``1000000:50000000``, which needs roughly 8 GB of RAM.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from services.client_index import ClientIndex
+
+
+def _client_ids(n: int) -> np.ndarray:
+    return np.array([f"{i:08x}-0000-4000-8000-{i:012x}" for i in range(n)], dtype=object)
+
+
+def _history(ids: np.ndarray, movements: int, rng) -> pd.DataFrame:
+    return pd.DataFrame({
+        "id_cliente": ids[rng.integers(0, len(ids), movements)],
+        "pago_realizado": rng.random(movements) * 1e6,
+    })
+
+
+def _time_per_lookup(fn, keys, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for key in keys:
+            fn(key)
+    return (time.perf_counter() - start) / (len(keys) * repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scales", default="10000:500000,100000:5000000")
+    parser.add_argument("--lookups", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    print(f"{'clients':>10} {'movements':>11} {'build':>9} {'mask/lookup':>13} {'index/lookup':>13}")
+    for scale in args.scales.split(","):
+        clients, movements = (int(part) for part in scale.split(":"))
+        ids = _client_ids(clients)
+        historial = _history(ids, movements, rng)
+        keys = list(ids[rng.integers(0, clients, args.lookups)])
+
+        start = time.perf_counter()
+        index = ClientIndex(historial)
+        build = time.perf_counter() - start
+
+        mask = _time_per_lookup(lambda k: historial[historial["id_cliente"] == k], keys)
+        indexed = _time_per_lookup(index.rows, keys, repeat=50)
+        print(f"{clients:>10} {movements:>11} {build:>8.2f}s {mask * 1e3:>11.3f}ms {indexed * 1e6:>11.2f}us")
+
+
+if __name__ == "__main__":
+    main()
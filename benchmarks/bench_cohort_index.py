@@ -0,0 +1,98 @@
+"""
+Cohort percentiles of a client's credit metrics: per-request groupby vs. CohortIndex.
+
+For each population size, reports:
+
+    groupby   ranking one client per request with a groupby rank over the
+              whole population (3 cohort dimensions x 3 metrics)
+    lookup    CohortIndex.compare for one client (binary search per cohort)
+    build     building the CohortIndex at load time
+    rescore   CohortIndex.with_scores after ``--changed`` of the scoring rows
+              changed, vs. rebuilding the index from scratch
+
+Usage:
+    python -m benchmarks.bench_cohort_index [--clients 20000,200000,1000000] [--changed 0.01]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import synthetic_data
+from services.cohort_index import COHORT_DIMENSIONS, COHORT_METRICS, CohortIndex
+from services.columnar_store import to_frame
+from services.financial_schema import storage_schema
+
+
+def _frame(table: str, data) -> pd.DataFrame:
+    return to_frame(table, data.cast(storage_schema(table, data.schema)))
+
+
+def _population(n: int, seed: int = 11):
+    rng = np.random.default_rng(seed)
+    ids = np.array([f"{i:08x}-0000-4000-8000-000000000000" for i in range(n)], dtype=object)
+    return _frame("clientes", synthetic_data.clientes(rng, ids)), _frame("scoring", synthetic_data.scoring(rng, ids))
+
+
+def _groupby(clientes: pd.DataFrame, scoring: pd.DataFrame, id_cliente) -> dict:
+    """What a request costs without the index: rank everyone, keep one client."""
+    peers = scoring.merge(clientes[["id_cliente", "ciudad", "estrato_socioeconomico"]], on="id_cliente")
+    mine = (peers["id_cliente"] == id_cliente).to_numpy(dtype=bool)
+    return {
+        (dimension, metric): float(peers.groupby(dimension, observed=True)[metric].rank(pct=True)[mine].iloc[0])
+        for dimension in COHORT_DIMENSIONS for metric in COHORT_METRICS
+    }
+
+
+def _changed_scores(scoring: pd.DataFrame, fraction: float, seed: int = 12) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    changed = scoring.copy()
+    rows = rng.choice(len(changed), max(1, int(len(changed) * fraction)), replace=False)
+    puntaje = changed["puntaje_credito"].to_numpy(dtype="int64").copy()
+    puntaje[rows] = np.clip(puntaje[rows] + rng.integers(-40, 41, len(rows)), 300, 850)
+    changed["puntaje_credito"] = pd.array(puntaje, dtype=changed["puntaje_credito"].dtype)
+    return changed
+
+
+def _seconds(fn, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", default="20000,200000,1000000", help="comma-separated population sizes")
+    parser.add_argument("--changed", type=float, default=0.01, help="fraction of scoring rows changed for rescore")
+    parser.add_argument("--repeat", type=int, default=200, help="lookups timed per size")
+    args = parser.parse_args()
+
+    print(f"{'clients':>9} {'groupby':>10} {'lookup':>10} {'build':>9} {'rescore':>9} {'rebuild':>9}")
+    for n in (int(c) for c in args.clients.split(",")):
+        clientes, scoring = _population(n)
+        index = CohortIndex(clientes, scoring)
+        id_cliente = clientes["id_cliente"].iloc[n // 2]
+
+        groupby = _seconds(lambda: _groupby(clientes, scoring, id_cliente), repeat=3)
+        lookup = _seconds(lambda: index.compare(id_cliente), repeat=args.repeat)
+        build = _seconds(lambda: CohortIndex(clientes, scoring))
+        changed = _changed_scores(scoring, args.changed)
+        rescore = _seconds(lambda: index.with_scores(changed))
+        rebuild = _seconds(lambda: CohortIndex(clientes, changed))
+
+        # Same ranking as the groupby (which counts ties as the average rank, i.e. up to the value)
+        expected = _groupby(clientes, scoring, id_cliente)
+        for entry in index.compare(id_cliente):
+            for metric in COHORT_METRICS:
+                rank = expected[(entry["dimension"], metric)] * entry["peers"]
+                assert abs(entry[metric] * entry["peers"] / 100 - (rank - 0.5)) < 1e-6
+        print(
+            f"{n:>9} {groupby * 1e3:>8.1f}ms {lookup * 1e6:>8.0f}us {build * 1e3:>7.0f}ms "
+            f"{rescore * 1e3:>7.0f}ms {rebuild * 1e3:>7.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark a cold load of the four tables: pandas CSV parsing vs. the columnar store.
+
+Each mode runs in a fresh process; resident memory is read from /proc after the load.
+
+Usage:
+    python -m benchmarks.bench_columnar_store --data-dir data
+"""
+import argparse
+import multiprocessing
+import resource
+import time
+
+
+def _csv_load(data_dir, _store_dir):
+    import pandas as pd
+
+    from services.columnar_store import source_path
+    from services.financial_schema import TABLE_FILES
+
+    return {t: pd.read_csv(source_path(t, data_dir)) for t in TABLE_FILES}
+
+
+def _columnar_load(data_dir, store_dir):
+    from services.columnar_store import load_all
+
+    return load_all(data_dir=data_dir, store_dir=store_dir)
+
+
+def _resident_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+
+
+def _measure(loader, data_dir, store_dir, queue):
+    import pandas  # noqa: F401
+    import pyarrow  # noqa: F401
+
+    baseline = _resident_mb()
+    start = time.perf_counter()
+    tables = loader(data_dir, store_dir)
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, _resident_mb() - baseline, sum(len(df) for df in tables.values())))
+
+
+def _run(loader, data_dir, store_dir):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_measure, args=(loader, data_dir, store_dir, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--store-dir", default=None)
+    args = parser.parse_args()
+
+    from services.columnar_store import convert
+    from services.financial_schema import TABLE_FILES
+    from settings import COLUMNAR_DIR
+
+    store_dir = args.store_dir or (COLUMNAR_DIR if args.data_dir == "data" else f"{args.data_dir}/.columnar")
+    start = time.perf_counter()
+    for table in TABLE_FILES:
+        convert(table, args.data_dir, store_dir)
+    print(f"one-off conversion: {time.perf_counter() - start:.2f}s")
+
+    for label, loader in (("pandas csv", _csv_load), ("columnar", _columnar_load)):
+        elapsed, rss_mb, rows = _run(loader, args.data_dir, store_dir)
+        print(f"{label:<11} load={elapsed:7.3f}s resident_delta={rss_mb:8.1f}MB rows={rows}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+End-to-end benchmark of ``all_pages/4_B_page.py`` run headless through ``AppTest``.
+
+For a FREE and a PREMIUM client, each scenario runs in a fresh process and
+records:
+
+    cold_load_s      first run of the page (dataset load, index build, render)
+    warm_rerun_ms    reruns with no input change (median and p95)
+    filter_change_ms reruns after a widget change (median and p95): the
+                     entity filter for PREMIUM; the FREE page has no
+                     filters, so its only widget (the upgrade button)
+                     is clicked instead
+    peak_rss_mb      peak resident memory of the process
+
+Results are written as JSON, tagged with the current commit, so two runs can
+be compared with ``--compare``.
+
+Usage:
+    python -m benchmarks.bench_dashboard --clients 20000 --movements 1000000 --output before.json
+    python -m benchmarks.bench_dashboard --clients 20000 --movements 1000000 --compare before.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+
+from benchmarks.stand_in_api import encode_token
+from benchmarks.synthetic_data import write_dataset
+from services.data_backend import FILTER_COLUMNS
+from services.financial_schema import TABLE_FILES
+
+PAGE = "all_pages/4_B_page.py"
+METRICS = ("cold_load_s", "warm_rerun_ms", "filter_change_ms", "peak_rss_mb")
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _summary(samples: list) -> dict:
+    ms = np.array(samples) * 1e3
+    return {"median": round(float(np.median(ms)), 3), "p95": round(float(np.percentile(ms, 95)), 3)}
+
+
+def _timed_run(at, plan: str) -> float:
+    """Run the page once and return the seconds it took; raise unless the dashboard rendered."""
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"{PAGE} raised: {at.exception[0].value}")
+    # The page reports load failures with st.error instead of raising
+    if at.error:
+        raise RuntimeError(f"{PAGE} showed an error: {at.error[0].value}")
+    if plan == "PREMIUM" and len(at.multiselect) < len(FILTER_COLUMNS):
+        raise RuntimeError(f"{PAGE} rendered {len(at.multiselect)} movement filters, expected {len(FILTER_COLUMNS)}")
+    if plan == "FREE" and not at.button:
+        raise RuntimeError(f"{PAGE} rendered no upgrade button")
+    return elapsed
+
+
+def _change_filter(at, plan: str, step: int):
+    if plan == "PREMIUM":
+        entidades = at.multiselect[1]
+        opciones = list(entidades.options)
+        # Alternate between all entities and all but one
+        entidades.set_value(opciones if step % 2 else opciones[1:])
+    else:
+        at.button[0].click()
+
+
+def _scenario(data_dir: str, client_id: str, plan: str, reruns: int, queue):
+    try:
+        queue.put(_measure(data_dir, client_id, plan, reruns))
+    except Exception as exc:
+        queue.put({"error": f"{type(exc).__name__}: {exc}"})
+
+
+def _measure(data_dir: str, client_id: str, plan: str, reruns: int) -> dict:
+    # settings reads DATA_DIR at import time, so set it before loading the page
+    os.environ["DATA_DIR"] = data_dir
+    from settings import JWT_ALGORITHM, JWT_SECRET_KEY
+    from streamlit.testing.v1 import AppTest
+
+    token = encode_token({"sub": client_id, "exp": time.time() + 3600}, JWT_SECRET_KEY, JWT_ALGORITHM)
+    at = AppTest.from_file(PAGE, default_timeout=600)
+    at.session_state.is_authenticated = True
+    at.session_state.token = token
+
+    cold = _timed_run(at, plan)
+    if at.session_state.membership != plan:
+        raise RuntimeError(f"client {client_id} rendered as {at.session_state.membership}, expected {plan}")
+
+    warm = [_timed_run(at, plan) for _ in range(reruns)]
+    filtered = []
+    for step in range(reruns):
+        _change_filter(at, plan, step)
+        filtered.append(_timed_run(at, plan))
+
+    return {
+        "cold_load_s": round(cold, 4),
+        "warm_rerun_ms": _summary(warm),
+        "filter_change_ms": _summary(filtered),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def pick_clients(data_dir: str) -> dict:
+    """Return the FREE and the PREMIUM client with the most movements."""
+    clientes = pv.read_csv(
+        os.path.join(data_dir, TABLE_FILES["clientes"]),
+        convert_options=pv.ConvertOptions(include_columns=["id_cliente", "es_cliente_premium"]),
+    )
+    movimientos = pv.read_csv(
+        os.path.join(data_dir, TABLE_FILES["historial"]),
+        convert_options=pv.ConvertOptions(include_columns=["id_cliente"]),
+    )["id_cliente"].value_counts()
+    counts = dict(zip(movimientos.field("values").to_pylist(), movimientos.field("counts").to_pylist()))
+
+    picked = {}
+    for plan, is_premium in (("FREE", False), ("PREMIUM", True)):
+        ids = clientes.filter(pc.equal(clientes["es_cliente_premium"], is_premium))["id_cliente"].to_pylist()
+        if ids:
+            picked[plan] = max(ids, key=lambda cid: counts.get(cid, 0))
+    return picked
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _value(metrics: dict, name: str) -> float:
+    value = metrics[name]
+    return value["median"] if isinstance(value, dict) else value
+
+
+def compare(baseline: dict, current: dict):
+    """Print each metric of ``current`` relative to ``baseline``."""
+    print(f"\nvs. {baseline['commit']} ({baseline['timestamp']})")
+    print(f"{'plan':<8} {'metric':<17} {'before':>10} {'after':>10} {'change':>8}")
+    for plan, metrics in current["scenarios"].items():
+        before = baseline["scenarios"].get(plan)
+        if before is None:
+            continue
+        for name in METRICS:
+            old, new = _value(before, name), _value(metrics, name)
+            change = (new - old) / old * 100 if old else float("nan")
+            print(f"{plan:<8} {name:<17} {old:>10.3f} {new:>10.3f} {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=None, help="existing dataset; a synthetic one is generated otherwise")
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--movements", type=int, default=500_000)
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--output", default=None, help="JSON file to write the results to")
+    parser.add_argument("--compare", default=None, help="JSON results of an earlier run")
+    args = parser.parse_args()
+
+    data_dir = args.data_dir
+    if data_dir is None:
+        data_dir = tempfile.mkdtemp(prefix="dashboard-")
+        write_dataset(data_dir, args.clients, args.movements)
+
+    # Convert once up front so every scenario measures a cold process, not the conversion
+    from services import columnar_store
+    columnar_store.load_all(data_dir=data_dir, store_dir=os.path.join(data_dir, ".columnar"))
+
+    ctx = multiprocessing.get_context("spawn")
+    results = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "dataset": {"data_dir": data_dir} if args.data_dir else {
+            "data_dir": data_dir, "clients": args.clients, "movements": args.movements,
+        },
+        "reruns": args.reruns,
+        "scenarios": {},
+    }
+    print(f"{'plan':<8} {'cold':>8} {'warm p50':>9} {'warm p95':>9} {'filter p50':>11} {'filter p95':>11} {'peak_rss':>9}")
+    for plan, client_id in pick_clients(data_dir).items():
+        queue = ctx.Queue()
+        process = ctx.Process(target=_scenario, args=(data_dir, client_id, plan, args.reruns, queue))
+        process.start()
+        metrics = queue.get()
+        process.join()
+        if "error" in metrics:
+            raise SystemExit(f"{plan} scenario failed: {metrics['error']}")
+        results["scenarios"][plan] = {"client_id": client_id, **metrics}
+        print(
+            f"{plan:<8} {metrics['cold_load_s']:>7.2f}s {metrics['warm_rerun_ms']['median']:>7.1f}ms "
+            f"{metrics['warm_rerun_ms']['p95']:>7.1f}ms {metrics['filter_change_ms']['median']:>9.1f}ms "
+            f"{metrics['filter_change_ms']['p95']:>9.1f}ms {metrics['peak_rss_mb']:>7.0f}MB"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nresults written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Memory and per-client latency of the dashboard's queries: columnar (pandas) vs. SQLite backend.
+
+Each backend runs in a fresh process against the same synthetic dataset and
+records the time to open it (first ``get()``), the growth of resident memory
+after opening and after the queries, and the latency of what one PREMIUM
+render asks for, over ``--samples`` random clients. Resident memory is split
+into file-backed pages (memory-mapped Arrow or SQLite pages, shared with the
+page cache and other processes) and the rest (private to the process):
+
+    perfil       cliente + cuentas + scoring
+    agregados    PREMIUM analytics
+    opciones     distinct operation types and entities
+    pagina       count + first page of 50 movements, no filter
+    filtrada     count + first page with one operation type and two entities
+    render       all of the above
+
+Usage:
+    python -m benchmarks.bench_data_backend [--clients 20000] [--movements 2000000] [--samples 300]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic_data import write_dataset
+
+QUERIES = ("perfil", "agregados", "opciones", "pagina", "filtrada")
+
+
+def _memory_mb() -> tuple:
+    """Return ``(file-backed, private)`` resident MB of this process (Linux ``statm``)."""
+    with open("/proc/self/statm") as f:
+        _, resident, shared = (int(v) for v in f.read().split()[:3])
+    page = resource.getpagesize()
+    return shared * page / 2**20, (resident - shared) * page / 2**20
+
+
+def _dashboard_queries(datos, id_cliente) -> dict:
+    timings = {}
+
+    start = time.perf_counter()
+    datos.cliente(id_cliente)
+    datos.cuentas_cliente(id_cliente)
+    datos.scoring_cliente(id_cliente)
+    timings["perfil"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    datos.agregados_cliente(id_cliente)
+    timings["agregados"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tipos = datos.valores_historial(id_cliente, "tipo_operacion")
+    entidades = datos.valores_historial(id_cliente, "entidad_financiera")
+    timings["opciones"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    datos.contar_movimientos(id_cliente)
+    datos.movimientos(id_cliente, 0, 50)
+    timings["pagina"] = time.perf_counter() - start
+
+    filtros = {"tipo_operacion": tipos[:1], "entidad_financiera": entidades[:2]}
+    start = time.perf_counter()
+    datos.contar_movimientos(id_cliente, filtros)
+    datos.movimientos(id_cliente, 0, 50, filtros)
+    timings["filtrada"] = time.perf_counter() - start
+
+    timings["render"] = sum(timings.values())
+    return timings
+
+
+def _scenario(backend: str, client_ids: list, queue):
+    try:
+        queue.put(_measure(backend, client_ids))
+    except Exception as exc:
+        queue.put({"error": f"{type(exc).__name__}: {exc}"})
+
+
+def _measure(backend: str, client_ids: list) -> dict:
+    from services import dataset_service
+
+    file_start, private_start = _memory_mb()
+    service = dataset_service.create(backend)
+    start = time.perf_counter()
+    datos = service.get()
+    open_s = time.perf_counter() - start
+    file_open, private_open = _memory_mb()
+
+    samples = {name: [] for name in (*QUERIES, "render")}
+    for id_cliente in client_ids:
+        for name, seconds in _dashboard_queries(datos, id_cliente).items():
+            samples[name].append(seconds)
+    file_end, private_end = _memory_mb()
+
+    return {
+        "open_s": open_s,
+        "open_mb": (file_open - file_start, private_open - private_start),
+        "end_mb": (file_end - file_start, private_end - private_start),
+        "latency_ms": {
+            name: (float(np.percentile(s, 50)) * 1e3, float(np.percentile(s, 95)) * 1e3)
+            for name, s in samples.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=None, help="existing dataset; a synthetic one is generated otherwise")
+    parser.add_argument("--clients", type=int, default=20_000)
+    parser.add_argument("--movements", type=int, default=2_000_000)
+    parser.add_argument("--samples", type=int, default=300, help="clients queried per backend")
+    args = parser.parse_args()
+
+    data_dir = args.data_dir
+    if data_dir is None:
+        data_dir = tempfile.mkdtemp(prefix="backend-")
+        write_dataset(data_dir, args.clients, args.movements)
+
+    # Build both stores up front so every scenario measures opening and querying, not importing
+    from services import columnar_store, sqlite_store
+    store_dir = os.path.join(data_dir, ".columnar")
+    columnar_store.load_all(data_dir=data_dir, store_dir=store_dir)
+    sqlite_path = os.path.join(data_dir, "financial.sqlite3")
+    if sqlite_store.is_stale(data_dir, sqlite_path):
+        start = time.perf_counter()
+        sqlite_store.build(data_dir, sqlite_path)
+        print(f"SQLite import: {time.perf_counter() - start:.1f}s")
+    print(f"on disk: columnar {sum(os.path.getsize(os.path.join(store_dir, f)) for f in os.listdir(store_dir)) / 2**20:.0f} MB, "
+          f"sqlite {os.path.getsize(sqlite_path) / 2**20:.0f} MB")
+
+    ids = columnar_store.load_frame("clientes", ["id_cliente"], data_dir, store_dir)["id_cliente"].tolist()
+    client_ids = random.Random(0).sample(ids, min(args.samples, len(ids)))
+
+    # settings reads these at import time; the spawned children inherit them
+    os.environ.update({"DATA_DIR": data_dir, "COLUMNAR_DIR": store_dir, "SQLITE_PATH": sqlite_path})
+    ctx = multiprocessing.get_context("spawn")
+    print(f"\n{'backend':<9} {'open':>7} {'opened file/private':>20} {'queried file/private':>21}   "
+          + " ".join(f"{name + ' p50/p95':>18}" for name in (*QUERIES, "render")))
+    for backend in ("columnar", "sqlite"):
+        queue = ctx.Queue()
+        process = ctx.Process(target=_scenario, args=(backend, client_ids, queue))
+        process.start()
+        r = queue.get()
+        process.join()
+        if "error" in r:
+            raise SystemExit(f"{backend} failed: {r['error']}")
+        print(
+            f"{backend:<9} {r['open_s']:>6.2f}s {r['open_mb'][0]:>9.0f}/{r['open_mb'][1]:<6.0f}MB "
+            f"{r['end_mb'][0]:>11.0f}/{r['end_mb'][1]:<6.0f}MB   "
+            + " ".join(f"{p50:>8.2f}/{p95:>7.2f}ms" for p50, p95 in r["latency_ms"].values())
+        )
+
+
+if __name__ == "__main__":
+    main()
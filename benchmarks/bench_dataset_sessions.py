@@ -0,0 +1,56 @@
+"""
+Benchmark resident memory as sessions grow: per-session copies vs. the shared dataset.
+
+``copies`` mimics ``st.cache_data``, which unpickles a fresh copy of the
+dataset for every caller; ``shared`` hands every session the same
+``DatasetService`` dataset plus its own per-client views.
+
+Usage:
+    python -m benchmarks.bench_dataset_sessions --data-dir data --sessions 1,10,50
+"""
+import argparse
+import multiprocessing
+import os
+import pickle
+import time
+
+
+def _run(mode, data_dir, sessions, queue):
+    from services.dataset_service import DatasetService, resident_memory_bytes
+
+    service = DatasetService(data_dir=data_dir, store_dir=os.path.join(data_dir, ".columnar"))
+    dataset = service.get()
+    client_ids = dataset.clientes.ids()
+    blob = pickle.dumps(dataset) if mode == "copies" else None
+
+    baseline = resident_memory_bytes()
+    start = time.perf_counter()
+    held = []
+    for session in range(sessions):
+        session_dataset = pickle.loads(blob) if mode == "copies" else service.get()
+        client_id = client_ids[session % len(client_ids)]
+        held.append((session_dataset, session_dataset.historial_cliente(client_id)))
+    elapsed = time.perf_counter() - start
+    queue.put(((resident_memory_bytes() - baseline) / 2**20, elapsed / sessions))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--sessions", default="1,10,50")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'mode':<8} {'sessions':>8} {'rss_delta':>11} {'per_session':>12}")
+    for mode in ("copies", "shared"):
+        for sessions in (int(n) for n in args.sessions.split(",")):
+            queue = ctx.Queue()
+            process = ctx.Process(target=_run, args=(mode, args.data_dir, sessions, queue))
+            process.start()
+            rss_mb, per_session = queue.get()
+            process.join()
+            print(f"{mode:<8} {sessions:>8} {rss_mb:>9.1f}MB {per_session * 1e3:>10.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark per-call connections against the pooled keep-alive session.
+
+Usage:
+    python -m benchmarks.bench_http_client [--requests 2000] [--threads 16]
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.stand_in_api import start_server
+from services import http_client
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _run(label, call, total, threads):
+    latencies = []
+
+    def one(_):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{label:<10} p50={statistics.median(latencies) * 1e3:7.3f}ms "
+        f"p99={_percentile(latencies, 0.99) * 1e3:7.3f}ms "
+        f"throughput={total / elapsed:9.1f} req/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    server, base_url = start_server()
+    http_client.API_BASE = base_url
+    http_client.configure(pool_maxsize=args.threads)
+    url = f"{base_url}/whoami"
+    headers = {"Authorization": f"Bearer {server.issue_token(server.add_user('bench@nuu.com.co', 'bench'))}"}
+
+    try:
+        for threads in (1, args.threads):
+            print(f"-- {threads} thread(s), {args.requests} requests")
+            _run("per-call", lambda: requests.get(url, headers=headers, timeout=http_client.DEFAULT_TIMEOUT), args.requests, threads)
+            _run("pooled", lambda: http_client.get("/whoami", headers=headers), args.requests, threads)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
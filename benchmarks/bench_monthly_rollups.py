@@ -0,0 +1,103 @@
+"""
+Monthly trend of the PREMIUM analytics: per-rerun re-aggregation vs. MonthlyRollups.
+
+Per client (one client owning ``--heavy`` movements):
+
+    raw       month-by-month debits, credits, spend per category and ending
+              balance per entity, aggregated from the client's movements
+    view      MonthlyRollups.lookup on a client not cached yet (merges the
+              client's rollup rows)
+    cached    MonthlyRollups.lookup again (a rerun)
+
+Per load (``--movements`` over ``--clients``):
+
+    build     rolling up the whole history at load time
+    ingest    with_movements for ``--appended`` new rows vs. rebuilding
+
+Usage:
+    python -m benchmarks.bench_monthly_rollups [--heavy 100000] [--clients 20000] [--movements 2000000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+
+from benchmarks import synthetic_data
+from services.columnar_store import to_frame
+from services.financial_schema import storage_schema
+from services.monthly_rollups import MonthlyRollups, monthly_view
+
+
+def _history(ids: np.ndarray, movements: int, weights=None, seed: int = 21) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    table = synthetic_data.historial(rng, ids, movements, weights=weights)
+    fechas = pc.strptime(table["fecha_registro"], format="%Y-%m-%dT%H:%M:%S", unit="s")
+    table = table.set_column(1, "fecha_registro", fechas)
+    table = table.cast(storage_schema("historial", table.schema))
+    return to_frame("historial", table).sort_values(
+        ["id_cliente", "fecha_registro"], ascending=[True, False], ignore_index=True,
+    )
+
+
+def _raw(historial: pd.DataFrame) -> dict:
+    """What the page would compute per rerun without rollups."""
+    mes = historial["fecha_registro"].astype("datetime64[ns]").dt.to_period("M").dt.to_timestamp()
+    pago = historial["pago_realizado"].fillna(0)
+    debito = historial["tipo_operacion"] == "Debito"
+    credito = historial["tipo_operacion"] == "Credito"
+    totales = pd.DataFrame({
+        "debitos": pago.where(debito, 0), "creditos": pago.where(credito, 0), "movimientos": 1,
+    }).groupby(mes).sum()
+    gastos = historial[debito & historial["categoria_gasto"].notna()].pivot_table(
+        index=mes[debito & historial["categoria_gasto"].notna()], columns="categoria_gasto",
+        values="pago_realizado", aggfunc="sum", observed=True,
+    )
+    ultimos = historial.assign(mes=mes).sort_values("fecha_registro").groupby(
+        ["mes", "entidad_financiera"], observed=True,
+    )["saldo_posterior"].last().unstack().ffill()
+    return {"totales": totales, "gastos": gastos, "saldos": ultimos}
+
+
+def _seconds(fn, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--heavy", type=int, default=100_000, help="movements of the single heavy client")
+    parser.add_argument("--clients", type=int, default=20_000)
+    parser.add_argument("--movements", type=int, default=2_000_000)
+    parser.add_argument("--appended", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    heavy = _history(np.array(["heavy"], dtype=object), args.heavy, weights=np.array([1.0]))
+    rollups = MonthlyRollups(heavy)
+    raw = _seconds(lambda: _raw(heavy), args.repeat)
+    view = _seconds(lambda: monthly_view(
+        rollups.totales.rows("heavy"), rollups.gastos.rows("heavy"), rollups.saldos.rows("heavy"),
+    ), args.repeat)
+    rollups.lookup("heavy")
+    cached = _seconds(lambda: rollups.lookup("heavy"), args.repeat * 100)
+    months = len(rollups.lookup("heavy")["totales"])
+    print(f"client with {args.heavy} movements over {months} months")
+    print(f"  raw {raw * 1e3:.1f} ms   view {view * 1e3:.1f} ms   cached {cached * 1e6:.1f} us\n")
+
+    ids = np.array([f"{i:08x}-0000-4000-8000-000000000000" for i in range(args.clients)], dtype=object)
+    historial = _history(ids, args.movements)
+    appended = _history(ids, args.appended, seed=22)
+    build = _seconds(lambda: MonthlyRollups(historial))
+    rollups = MonthlyRollups(historial)
+    ingest = _seconds(lambda: rollups.with_movements(appended))
+    rebuild = _seconds(lambda: MonthlyRollups(pd.concat([historial, appended], ignore_index=True)))
+    print(f"load with {args.movements} movements over {args.clients} clients")
+    print(f"  build {build:.2f} s   ingest {args.appended} rows {ingest * 1e3:.0f} ms   rebuild {rebuild:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
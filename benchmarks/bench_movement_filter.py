@@ -0,0 +1,132 @@
+"""
+Per-rerun cost of the PREMIUM movement filters: isin masks vs. MovementFilter bitmaps.
+
+One client with ``--movements`` movements. Each scenario sets the filters,
+counts the matching movements and takes the first page of 50, as a rerun of
+``4_B_page.py`` does:
+
+    isin      the page's former path: unique() per filter column, one isin
+              mask per column over the whole history, then a sort by date
+    encode    MovementFilter on a client seen for the first time
+    new set   a filter set not seen before, history already encoded
+    toggle    a filter set seen before (e.g. a multiselect toggled back)
+
+Filter sets use 2 dimensions (operation type, entity) and 5 (plus category,
+channel and a date range).
+
+Usage:
+    python -m benchmarks.bench_movement_filter [--movements 100000] [--repeat 50]
+"""
+import argparse
+import datetime
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+
+from benchmarks import synthetic_data
+from services.columnar_store import to_frame
+from services.financial_schema import storage_schema
+from services.movement_filter import MovementFilter
+
+PAGE = 50
+
+
+def _history(movements: int) -> pd.DataFrame:
+    rng = np.random.default_rng(5)
+    table = synthetic_data.historial(rng, np.array(["heavy"], dtype=object), movements, weights=np.array([1.0]))
+    fechas = pc.strptime(table["fecha_registro"], format="%Y-%m-%dT%H:%M:%S", unit="s")
+    table = table.set_column(1, "fecha_registro", fechas)
+    table = table.cast(storage_schema("historial", table.schema))
+    return to_frame("historial", table).sort_values("fecha_registro", ascending=False, ignore_index=True)
+
+
+def _filter_sets(historial: pd.DataFrame, dims: int) -> list:
+    """Two different filter sets narrowing ``dims`` dimensions."""
+    values = {c: historial[c].dropna().unique().tolist() for c in
+              ("tipo_operacion", "entidad_financiera", "categoria_gasto", "canal_transaccion")}
+    sets = []
+    for k in (0, 1):
+        filtros = {
+            "tipo_operacion": values["tipo_operacion"][k:k + 1],
+            "entidad_financiera": values["entidad_financiera"][k:k + 3],
+        }
+        if dims > 2:
+            filtros["categoria_gasto"] = values["categoria_gasto"][k:k + 4]
+            filtros["canal_transaccion"] = values["canal_transaccion"][k:k + 2]
+            filtros["fecha_registro"] = (datetime.date(2023, 1 + k, 1), datetime.date(2024, 6, 30))
+        sets.append(filtros)
+    return sets
+
+
+def _isin(historial: pd.DataFrame, filtros: dict):
+    """What a rerun did before MovementFilter: options, masks over the whole history, sort, page."""
+    mask = np.ones(len(historial), dtype=bool)
+    for columna, valores in filtros.items():
+        if columna == "fecha_registro":
+            fechas = historial[columna]
+            mask &= ((fechas >= pd.Timestamp(valores[0])) &
+                     (fechas < pd.Timestamp(valores[1]) + pd.Timedelta(days=1))).fillna(False).to_numpy(dtype=bool)
+            continue
+        historial[columna].unique()
+        mask &= historial[columna].isin(valores).to_numpy(dtype=bool)
+    filtrado = historial[mask].sort_values("fecha_registro", ascending=False)
+    return len(filtrado), filtrado.iloc[:PAGE]
+
+
+def _bitmap(engine: MovementFilter, filtros: dict):
+    for columna in filtros:
+        if columna != "fecha_registro":
+            engine.encoded("heavy").values(columna)
+    return engine.count("heavy", filtros), engine.rows("heavy", 0, PAGE, filtros)
+
+
+def _median(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--movements", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    historial = _history(args.movements)
+    print(f"{args.movements} movements, first page of {PAGE}\n")
+    print(f"{'dims':>4} {'isin':>10} {'encode':>10} {'new set':>10} {'toggle':>10}   matches")
+    for dims in (2, 5):
+        first, second = _filter_sets(historial, dims)
+
+        def fresh():
+            return MovementFilter(lambda _: historial, max_clients=4, max_results=64)
+
+        isin = _median(lambda: _isin(historial, first), args.repeat)
+        encode = _median(lambda: _bitmap(fresh(), first), args.repeat)
+
+        def new_set():
+            engine = fresh()
+            _bitmap(engine, first)
+            start = time.perf_counter()
+            _bitmap(engine, second)
+            return time.perf_counter() - start
+        new = float(np.median([new_set() for _ in range(args.repeat)]))
+
+        engine = fresh()
+        _bitmap(engine, first)
+        _bitmap(engine, second)
+        toggle = _median(lambda: _bitmap(engine, first), args.repeat)
+
+        count, page = _bitmap(engine, first)
+        expected, expected_page = _isin(historial, first)
+        assert count == expected and page["fecha_registro"].tolist() == expected_page["fecha_registro"].tolist()
+        print(f"{dims:>4} {isin * 1e3:>8.2f}ms {encode * 1e3:>8.2f}ms {new * 1e3:>8.2f}ms {toggle * 1e3:>8.2f}ms   {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark OTP QR rendering: per-press rendering vs. the cached ``otp_qr`` modes.
+
+``before`` is what the auth page did on every "Configure OTP" press and
+every rerun that showed the code: build a 10px-per-module QR, save it as PNG
+and let ``st.image`` re-encode it (``output_format="auto"`` turns an opaque
+PNG into a JPEG). The ``otp_qr`` modes are sent as-is: PNG bytes through the
+media endpoint, SVG inlined as a base64 data URI.
+
+Usage:
+    python -m benchmarks.bench_otp_qr [--urls 200] [--repeat 5]
+"""
+import argparse
+import base64
+import io
+import secrets
+import time
+
+import qrcode
+from PIL import Image
+
+from services import otp_qr
+
+
+def _before(url: str) -> bytes:
+    qr = qrcode.QRCode(version=1, box_size=10, border=4, error_correction=qrcode.constants.ERROR_CORRECT_M)
+    qr.add_data(url)
+    qr.make(fit=True)
+    buf = io.BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buf, format="PNG")
+    # What st.image serves for opaque PNG bytes with output_format="auto"
+    wire = io.BytesIO()
+    Image.open(io.BytesIO(buf.getvalue())).convert("RGB").save(wire, format="JPEG", quality=90)
+    return wire.getvalue()
+
+
+def _wire_bytes(image) -> int:
+    if isinstance(image, str):
+        return len("data:image/svg+xml;base64,") + len(base64.b64encode(image.encode()))
+    return len(image)
+
+
+def _time(call, urls, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for url in urls:
+            result = call(url)
+    return (time.perf_counter() - start) / (repeat * len(urls)), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--urls", type=int, default=200, help="distinct users/otpauth URLs")
+    parser.add_argument("--repeat", type=int, default=5, help="renders per URL, e.g. reruns showing the code")
+    args = parser.parse_args()
+
+    urls = [
+        f"otpauth://totp/Nuu:usuario{i}@nuu.com.co?secret={base64.b32encode(secrets.token_bytes(20)).decode()}&issuer=Nuu"
+        for i in range(args.urls)
+    ]
+
+    print(f"{'variant':<10} {'render':>10} {'cached':>10} {'payload':>9}")
+    per_render, image = _time(_before, urls, 1)
+    print(f"{'before':<10} {per_render * 1e3:>8.2f}ms {'-':>10} {_wire_bytes(image):>8}B")
+    for mode in otp_qr.MODES:
+        per_render, image = _time(lambda url: otp_qr.render(url, mode), urls, 1)
+        for url in urls:
+            otp_qr.qr_image(url, mode)
+        per_hit, _ = _time(lambda url: otp_qr.qr_image(url, mode), urls, args.repeat)
+        print(f"{mode:<10} {per_render * 1e3:>8.2f}ms {per_hit * 1e6:>8.2f}us {_wire_bytes(image):>8}B")
+
+
+if __name__ == "__main__":
+    main()
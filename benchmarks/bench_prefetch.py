@@ -0,0 +1,144 @@
+"""
+Time to dashboard after sign-in, with and without the sign-in prefetch.
+
+Each scenario runs in a fresh process against a synthetic dataset and the
+local stand-in API: the user signs in through ``AuthService``, stays on the
+auth page for ``--think-s`` seconds, then opens ``4_B_page.py`` (headless,
+through ``AppTest``). Reported per scenario:
+
+    render        first run of the dashboard page
+    to_dashboard  sign-in click until the dashboard finished rendering
+                  (sign-in + think time + render)
+
+A last check signs in and logs out at once, and reports whether the
+prefetch was cancelled and left no result behind.
+
+Usage:
+    python -m benchmarks.bench_prefetch [--clients 10000] [--movements 500000] [--think-s 0,1,3]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from benchmarks.bench_dashboard import pick_clients
+from benchmarks.synthetic_data import write_dataset
+
+PAGE = "all_pages/4_B_page.py"
+
+
+def _scenario(client_id: str, prefetch: bool, think: float, queue):
+    try:
+        queue.put(_measure(client_id, prefetch, think))
+    except Exception as exc:
+        queue.put({"error": f"{type(exc).__name__}: {exc}"})
+
+
+def _signed_in(client_id: str):
+    from benchmarks.stand_in_api import start_server
+    from services import http_client
+    from services.auth_service import AuthService
+
+    server, base_url = start_server()
+    http_client.API_BASE = base_url
+    server.add_user("bench@nuu.com.co", "bench", user_id=client_id)
+
+    start = time.perf_counter()
+    ok, details = AuthService.authenticate_user("bench@nuu.com.co", "bench")
+    if not ok:
+        raise RuntimeError(f"sign-in failed: {details}")
+    return details["access_token"], start
+
+
+def _measure(client_id: str, prefetch: bool, think: float) -> dict:
+    token, signed_in_at = _signed_in(client_id)
+    from services.prefetch import prefetcher
+    from streamlit.testing.v1 import AppTest
+
+    if prefetch:
+        prefetcher.start(token)
+    time.sleep(think)
+
+    at = AppTest.from_file(PAGE, default_timeout=600)
+    at.session_state.is_authenticated = True
+    at.session_state.token = token
+    start = time.perf_counter()
+    at.run()
+    end = time.perf_counter()
+    if at.exception:
+        raise RuntimeError(f"{PAGE} raised: {at.exception[0].value}")
+    if "membership" not in at.session_state:
+        raise RuntimeError(f"{PAGE} did not render the dashboard: {[e.value for e in at.error]}")
+    return {
+        "render_s": end - start,
+        "to_dashboard_s": end - signed_in_at,
+        "used": prefetcher.stats()["used"],
+    }
+
+
+def _logout_check(client_id: str, queue):
+    try:
+        token, _ = _signed_in(client_id)
+        from services.prefetch import prefetcher
+
+        prefetcher.start(token)
+        prefetcher.cancel(token)
+        deadline = time.time() + 120
+        while prefetcher.stats()["running"] and time.time() < deadline:
+            time.sleep(0.05)
+        queue.put({**prefetcher.stats(), "result_left": prefetcher.take(token) is not None})
+    except Exception as exc:
+        queue.put({"error": f"{type(exc).__name__}: {exc}"})
+
+
+def _in_child(ctx, target, *args) -> dict:
+    queue = ctx.Queue()
+    process = ctx.Process(target=target, args=(*args, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    if "error" in result:
+        raise SystemExit(f"scenario failed: {result['error']}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=None, help="existing dataset; a synthetic one is generated otherwise")
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--movements", type=int, default=500_000)
+    parser.add_argument("--think-s", default="0,1,3", help="comma-separated seconds spent on the auth page")
+    args = parser.parse_args()
+
+    data_dir = args.data_dir
+    if data_dir is None:
+        data_dir = tempfile.mkdtemp(prefix="prefetch-")
+        write_dataset(data_dir, args.clients, args.movements)
+
+    # Convert once up front so every scenario measures a cold process, not the conversion
+    from services import columnar_store
+    columnar_store.load_all(data_dir=data_dir, store_dir=os.path.join(data_dir, ".columnar"))
+
+    # settings reads DATA_DIR at import time; the spawned children inherit it
+    os.environ["DATA_DIR"] = data_dir
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'plan':<8} {'think':>6} {'prefetch':<9} {'render':>9} {'to_dashboard':>13} {'used':>5}")
+    for plan, client_id in pick_clients(data_dir).items():
+        for think in (float(t) for t in args.think_s.split(",")):
+            for prefetch in (False, True):
+                r = _in_child(ctx, _scenario, client_id, prefetch, think)
+                print(
+                    f"{plan:<8} {think:>5.1f}s {'on' if prefetch else 'off':<9} {r['render_s'] * 1e3:>7.0f}ms "
+                    f"{r['to_dashboard_s'] * 1e3:>11.0f}ms {r['used']:>5}"
+                )
+
+    check = _in_child(ctx, _logout_check, next(iter(pick_clients(data_dir).values())))
+    print(
+        f"\nsign-in then immediate logout: {check['cancelled']} cancelled, {check['completed']} completed, "
+        f"result left behind: {check['result_left']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Tail latency of ``/whoami`` while the upstream degrades.
+
+Runs the same calls against the local stand-in API under several injected
+fault scenarios, two ways:
+
+    raw        one ``requests`` call with the default timeouts, as before
+               (no retries, no budget, no circuit breaker)
+    resilient  ``AuthService.whoami``: retries with jittered backoff inside
+               ``WHOAMI_BUDGET``, the circuit breaker, and the last good
+               reply when the upstream still fails
+
+Every token's whoami is fetched once while the stand-in is healthy, so a last
+good reply exists; the fresh-reply cache is cleared before each call so that
+every call goes upstream. Reports p50/p95/p99/max latency, calls that ended
+with no usable reply, and stale replies served.
+
+Usage:
+    python -m benchmarks.bench_resilience [--calls 200] [--concurrency 16] [--hang-s 12]
+"""
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from benchmarks.stand_in_api import Faults, start_server
+from services import http_client
+from services.auth_service import AuthService
+
+
+def scenarios(hang: float) -> dict:
+    return {
+        "healthy": Faults(),
+        "slow 0-400ms": Faults(jitter=0.4),
+        "30% 503": Faults(error_rate=0.3, paths=("/whoami",)),
+        "30% dropped": Faults(drop_rate=0.3, paths=("/whoami",)),
+        "outage (all 503)": Faults(error_rate=1.0, paths=("/whoami",)),
+        f"hang {hang:g}s": Faults(latency=hang, paths=("/whoami",)),
+    }
+
+
+def raw_whoami(base_url: str, token: str):
+    """Return whether one direct call with the default timeouts got a usable reply."""
+    try:
+        r = requests.get(f"{base_url}/whoami", headers={"Authorization": f"Bearer {token}"},
+                         timeout=http_client.DEFAULT_TIMEOUT)
+        return r.ok and "message" in r.json()
+    except (requests.RequestException, ValueError):
+        return False
+
+
+def resilient_whoami(token: str):
+    AuthService._whoami_cache.invalidate(token)
+    return "message" in AuthService.whoami(token)
+
+
+def run(call, tokens: list, concurrency: int) -> dict:
+    def timed(token):
+        start = time.perf_counter()
+        usable = call(token)
+        return time.perf_counter() - start, usable
+
+    stale_before = AuthService.stale_served
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(timed, tokens))
+    ms = np.array([elapsed for elapsed, _ in results]) * 1e3
+    return {
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+        "failed": sum(not usable for _, usable in results),
+        "stale": AuthService.stale_served - stale_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200, help="whoami calls per scenario and mode")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--hang-s", type=float, default=12.0, help="stand-in delay of the hang scenario")
+    args = parser.parse_args()
+    # Every failed attempt is logged as a warning; only the summary matters here
+    logging.getLogger("services").setLevel(logging.ERROR)
+
+    server, base_url = start_server()
+    http_client.API_BASE = base_url
+    tokens = [server.issue_token(server.add_user(f"user{i}@nuu.com.co", "pw")) for i in range(args.calls)]
+    for token in tokens:
+        AuthService.whoami(token)
+
+    print(f"{'scenario':<18} {'mode':<10} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'failed':>7} {'stale':>6}")
+    try:
+        for name, faults in scenarios(args.hang_s).items():
+            server.faults = faults
+            for mode, call in (
+                ("raw", lambda token: raw_whoami(base_url, token)),
+                ("resilient", resilient_whoami),
+            ):
+                http_client.breaker.reset()
+                r = run(call, tokens, args.concurrency)
+                print(
+                    f"{name:<18} {mode:<10} {r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms "
+                    f"{r['max_ms']:>7.1f}ms {r['failed']:>7} {r['stale']:>6}"
+                )
+            print(f"{'':<18} breaker opened {http_client.breaker.times_opened} times so far")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Memory footprint per table: pandas default inference vs. the declared compact schema.
+
+Writes a synthetic dataset (or uses ``--data-dir``), loads every table both
+ways and reports in-memory bytes. For the compact load, Arrow-backed columns
+are memory-mapped; ``heap`` counts only what is copied into process memory
+(categorical codes and categories).
+
+Usage:
+    python -m benchmarks.bench_schema_footprint --clients 100000 --movements 5000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic_data import write_dataset
+from services import columnar_store
+from services.financial_schema import TABLE_FILES
+
+
+def _heap_bytes(df: pd.DataFrame) -> int:
+    return int(sum(
+        df[column].memory_usage(index=False, deep=True)
+        for column in df.columns
+        if not isinstance(df[column].dtype, pd.ArrowDtype)
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data-dir", default=None)
+    parser.add_argument("--clients", type=int, default=50_000)
+    parser.add_argument("--movements", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="footprint-")
+    if not args.data_dir:
+        write_dataset(data_dir, args.clients, args.movements)
+    store_dir = os.path.join(data_dir, ".columnar")
+
+    print(f"{'table':<10} {'rows':>10} {'default':>11} {'compact':>11} {'heap':>11} {'ratio':>7} {'convert':>8}")
+    for table in TABLE_FILES:
+        default = pd.read_csv(columnar_store.source_path(table, data_dir))
+        default_bytes = int(default.memory_usage(index=False, deep=True).sum())
+        rows = len(default)
+        del default
+
+        start = time.perf_counter()
+        columnar_store.convert(table, data_dir, store_dir)
+        convert_time = time.perf_counter() - start
+        compact = columnar_store.load_frame(table, data_dir=data_dir, store_dir=store_dir)
+        compact_bytes = int(compact.memory_usage(index=False, deep=True).sum())
+        print(
+            f"{table:<10} {rows:>10} {default_bytes / 2**20:>9.1f}MB {compact_bytes / 2**20:>9.1f}MB "
+            f"{_heap_bytes(compact) / 2**20:>9.1f}MB {default_bytes / compact_bytes:>6.1f}x {convert_time:>7.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Host memory and warm-up time as server processes are added: private datasets vs. a shared snapshot.
+
+For each worker count, that many fresh processes start at once, as a load
+balancer's pool would. Each loads the dataset through ``dataset_service``
+and serves the PREMIUM dashboard queries of ``--samples`` clients, then
+waits while the memory of every worker is read:
+
+    private    SNAPSHOT_DIR unset: each process loads the columnar tables and
+               builds its indexes, aggregates and rollups
+    snapshot   SNAPSHOT_DIR set: each process maps the published snapshot
+
+Reported per run: time from the first import of the app's modules to the
+dataset being ready (median and slowest worker), and proportional set size
+(PSS, from ``/proc/<pid>/smaps_rollup``): pages shared by N processes count
+1/N towards each, so the sum is what the workers cost the host. Publishing
+the snapshot is timed once, before the runs. Linux only.
+
+Usage:
+    python -m benchmarks.bench_shared_snapshot [--clients 20000] [--movements 1000000] [--workers 1,2,4]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic_data import write_dataset
+
+
+def _pss_mb(pid: int) -> dict:
+    """Return ``Pss``, ``Pss_Anon`` and ``Pss_File`` of a process in MB."""
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        fields = dict(line.split(":", 1) for line in f.read().splitlines()[1:])
+    return {name: int(fields[name].split()[0]) / 1024 for name in ("Pss", "Pss_Anon", "Pss_File")}
+
+
+def _worker(client_ids: list, queue, release):
+    try:
+        start = time.perf_counter()
+        from services import dataset_service
+
+        datos = dataset_service.create().get()
+        for id_cliente in client_ids:
+            datos.agregados_cliente(id_cliente)
+            datos.tendencia_mensual(id_cliente)
+            datos.movimientos(id_cliente, 0, 50)
+        queue.put({"pid": os.getpid(), "ready_s": time.perf_counter() - start})
+    except Exception as exc:
+        queue.put({"error": f"{type(exc).__name__}: {exc}"})
+    release.wait()
+
+
+def _run(ctx, workers: int, client_ids: list) -> dict:
+    queue, release = ctx.Queue(), ctx.Event()
+    processes = [ctx.Process(target=_worker, args=(client_ids, queue, release)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        results = [queue.get() for _ in processes]
+        errors = [r["error"] for r in results if "error" in r]
+        if errors:
+            raise SystemExit(f"worker failed: {errors[0]}")
+        memory = [_pss_mb(r["pid"]) for r in results]
+    finally:
+        release.set()
+        for process in processes:
+            process.join()
+    ready = [r["ready_s"] for r in results]
+    return {
+        "ready_p50": statistics.median(ready),
+        "ready_max": max(ready),
+        **{name: sum(m[name] for m in memory) for name in ("Pss", "Pss_Anon", "Pss_File")},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=None, help="existing dataset; a synthetic one is generated otherwise")
+    parser.add_argument("--clients", type=int, default=20_000)
+    parser.add_argument("--movements", type=int, default=1_000_000)
+    parser.add_argument("--samples", type=int, default=20, help="clients queried per worker")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    args = parser.parse_args()
+
+    data_dir = args.data_dir
+    if data_dir is None:
+        data_dir = tempfile.mkdtemp(prefix="snapshot-")
+        write_dataset(data_dir, args.clients, args.movements)
+    store_dir = os.path.join(data_dir, ".columnar")
+    snapshot_dir = tempfile.mkdtemp(prefix="snapshots-")
+
+    # settings reads these at import time; the spawned workers inherit them
+    os.environ.update({"DATA_DIR": data_dir, "COLUMNAR_DIR": store_dir, "DATA_BACKEND": "columnar"})
+    from services import columnar_store
+    from services.dataset_service import DatasetService
+    from services.shared_snapshot import SnapshotStore
+
+    columnar_store.load_all(data_dir=data_dir, store_dir=store_dir)
+    ids = columnar_store.load_frame("clientes", ["id_cliente"], data_dir, store_dir)["id_cliente"].tolist()
+    client_ids = random.Random(0).sample(ids, min(args.samples, len(ids)))
+
+    try:
+        start = time.perf_counter()
+        publisher = DatasetService(data_dir, store_dir, snapshots=SnapshotStore(snapshot_dir))
+        publisher.reload(force=True)
+        manifest = publisher.snapshots.manifest(publisher.snapshot_version)
+        print(f"snapshot published in {time.perf_counter() - start:.1f}s, {manifest['bytes'] / 2**20:.0f} MB on disk")
+        del publisher
+
+        ctx = multiprocessing.get_context("spawn")
+        print(f"\n{'mode':<9} {'workers':>7} {'ready p50':>10} {'ready max':>10} "
+              f"{'host PSS':>10} {'per worker':>11} {'anon':>9} {'file':>9}")
+        for workers in (int(n) for n in args.workers.split(",")):
+            for mode, directory in (("private", ""), ("snapshot", snapshot_dir)):
+                os.environ["SNAPSHOT_DIR"] = directory
+                r = _run(ctx, workers, client_ids)
+                print(
+                    f"{mode:<9} {workers:>7} {r['ready_p50']:>9.2f}s {r['ready_max']:>9.2f}s "
+                    f"{r['Pss']:>7.0f} MB {r['Pss'] / workers:>8.0f} MB "
+                    f"{r['Pss_Anon']:>6.0f} MB {r['Pss_File']:>6.0f} MB"
+                )
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
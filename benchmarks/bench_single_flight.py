@@ -0,0 +1,91 @@
+"""
+Thundering herd on ``/whoami`` and ``/otp``: upstream calls with and without single-flight.
+
+``--sessions`` threads (one per Streamlit session rerunning at once, e.g.
+after a deploy) are released together by a barrier, spread over
+``--tokens`` signed-in users, and each asks for its user's whoami or OTP
+URL with the whoami cache empty. The stand-in API answers after
+``--latency-ms``, so the calls overlap.
+
+    uncoalesced    every cache miss goes upstream (as before)
+    single-flight  ``AuthService``: concurrent misses for a token share one call
+
+Reports upstream calls made and caller latency per mode.
+
+Usage:
+    python -m benchmarks.bench_single_flight [--sessions 200] [--tokens 10] [--latency-ms 50] [--rounds 3]
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.stand_in_api import Faults, start_server
+from services import api_metrics, http_client
+from services.auth_service import AuthService
+
+
+def uncoalesced_whoami(token: str):
+    cached = AuthService._whoami_cache.get(token)
+    return cached if cached is not None else AuthService._fetch_whoami(token)
+
+
+def herd(call, tokens: list, sessions: int) -> list:
+    """Release ``sessions`` threads at once on ``call``; return each caller's latency."""
+    barrier = threading.Barrier(sessions)
+
+    def one(i):
+        barrier.wait()
+        start = time.perf_counter()
+        call(tokens[i % len(tokens)])
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(sessions) as pool:
+        return list(pool.map(one, range(sessions)))
+
+
+def upstream_calls(endpoint: str) -> int:
+    return sum(row["calls"] for row in api_metrics.registry.snapshot() if row["endpoint"] == endpoint)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200, help="concurrent callers per herd")
+    parser.add_argument("--tokens", type=int, default=10, help="distinct signed-in users")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="stand-in reply delay")
+    parser.add_argument("--rounds", type=int, default=3, help="herds per mode")
+    args = parser.parse_args()
+
+    server, base_url = start_server(faults=Faults(latency=args.latency_ms / 1e3))
+    http_client.API_BASE = base_url
+    http_client.configure(pool_maxsize=args.sessions)
+    tokens = [server.issue_token(server.add_user(f"user{i}@nuu.com.co", "pw")) for i in range(args.tokens)]
+
+    print(f"{'endpoint':<8} {'mode':<14} {'upstream':>9} {'per herd':>9} {'p50':>9} {'p99':>9} {'max':>9}")
+    try:
+        for endpoint, modes in (
+            ("/whoami", (("uncoalesced", uncoalesced_whoami), ("single-flight", AuthService.whoami))),
+            ("/otp", (("uncoalesced", AuthService._fetch_otp), ("single-flight", AuthService.configure_otp))),
+        ):
+            for mode, call in modes:
+                api_metrics.registry.reset()
+                latencies = []
+                for _ in range(args.rounds):
+                    AuthService._whoami_cache.clear()
+                    latencies += herd(call, tokens, args.sessions)
+                calls = upstream_calls(endpoint)
+                ms = np.array(latencies) * 1e3
+                print(
+                    f"{endpoint:<8} {mode:<14} {calls:>9} {calls / args.rounds:>9.1f} "
+                    f"{np.percentile(ms, 50):>7.1f}ms {np.percentile(ms, 99):>7.1f}ms {ms.max():>7.1f}ms"
+                )
+        stats = AuthService.single_flight_stats()
+        print(f"\nsingle-flight: {stats['leaders']} calls made, {stats['shared']} saved ({stats['saved_rate']:.0%})")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Startup benchmark: import cost per script and time to first paint per page.
+
+``imports`` times the module-level imports of ``main.py`` and every page in a
+fresh interpreter (with streamlit already imported, since every script needs
+it). ``pages`` starts ``streamlit run main.py`` and opens sessions over the
+app's websocket, like a browser, recording for each page:
+
+    ttfb         first message from the server
+    first_paint  first element of the page (after the navigation message)
+    finished     script_finished
+
+Each page is measured on a fresh server in three ways:
+
+    cold     first request the server receives
+    warmed   first visit of the page after another session opened the
+             landing page and the server sat idle for ``--idle`` seconds
+             (the background warm-up runs then, if enabled)
+    repeat   median of further visits
+
+Pages behind sign-in are not reachable by an anonymous session, so only
+public pages are measured by default.
+
+Usage:
+    python -m benchmarks.bench_startup [--pages landing_page,auth_page] [--visits 5] [--warmup both]
+"""
+import argparse
+import ast
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tornado.httpclient import HTTPRequest
+from tornado.websocket import websocket_connect
+
+SCRIPTS = ["main.py"] + sorted(
+    os.path.join("all_pages", name) for name in os.listdir("all_pages") if name.endswith(".py")
+)
+
+
+def _top_level_imports(path: str) -> str:
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    return "\n".join(
+        ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def import_time(path: str) -> float:
+    """Seconds the module-level imports of ``path`` take in a fresh interpreter."""
+    code = (
+        "import time, streamlit\n"
+        "start = time.perf_counter()\n"
+        f"{_top_level_imports(path)}\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(port: int, env: dict):
+    """Start ``streamlit run main.py`` and return ``(process, seconds until healthy)``."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "main.py", "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    while True:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as r:
+                if r.status == 200:
+                    return process, time.perf_counter() - start
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("streamlit exited during startup")
+            time.sleep(0.05)
+
+
+async def visit(port: int, page: str) -> dict:
+    """Open a session on ``page`` and time its first rerun."""
+    start = time.perf_counter()
+    ws = await websocket_connect(HTTPRequest(
+        f"ws://127.0.0.1:{port}/_stcore/stream", headers={"Sec-WebSocket-Protocol": "streamlit"},
+    ))
+    message = BackMsg()
+    message.rerun_script.query_string = ""
+    message.rerun_script.page_name = page
+    await ws.write_message(message.SerializeToString(), binary=True)
+
+    timings, navigated = {}, False
+    while True:
+        raw = await ws.read_message()
+        if raw is None:
+            raise RuntimeError(f"connection closed while loading {page!r}")
+        elapsed = time.perf_counter() - start
+        forward = ForwardMsg()
+        forward.ParseFromString(raw)
+        kind = forward.WhichOneof("type")
+        timings.setdefault("ttfb", elapsed)
+        if kind == "navigation":
+            navigated = True
+        elif kind == "delta" and navigated:
+            timings.setdefault("first_paint", elapsed)
+        elif kind == "script_finished":
+            timings["finished"] = elapsed
+            timings.setdefault("first_paint", elapsed)
+            break
+    ws.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default="landing_page,auth_page", help="URL paths of the pages")
+    parser.add_argument("--visits", type=int, default=5, help="sessions opened per page")
+    parser.add_argument("--warmup", choices=("0", "1", "both"), default="both", help="STARTUP_WARMUP setting")
+    parser.add_argument("--idle", type=float, default=3.0, help="seconds the server idles after the first session")
+    args = parser.parse_args()
+
+    print(f"{'script':<34} {'imports':>9}")
+    for path in SCRIPTS:
+        print(f"{path:<34} {import_time(path) * 1e3:>7.1f}ms")
+
+    for warmup in ("0", "1") if args.warmup == "both" else (args.warmup,):
+        print(f"\n-- STARTUP_WARMUP={warmup}")
+        print(f"{'page':<14} {'visit':<6} {'ttfb':>9} {'paint':>9} {'finished':>9}")
+        for page in args.pages.split(","):
+            env = {"STARTUP_WARMUP": warmup}
+            port = _free_port()
+            process, ready = start_app(port, env)
+            try:
+                cold = asyncio.run(visit(port, page))
+            finally:
+                process.terminate()
+                process.wait()
+
+            port = _free_port()
+            process, _ = start_app(port, env)
+            try:
+                asyncio.run(visit(port, ""))
+                time.sleep(args.idle)
+                warmed = asyncio.run(visit(port, page))
+                later = [asyncio.run(visit(port, page)) for _ in range(args.visits)]
+            finally:
+                process.terminate()
+                process.wait()
+
+            rows = [
+                ("cold", cold),
+                ("warmed", warmed),
+                ("repeat", {k: statistics.median(v[k] for v in later) for k in cold}),
+            ]
+            print(f"{page:<14} server ready in {ready:.2f}s")
+            for label, t in rows:
+                print(
+                    f"{'':<14} {label:<6} {t['ttfb'] * 1e3:>7.1f}ms {t['first_paint'] * 1e3:>7.1f}ms "
+                    f"{t['finished'] * 1e3:>7.1f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Local stand-in for the upstream auth API, used by the benchmarks.
+
+Serves the endpoints ``AuthService`` calls (``/account/signup``,
+``/account/signin``, ``/whoami``, ``/otp`` and ``/confirm-otp``) from an
+in-memory user table and issues signed JWTs carrying ``sub`` (the user id),
+``membership`` and ``exp``. Latency, error replies and dropped connections
+can be injected through ``Faults``, also while the server is running.
+"""
+import base64
+import collections
+import hashlib
+import hmac
+import json
+import random
+import struct
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def encode_token(claims: dict, key: str = "", algorithm: str = "HS256") -> str:
+    """
+    Encode a JWT the way the upstream API does.
+
+    Args:
+        claims (dict): Payload, e.g. ``{"sub": <uuid>, "exp": <epoch>}``.
+        key (str): HMAC secret; tokens are signed with ``algorithm`` when given.
+        algorithm (str): ``HS256``, ``HS384`` or ``HS512``.
+    """
+    header = {"alg": algorithm if key else "none", "typ": "JWT"}
+    signing_input = f"{_b64encode(json.dumps(header).encode())}.{_b64encode(json.dumps(claims).encode())}"
+    signature = b""
+    if key:
+        digestmod = getattr(hashlib, "sha" + algorithm[2:])
+        signature = hmac.new(key.encode(), signing_input.encode(), digestmod).digest()
+    return f"{signing_input}.{_b64encode(signature)}"
+
+
+def totp(secret: str, at: float = None, step: int = 30, digits: int = 6) -> str:
+    """Return the RFC 6238 code of a base32 ``secret`` at time ``at`` (default: now)."""
+    counter = int((time.time() if at is None else at) // step)
+    digest = hmac.new(base64.b32decode(secret), struct.pack(">Q", counter), hashlib.sha1).digest()
+    offset = digest[-1] & 0x0F
+    code = struct.unpack(">I", digest[offset:offset + 4])[0] & 0x7FFFFFFF
+    return str(code % 10**digits).zfill(digits)
+
+
+@dataclass
+class Faults:
+    """
+    Faults injected into the stand-in's replies.
+
+    Attributes:
+        latency (float): Seconds added before every reply.
+        jitter (float): Extra latency drawn uniformly from ``[0, jitter]``.
+        error_rate (float): Fraction of requests answered with ``error_status``.
+        error_status (int): Status code of injected errors.
+        error_body (bytes): Body of injected errors, e.g. a proxy's HTML page;
+            a JSON ``detail`` when ``None``.
+        drop_rate (float): Fraction of connections closed without a reply.
+        paths (tuple[str]): Only affect these paths; empty means every path.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    error_body: bytes = None
+    drop_rate: float = 0.0
+    paths: tuple = ()
+
+    def applies_to(self, path: str) -> bool:
+        return not self.paths or path in self.paths
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server holding the stand-in's users and fault settings.
+
+    Args:
+        address (tuple): ``(host, port)``; port 0 picks a free one.
+        key (str): Secret the issued tokens are signed with; defaults to
+            ``JWT_SECRET_KEY``, or a fixed stand-in secret.
+        algorithm (str): HMAC algorithm of the issued tokens; defaults to ``JWT_ALGORITHM``.
+        token_ttl (float): Lifetime of issued tokens in seconds.
+        faults (Faults): Faults to inject; replace ``server.faults`` to change them.
+
+    ``server.hits`` counts the requests received per path, faulted ones included.
+    """
+
+    daemon_threads = True
+    # Deep enough that bursts of new connections are not dropped and retried
+    request_queue_size = 1024
+
+    def __init__(self, address, key: str = None, algorithm: str = None, token_ttl: float = 3600,
+                 faults: Faults = None):
+        # Imported here: benchmarks importing this module may set the environment
+        # settings reads (e.g. DATA_DIR in spawned children) only after the import
+        from settings import JWT_ALGORITHM, JWT_SECRET_KEY
+
+        super().__init__(address, StandInHandler)
+        self.key = key or JWT_SECRET_KEY or "stand-in-secret"
+        self.algorithm = algorithm or JWT_ALGORITHM
+        self.token_ttl = token_ttl
+        self.faults = faults or Faults()
+        self.hits = collections.Counter()
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # Clients that gave up on a delayed reply are expected under fault injection
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+    def add_user(self, email: str, password: str, user_id: str = None, membership: str = "FREE") -> dict:
+        """Register a user and return its record; an existing email is overwritten."""
+        user = {
+            "email": email,
+            "password": password,
+            "user_id": user_id or str(uuid.uuid4()),
+            "membership": membership,
+            "otp_secret": base64.b32encode(random.randbytes(10)).decode(),
+        }
+        with self._lock:
+            self._users[email] = user
+        return user
+
+    def count(self, path: str):
+        with self._lock:
+            self.hits[path] += 1
+
+    def user(self, email: str):
+        with self._lock:
+            return self._users.get(email)
+
+    def issue_token(self, user: dict) -> str:
+        """Return a signed access token for ``user``."""
+        claims = {
+            "sub": user["user_id"],
+            "email": user["email"],
+            "membership": user["membership"],
+            "exp": int(time.time() + self.token_ttl),
+        }
+        return encode_token(claims, self.key, self.algorithm)
+
+    def authenticate(self, authorization: str):
+        """Return the user of a ``Bearer`` token, or ``None`` if it is missing, invalid or expired."""
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        from services import token_claims
+
+        try:
+            claims = token_claims.decode_claims(token, self.key, self.algorithm)
+        except token_claims.InvalidTokenError:
+            return None
+        if claims.exp is not None and claims.exp < time.time():
+            return None
+        return self.user(getattr(claims, "email", None))
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler answering the endpoints used by ``AuthService``."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body):
+        self._send(status, json.dumps(body).encode(), "application/json")
+
+    def _send(self, status: int, payload: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _inject_faults(self, path: str) -> bool:
+        """Apply the configured faults; return ``True`` if the request was already answered."""
+        faults = self.server.faults
+        if not faults.applies_to(path):
+            return False
+        delay = faults.latency + (random.uniform(0, faults.jitter) if faults.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if faults.drop_rate and random.random() < faults.drop_rate:
+            self.close_connection = True
+            self.connection.close()
+            return True
+        if faults.error_rate and random.random() < faults.error_rate:
+            if faults.error_body is None:
+                self._send_json(faults.error_status, {"detail": "Injected failure"})
+            else:
+                self._send(faults.error_status, faults.error_body, "text/html")
+            return True
+        return False
+
+    def _handle(self, method: str):
+        path = urlsplit(self.path).path
+        body = self._read_body() if method == "POST" else b""
+        self.server.count(path)
+        if self._inject_faults(path):
+            return
+        handler = getattr(self, f"_{method.lower()}_{path.strip('/').replace('/', '_').replace('-', '_')}", None)
+        if handler is None:
+            self._send_json(404, {"detail": "Not Found"})
+        else:
+            handler(body)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _authenticated_user(self):
+        user = self.server.authenticate(self.headers.get("Authorization"))
+        if user is None:
+            self._send_json(401, {"detail": "Could not validate credentials"})
+        return user
+
+    def _post_account_signup(self, body: bytes):
+        data = json.loads(body or b"{}")
+        if not data.get("email") or not data.get("password"):
+            self._send_json(422, {"detail": "Email and password are required"})
+        elif self.server.user(data["email"]) is not None:
+            self._send_json(400, {"detail": "Email already registered"})
+        else:
+            user = self.server.add_user(data["email"], data["password"])
+            self._send_json(201, {"id": user["user_id"], "email": user["email"]})
+
+    def _post_account_signin(self, body: bytes):
+        form = {key: values[0] for key, values in parse_qs(body.decode()).items()}
+        user = self.server.user(form.get("username"))
+        if user is None or not hmac.compare_digest(user["password"], form.get("password", "")):
+            self._send_json(401, {"detail": "Incorrect username or password"})
+        else:
+            self._send_json(200, {"access_token": self.server.issue_token(user), "token_type": "bearer"})
+
+    def _get_whoami(self, body: bytes):
+        user = self._authenticated_user()
+        if user is not None:
+            self._send_json(200, {"message": f"Yo soy {user['user_id']}"})
+
+    def _get_otp(self, body: bytes):
+        user = self._authenticated_user()
+        if user is not None:
+            url = f"otpauth://totp/Nuu:{user['email']}?secret={user['otp_secret']}&issuer=Nuu"
+            self._send_json(200, {"otpauth_url": url})
+
+    def _post_confirm_otp(self, body: bytes):
+        user = self._authenticated_user()
+        if user is not None:
+            code = str(json.loads(body or b"{}").get("otp_code", "")).zfill(6)
+            now = time.time()
+            # Accept the previous and next step as well, like authenticator apps
+            valid = any(hmac.compare_digest(code, totp(user["otp_secret"], now + drift)) for drift in (-30, 0, 30))
+            self._send_json(200, valid)
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, **kwargs):
+    """
+    Start the stand-in in a daemon thread and return ``(server, base_url)``.
+
+    Keyword arguments are passed to ``StandInServer``.
+    """
+    server = StandInServer((host, port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
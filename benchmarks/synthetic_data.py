@@ -0,0 +1,181 @@
+"""
+Synthetic financial dataset with the columns the Equipo B dashboard reads.
+
+Usage:
+    python -m benchmarks.synthetic_data --out data --clients 10000 --movements 500000
+"""
+import argparse
+import os
+import uuid
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pv
+
+from services.financial_schema import TABLE_FILES
+
+
+CIUDADES = ["Bogotá", "Medellín", "Cali", "Barranquilla", "Cartagena", "Bucaramanga", "Pereira", "Manizales"]
+ENTIDADES = ["Bancolombia", "Davivienda", "Banco de Bogotá", "BBVA", "Nequi", "Daviplata", "Scotiabank Colpatria"]
+TIPOS_CUENTA = ["Ahorros", "Corriente", "Nómina"]
+ESTADOS_CUENTA = ["Activa", "Activa", "Activa", "Inactiva", "Bloqueada"]
+CATEGORIAS = ["Alimentación", "Transporte", "Servicios", "Entretenimiento", "Salud", "Educación", "Vivienda", "Compras"]
+CANALES = ["App", "Web", "POS", "ATM", "Sucursal"]
+ALERTAS = [
+    ("Gasto inusual", "Detectamos un gasto superior a tu promedio.", "Revisa el movimiento y reporta si no lo reconoces."),
+    ("Saldo bajo", "Tu saldo está por debajo del mínimo configurado.", "Considera transferir fondos a esta cuenta."),
+    ("Pago próximo", "Tienes un pago programado en los próximos días.", None),
+]
+RIESGOS = ["Bajo", "Medio", "Alto", "Muy alto"]
+TENDENCIAS = ["Subiendo", "Estable", "Bajando"]
+FACTORES = ["Alta utilización de crédito", "Pagos atrasados", "Muchas consultas recientes", "Historial corto"]
+OPORTUNIDADES = ["Reducir saldo de tarjetas", "Pagar a tiempo", "Mantener cuentas antiguas", "Diversificar crédito"]
+
+FECHA_INICIO = np.datetime64("2022-01-01T00:00:00")
+SEGUNDOS_HISTORIA = 3 * 365 * 24 * 3600
+
+
+def _ids(rng, n: int) -> np.ndarray:
+    return np.array([str(uuid.UUID(bytes=rng.bytes(16), version=4)) for _ in range(n)], dtype=object)
+
+
+def _with_nulls(rng, values: np.ndarray, fraction: float) -> list:
+    values = values.astype(object)
+    values[rng.random(len(values)) < fraction] = None
+    return values
+
+
+def _write(table: pa.Table, path: str, append: bool = False):
+    options = pv.WriteOptions(include_header=not append)
+    with open(path, "ab" if append else "wb") as f:
+        pv.write_csv(table, f, write_options=options)
+
+
+def clientes(rng, ids: np.ndarray) -> pa.Table:
+    n = len(ids)
+    ingresos = np.round(rng.lognormal(15.2, 0.6, n), -3)
+    return pa.table({
+        "id_cliente": ids,
+        "email": [f"cliente{i}@nuu.com.co" for i in range(n)],
+        "nombres": rng.choice(["María", "Juan", "Camila", "Andrés", "Valentina", "Santiago"], n),
+        "apellidos": rng.choice(["Gómez", "Rodríguez", "Martínez", "López", "García", "Pérez"], n),
+        "cedula": rng.integers(10_000_000, 1_999_999_999, n).astype(str),
+        "ciudad": rng.choice(CIUDADES, n),
+        "ingresos_mensuales": ingresos,
+        "gastos_mensuales": np.round(ingresos * rng.uniform(0.4, 1.1, n), -3),
+        "es_cliente_premium": rng.random(n) < 0.3,
+        "personas_a_cargo": rng.integers(0, 5, n),
+        "estrato_socioeconomico": rng.integers(1, 7, n),
+    })
+
+
+def cuentas(rng, ids: np.ndarray) -> pa.Table:
+    por_cliente = rng.integers(1, 5, len(ids))
+    owners = np.repeat(ids, por_cliente)
+    n = len(owners)
+    return pa.table({
+        "id_cliente": owners,
+        "entidad_financiera": rng.choice(ENTIDADES, n),
+        "tipo_cuenta": rng.choice(TIPOS_CUENTA, n),
+        "numero_cuenta": rng.integers(10**9, 10**10, n).astype(str),
+        "saldo_actual": np.round(rng.lognormal(14, 1.2, n), 2),
+        "estado": rng.choice(ESTADOS_CUENTA, n),
+    })
+
+
+def activity(rng, n_clients: int) -> np.ndarray:
+    """Skewed activity: a few clients own a large share of the movements."""
+    weights = rng.pareto(1.5, n_clients) + 1
+    return weights / weights.sum()
+
+
+def historial(rng, ids: np.ndarray, n: int, weights: np.ndarray = None) -> pa.Table:
+    owners = ids[rng.choice(len(ids), n, p=weights if weights is not None else activity(rng, len(ids)))]
+    fechas = FECHA_INICIO + rng.integers(0, SEGUNDOS_HISTORIA, n).astype("timedelta64[s]")
+    tipo = rng.choice(["Debito", "Credito"], n, p=[0.7, 0.3])
+    es_alerta = rng.random(n) < 0.08
+    alerta = rng.integers(0, len(ALERTAS), n)
+    saldo_anterior = np.round(rng.lognormal(14, 1.2, n), 2)
+    pago = np.round(rng.lognormal(11, 1.1, n), 2)
+    return pa.table({
+        "id_cliente": owners,
+        "fecha_registro": np.datetime_as_string(fechas, unit="s"),
+        "entidad_financiera": rng.choice(ENTIDADES, n),
+        "tipo_operacion": tipo,
+        "pago_realizado": _with_nulls(rng, pago, 0.02),
+        "categoria_gasto": np.where(tipo == "Debito", _with_nulls(rng, rng.choice(CATEGORIAS, n), 0.1), None),
+        "canal_transaccion": _with_nulls(rng, rng.choice(CANALES, n), 0.05),
+        "tipo_registro": np.where(es_alerta, "Alerta", "Movimiento"),
+        "saldo_anterior": saldo_anterior,
+        "saldo_posterior": np.round(saldo_anterior + np.where(tipo == "Debito", -pago, pago), 2),
+        "estado_cuenta": rng.choice(ESTADOS_CUENTA, n),
+        "titulo_alerta": np.where(es_alerta, np.array([a[0] for a in ALERTAS], dtype=object)[alerta], None),
+        "mensaje_alerta": np.where(es_alerta, np.array([a[1] for a in ALERTAS], dtype=object)[alerta], None),
+        "accion_recomendada": np.where(es_alerta, np.array([a[2] for a in ALERTAS], dtype=object)[alerta], None),
+    })
+
+
+def scoring(rng, ids: np.ndarray) -> pa.Table:
+    n = len(ids)
+    puntaje = rng.integers(300, 851, n)
+    return pa.table({
+        "id_cliente": ids,
+        "puntaje_credito": puntaje,
+        "cambio_puntaje_mes": rng.integers(-30, 31, n),
+        "categoria_riesgo": rng.choice(RIESGOS, n),
+        "tendencia_score": rng.choice(TENDENCIAS, n),
+        "percentil_nacional": rng.integers(1, 100, n),
+        "deuda_total": np.round(rng.lognormal(15, 1.3, n), 0),
+        "ratio_deuda_ingreso": np.round(rng.uniform(0, 1.5, n), 4),
+        "utilizacion_credito_promedio": np.round(rng.uniform(0, 100, n), 1),
+        "numero_cuentas_activas": rng.integers(1, 12, n),
+        "porcentaje_pagos_puntuales": np.round(rng.uniform(50, 100, n), 1),
+        "dias_mora_maximos": rng.integers(0, 121, n),
+        "probabilidad_default": np.round(rng.uniform(0, 40, n), 1),
+        "score_prediccion_6meses": np.clip(puntaje + rng.integers(-40, 41, n), 300, 850),
+        "principal_factor_negativo": rng.choice(FACTORES, n),
+        "principal_oportunidad_mejora": rng.choice(OPORTUNIDADES, n),
+    })
+
+
+def write_dataset(out_dir: str, clients: int, movements: int, seed: int = 42,
+                  chunk_rows: int = 1_000_000, extra_ids=()) -> list:
+    """
+    Write the four CSVs to ``out_dir``; movements are generated in chunks.
+
+    Args:
+        extra_ids (list[str]): Known client ids to include, e.g. the ``sub``
+            of a test token, taking the first positions.
+
+    Returns:
+        list[str]: Every client id written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    ids = _ids(rng, clients)
+    ids[:len(extra_ids)] = list(extra_ids)[:clients]
+
+    _write(clientes(rng, ids), os.path.join(out_dir, TABLE_FILES["clientes"]))
+    _write(cuentas(rng, ids), os.path.join(out_dir, TABLE_FILES["cuentas"]))
+    _write(scoring(rng, ids), os.path.join(out_dir, TABLE_FILES["scoring"]))
+
+    path = os.path.join(out_dir, TABLE_FILES["historial"])
+    weights = activity(rng, clients)
+    for start in range(0, max(movements, 1), chunk_rows):
+        _write(historial(rng, ids, min(chunk_rows, movements - start), weights), path, append=start > 0)
+    return list(ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--out", default="data")
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--movements", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    write_dataset(args.out, args.clients, args.movements, args.seed)
+    print(f"wrote {args.clients} clients and {args.movements} movements to {args.out}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,92 @@
 import streamlit as st
 
+from services import api_metrics, rerun_profiler, warmup
+from settings import PROFILE_RERUNS, STARTUP_WARMUP
 
-if "is_authenticated" not in st.session_state:
-    st.session_state.is_authenticated = False
 
-if "token" not in st.session_state:
-    st.session_state.token = None
+# Metrics exporters (local /metrics endpoint, textfile) run once per process
+@st.cache_resource
+def exportadores_metricas():
+    return api_metrics.start_exporters()
 
-all_pages = [
-    st.Page("all_pages/1_landing_page.py", title="Home"),
-    st.Page("all_pages/2_auth_page.py", title="Sign Up/Sign In"),
-    st.Page("all_pages/3_A_page.py", title="Equipo A"),
-    st.Page("all_pages/4_B_page.py", title="Equipo B"),
-    st.Page("all_pages/5_C_page.py", title="Equipo Chat"),
-]
+exportadores_metricas()
 
-allowed_pages = [
-     all_pages[0],
-     all_pages[1],
-] if not st.session_state.is_authenticated else all_pages
+# Importa en segundo plano lo que las páginas cargan al primer uso
+# (se llama al final del script, para no competir con la primera página)
+@st.cache_resource
+def precarga():
+    return warmup.start() if STARTUP_WARMUP else None
 
-pg = st.navigation(allowed_pages)
-pg.run()
+# Perfilado opcional de cada rerun: PROFILE_RERUNS=1 o ?profile=1 (queda activo en la sesión)
+if st.query_params.get("profile") in ("1", "0"):
+    st.session_state.perfilado = st.query_params.get("profile") == "1"
+perfil = rerun_profiler.begin() if PROFILE_RERUNS or st.session_state.get("perfilado") else None
+
+
+def mostrar_perfil(perfil):
+    """Desglose del rerun en la barra lateral."""
+    with st.sidebar.expander(f"⏱️ Rerun: {perfil.total * 1e3:.1f} ms", expanded=False):
+        st.caption(f"Página: {perfil.page}")
+        st.markdown("\n".join(
+            f"{'&nbsp;' * 4 * profundidad}`{nombre}` {segundos * 1e3:.1f} ms"
+            for nombre, profundidad, segundos in perfil.sections
+        ) or "Sin secciones")
+        st.caption(f"{len(rerun_profiler.log)} reruns en el registro del proceso")
+
+
+with rerun_profiler.section("sesion"):
+    if "is_authenticated" not in st.session_state:
+        st.session_state.is_authenticated = False
+
+    if "token" not in st.session_state:
+        st.session_state.token = None
+
+    # Expire the session locally once the JWT is past its exp claim.
+    # Auth modules are imported only by sessions that have a token.
+    if st.session_state.token:
+        from services import token_claims
+        from services.auth_service import AuthService
+        from services.prefetch import prefetcher
+
+        if token_claims.is_expired(st.session_state.token):
+            AuthService.invalidate_whoami(st.session_state.token)
+            prefetcher.cancel(st.session_state.token)
+            token_claims.forget(st.session_state.token)
+            st.session_state.token = None
+            st.session_state.is_authenticated = False
+            st.toast("Your session has expired. Please sign in again.")
+
+with rerun_profiler.section("navegacion"):
+    all_pages = [
+        st.Page("all_pages/1_landing_page.py", title="Home"),
+        st.Page("all_pages/2_auth_page.py", title="Sign Up/Sign In"),
+        st.Page("all_pages/3_A_page.py", title="Equipo A"),
+        st.Page("all_pages/4_B_page.py", title="Equipo B"),
+        st.Page("all_pages/5_C_page.py", title="Equipo Chat"),
+    ]
+
+    allowed_pages = [
+         all_pages[0],
+         all_pages[1],
+    ] if not st.session_state.is_authenticated else all_pages
+
+    if st.session_state.is_authenticated:
+        from services.auth_service import AuthService
+
+        if AuthService.is_admin(st.session_state.get("username")):
+            allowed_pages = allowed_pages + [st.Page("all_pages/6_diagnostics_page.py", title="Diagnostics")]
+
+    pg = st.navigation(allowed_pages)
+
+if perfil is not None:
+    perfil.page = pg.title
+
+try:
+    with rerun_profiler.section("pagina"):
+        pg.run()
+finally:
+    # También cuando la página termina con st.stop()
+    if perfil is not None:
+        rerun_profiler.end()
+        mostrar_perfil(perfil)
+    precarga()
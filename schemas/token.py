@@ -1,9 +1,22 @@
 """Schema for Token."""
-from pydantic import BaseModel, Field
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class Token(BaseModel):
     """Token schema."""
 
     access_token: str = Field(..., description="JWT access token")
-    token_type: str = Field(default="bearer", description="Token type")
\ No newline at end of file
+    token_type: str = Field(default="bearer", description="Token type")
+
+
+class TokenClaims(BaseModel):
+    """Claims carried in the payload of a JWT access token."""
+
+    model_config = ConfigDict(extra="allow", frozen=True)
+
+    sub: Optional[str] = Field(default=None, description="Token subject")
+    user_id: Optional[str] = Field(default=None, description="User UUID resolved from the claims")
+    membership: Optional[str] = Field(default=None, description="Membership plan, e.g. FREE or PREMIUM")
+    exp: Optional[float] = Field(default=None, description="Expiry as a Unix timestamp")
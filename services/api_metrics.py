@@ -0,0 +1,226 @@
+"""Latency, status and payload metrics of the calls made to the upstream API."""
+import bisect
+import logging
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from settings import METRICS_PORT, METRICS_TEXTFILE, METRICS_TEXTFILE_INTERVAL
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency buckets, in seconds (Prometheus ``le`` labels)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-style histogram with fixed bucket bounds; not thread-safe by itself."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate the ``q`` quantile by interpolating inside its bucket, like ``histogram_quantile``."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+
+class _Endpoint:
+    def __init__(self):
+        self.latency = Histogram()
+        self.statuses = {}
+        self.errors = {}
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+
+class ApiMetrics:
+    """
+    Thread-safe registry of per-endpoint call metrics.
+
+    Each call is recorded once with its latency, and either the HTTP status
+    or the error that prevented a reply (``timeout``, ``connection_error``).
+    """
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, endpoint: str, seconds: float, status: int = None, error: str = None,
+                request_bytes: int = 0, response_bytes: int = 0):
+        with self._lock:
+            stats = self._endpoints.get((method, endpoint))
+            if stats is None:
+                stats = self._endpoints[(method, endpoint)] = _Endpoint()
+            stats.latency.observe(seconds)
+            if status is not None:
+                stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            if error is not None:
+                stats.errors[error] = stats.errors.get(error, 0) + 1
+            stats.request_bytes += request_bytes
+            stats.response_bytes += response_bytes
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def snapshot(self) -> list:
+        """
+        Return one summary per endpoint.
+
+        Returns:
+            list[dict]: ``method``, ``endpoint``, ``calls``, ``errors`` (non-2xx
+            replies plus failed calls), ``timeouts``, ``mean_ms``, ``p50_ms``,
+            ``p95_ms``, ``p99_ms``, ``statuses``, ``request_bytes`` and
+            ``response_bytes``. Percentiles are estimated from the histogram.
+        """
+        with self._lock:
+            rows = []
+            for (method, endpoint), stats in sorted(self._endpoints.items()):
+                latency = stats.latency
+                failed = sum(stats.errors.values())
+                rows.append({
+                    "method": method,
+                    "endpoint": endpoint,
+                    "calls": latency.count,
+                    "errors": failed + sum(n for status, n in stats.statuses.items() if status >= 400),
+                    "timeouts": stats.errors.get("timeout", 0),
+                    "mean_ms": latency.sum / latency.count * 1e3 if latency.count else 0.0,
+                    "p50_ms": latency.quantile(0.5) * 1e3,
+                    "p95_ms": latency.quantile(0.95) * 1e3,
+                    "p99_ms": latency.quantile(0.99) * 1e3,
+                    "statuses": dict(stats.statuses),
+                    "request_bytes": stats.request_bytes,
+                    "response_bytes": stats.response_bytes,
+                })
+            return rows
+
+    def prometheus_text(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines = [
+            "# HELP upstream_request_duration_seconds Latency of calls to the upstream API.",
+            "# TYPE upstream_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            for (method, endpoint), stats in endpoints:
+                labels = f'method="{method}",endpoint="{endpoint}"'
+                cumulative = 0
+                for bound, count in zip(stats.latency.bounds + ("+Inf",), stats.latency.counts):
+                    cumulative += count
+                    lines.append(f'upstream_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"upstream_request_duration_seconds_sum{{{labels}}} {stats.latency.sum:.6f}")
+                lines.append(f"upstream_request_duration_seconds_count{{{labels}}} {stats.latency.count}")
+
+            lines += [
+                "# HELP upstream_responses_total Replies from the upstream API by status code.",
+                "# TYPE upstream_responses_total counter",
+            ]
+            for (method, endpoint), stats in endpoints:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(
+                        f'upstream_responses_total{{method="{method}",endpoint="{endpoint}",status="{status}"}} {count}'
+                    )
+
+            lines += [
+                "# HELP upstream_request_failures_total Calls that got no reply, by reason.",
+                "# TYPE upstream_request_failures_total counter",
+            ]
+            for (method, endpoint), stats in endpoints:
+                for error, count in sorted(stats.errors.items()):
+                    lines.append(
+                        f'upstream_request_failures_total{{method="{method}",endpoint="{endpoint}",reason="{error}"}} {count}'
+                    )
+
+            lines += [
+                "# HELP upstream_payload_bytes_total Bytes sent to and received from the upstream API.",
+                "# TYPE upstream_payload_bytes_total counter",
+            ]
+            for (method, endpoint), stats in endpoints:
+                labels = f'method="{method}",endpoint="{endpoint}"'
+                lines.append(f'upstream_payload_bytes_total{{{labels},direction="sent"}} {stats.request_bytes}')
+                lines.append(f'upstream_payload_bytes_total{{{labels},direction="received"}} {stats.response_bytes}')
+        return "\n".join(lines) + "\n"
+
+
+# Shared by every session of the process
+registry = ApiMetrics()
+
+
+def write_textfile(path: str = METRICS_TEXTFILE):
+    """Atomically write the metrics to ``path``, e.g. for node_exporter's textfile collector."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".prom.tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(registry.prometheus_text())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        payload = registry.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def start_exporters(port: int = METRICS_PORT, textfile: str = METRICS_TEXTFILE,
+                    interval: float = METRICS_TEXTFILE_INTERVAL):
+    """
+    Start the configured exporters in daemon threads.
+
+    Args:
+        port (int): Serve ``/metrics`` on ``127.0.0.1:port``; 0 disables it.
+        textfile (str): Rewrite this file every ``interval`` seconds; empty disables it.
+        interval (float): Seconds between textfile writes.
+
+    Returns:
+        ThreadingHTTPServer | None: The metrics server, if one was started.
+    """
+    server = None
+    if port:
+        server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+        logger.info("Serving upstream API metrics on http://127.0.0.1:%d/metrics", port)
+
+    if textfile:
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    write_textfile(textfile)
+                except OSError:
+                    logger.exception("Could not write metrics to %s", textfile)
+
+        threading.Thread(target=loop, daemon=True, name="metrics-textfile").start()
+    return server
@@ -1,14 +1,65 @@
-import base64
-import json
+import logging
 
 import requests
 
-from settings import API_BASE
+from services import http_client, token_claims
+from services.disk_cache import DiskCache
+from services.single_flight import SingleFlight
+from services.ttl_cache import TTLCache
+from settings import (
+    ADMIN_USERS,
+    API_RETRIES,
+    LAST_GOOD_CACHE_MAXSIZE,
+    WHOAMI_BUDGET,
+    WHOAMI_CACHE_MAXSIZE,
+    WHOAMI_CACHE_TTL,
+    WHOAMI_DISK_CACHE,
+)
+
+
+logger = logging.getLogger(__name__)
+
+UNAVAILABLE = "The authentication service is unavailable. Please try again later."
+INVALID_TOKEN = "The authentication service returned an invalid session token. Please try again later."
+
+
+def _json(r: requests.Response) -> dict:
+    """Return the JSON object in a reply, or ``{}`` if the body is not one (e.g. a proxy error page)."""
+    try:
+        body = r.json()
+    except ValueError:
+        return {}
+    return body if isinstance(body, dict) else {}
 
 
 class AuthService:
     """Service for authentication and registration."""
 
+    # Shared by every session of the process, keyed by access token.
+    _whoami_cache = TTLCache(maxsize=WHOAMI_CACHE_MAXSIZE, ttl=WHOAMI_CACHE_TTL)
+    # Behind it, shared by every process of the host when WHOAMI_DISK_CACHE is set
+    _whoami_disk = (
+        DiskCache(WHOAMI_DISK_CACHE, maxsize=WHOAMI_CACHE_MAXSIZE, ttl=WHOAMI_CACHE_TTL) if WHOAMI_DISK_CACHE else None
+    )
+    # Last good whoami/otp replies, keyed by (endpoint, token) and kept until
+    # the token expires; served only while the upstream is failing.
+    _last_good = TTLCache(maxsize=LAST_GOOD_CACHE_MAXSIZE, ttl=float("inf"))
+    stale_served = 0
+    # Concurrent identical whoami/otp calls (same endpoint and token) share one upstream request
+    _in_flight = SingleFlight()
+
+    @staticmethod
+    def _remember(endpoint: str, access_token: str, value):
+        AuthService._last_good.set((endpoint, access_token), value, expires_at=token_claims.expires_at(access_token))
+
+    @staticmethod
+    def _last_known(endpoint: str, access_token: str):
+        value = AuthService._last_good.get((endpoint, access_token))
+        if value is not None:
+            AuthService.stale_served += 1
+            logger.info("Serving the last good %s reply while the upstream is failing", endpoint)
+        return value
+
 
     @staticmethod
     def authenticate_user(username: str, password: str):
@@ -25,30 +76,37 @@ class AuthService:
         Raises:
             HTTPException: If credentials are invalid or account does not exist.
         """
-        r = requests.post(
-            f"{API_BASE}/account/signin",
-            data={"username": username, "password": password},
-            headers={"Accept": "application/json"},
-        )
+        try:
+            r = http_client.post(
+                "/account/signin",
+                data={"username": username, "password": password},
+                headers={"Accept": "application/json"},
+            )
+        except requests.RequestException:
+            return False, UNAVAILABLE
 
+        body = _json(r)
         if not r.ok:
-            return False, r.json().get("detail")
+            if r.status_code >= 500:
+                return False, UNAVAILABLE
+            return False, body.get("detail") or f"Sign in failed ({r.status_code})."
 
-        token = r.json().get("access_token")
-
-        # 1) Take the payload part of the JWT
-        payload_part = token.split('.')[1]
-
-        # 2) Add padding so length is a multiple of 4
-        padding_needed = -len(payload_part) % 4
-        payload_part += "=" * padding_needed
-        payload_bytes = base64.urlsafe_b64decode(payload_part)
-        payload = json.loads(payload_bytes)
+        token = body.get("access_token")
+        if not token:
+            return False, UNAVAILABLE
+        try:
+            claims = token_claims.get_claims(token)
+        except token_claims.InvalidTokenError as exc:
+            # Malformed, or its signature does not verify against JWT_SECRET_KEY
+            logger.warning("Rejected the access token returned by sign-in: %s", exc)
+            return False, INVALID_TOKEN
 
         return True, {
             "access_token": token,
             "token_type": "bearer",
-            "membership": payload.get('membership')
+            "membership": claims.membership,
+            "user_id": claims.user_id,
+            "expires_at": claims.exp,
         }
 
 
@@ -56,11 +114,14 @@ class AuthService:
     @staticmethod
     def signup(email: str, password: str):
 
-        r = requests.post(
-            f"{API_BASE}/account/signup",
-            json={"email": email, "password": password},
-            headers={"Content-Type": "application/json", "Accept": "application/json"},
-        )
+        try:
+            r = http_client.post(
+                "/account/signup",
+                json={"email": email, "password": password},
+                headers={"Content-Type": "application/json", "Accept": "application/json"},
+            )
+        except requests.RequestException:
+            return UNAVAILABLE
 
         msg = ""
 
@@ -77,23 +138,131 @@ class AuthService:
 
     @staticmethod
     def whoami(acess_token: str):
+        """
+        Return the ``/whoami`` reply for a token, served from cache while valid.
+
+        Entries live for ``WHOAMI_CACHE_TTL`` seconds or until the JWT ``exp``
+        claim, whichever comes first. Error replies are not cached. With
+        ``WHOAMI_DISK_CACHE``, a miss first looks for a reply another server
+        process of the host already fetched.
+
+        The call is retried within ``WHOAMI_BUDGET`` seconds. If the upstream
+        still fails (or the circuit breaker is open), the last good reply for
+        the token is served; without one, ``{"detail": UNAVAILABLE}``.
+        Concurrent misses for the same token share one upstream call.
+        """
+        cached = AuthService._whoami_cache.get(acess_token)
+        if cached is not None:
+            return cached
+        return AuthService._in_flight.do(("whoami", acess_token), lambda: AuthService._fetch_whoami(acess_token))
+
+    @staticmethod
+    def _fetch_whoami(acess_token: str):
+        # The previous leader may have stored the reply just after this caller's lookup
+        cached = AuthService._whoami_cache.get(acess_token)
+        if cached is not None:
+            return cached
+        if AuthService._whoami_disk is not None:
+            entry = AuthService._whoami_disk.get_entry(acess_token)
+            if entry is not None:
+                body, expires_at = entry
+                AuthService._whoami_cache.set(acess_token, body, expires_at=expires_at)
+                return body
+
         headers = {"Authorization": f"Bearer {acess_token}"}
-        return requests.get(f"{API_BASE}/whoami", headers=headers).json()
+        try:
+            r = http_client.get("/whoami", headers=headers, retries=API_RETRIES, budget=WHOAMI_BUDGET)
+        except requests.RequestException:
+            r = None
+
+        body = _json(r) if r is not None else {}
+        if r is not None and r.ok and body:
+            AuthService._whoami_cache.set(acess_token, body, expires_at=token_claims.expires_at(acess_token))
+            if AuthService._whoami_disk is not None:
+                AuthService._whoami_disk.set(acess_token, body, expires_at=token_claims.expires_at(acess_token))
+            AuthService._remember("whoami", acess_token, body)
+            return body
+        if r is not None and r.status_code < 500 and body:
+            return body
+        return AuthService._last_known("whoami", acess_token) or {"detail": UNAVAILABLE}
+
+    @staticmethod
+    def invalidate_whoami(access_token: str):
+        """Drop the cached and last good replies for a token, e.g. on logout."""
+        AuthService._whoami_cache.invalidate(access_token)
+        if AuthService._whoami_disk is not None:
+            AuthService._whoami_disk.invalidate(access_token)
+        AuthService._last_good.invalidate(("whoami", access_token))
+        AuthService._last_good.invalidate(("otp", access_token))
+
+    @staticmethod
+    def whoami_cache_stats() -> dict:
+        """Return hit/miss counters of the whoami cache."""
+        return AuthService._whoami_cache.stats()
+
+    @staticmethod
+    def whoami_disk_stats():
+        """Return this process's counters of the host-wide whoami cache, or ``None`` if it is off."""
+        return AuthService._whoami_disk.stats() if AuthService._whoami_disk is not None else None
+
+    @staticmethod
+    def single_flight_stats() -> dict:
+        """Return how many whoami/otp calls went upstream and how many joined one in flight."""
+        return AuthService._in_flight.stats()
+
+    @staticmethod
+    def is_admin(username: str) -> bool:
+        """Return whether ``username`` is listed in ``ADMIN_USERS``."""
+        return bool(username) and username in ADMIN_USERS
+
+    @staticmethod
+    def resilience_stats() -> dict:
+        """Return the circuit breaker state and how many stale replies were served."""
+        breaker = http_client.breaker
+        return {
+            "breaker_state": breaker.state,
+            "times_opened": breaker.times_opened,
+            "stale_served": AuthService.stale_served,
+        }
 
 
     @staticmethod
     def configure_otp(access_token: str):
+        """
+        Return the ``otpauth://`` URL of the user, or ``None`` if it cannot be fetched.
+
+        Retried and coalesced like ``whoami``; falls back to the last URL
+        fetched for the token.
+        """
+        return AuthService._in_flight.do(("otp", access_token), lambda: AuthService._fetch_otp(access_token))
+
+    @staticmethod
+    def _fetch_otp(access_token: str):
         headers = {"Authorization": f"Bearer {access_token}"}
-        return requests.get(f"{API_BASE}/otp", headers=headers).json().get("otpauth_url")
+        try:
+            r = http_client.get("/otp", headers=headers, retries=API_RETRIES)
+        except requests.RequestException:
+            return AuthService._last_known("otp", access_token)
+
+        url = _json(r).get("otpauth_url")
+        if url:
+            AuthService._remember("otp", access_token, url)
+            return url
+        return AuthService._last_known("otp", access_token) if r.status_code >= 500 else None
 
     @staticmethod
     def validate_otp_client_configuration(access_token: str, otp_code: str):
-        return requests.post(
-            f"{API_BASE}/confirm-otp",
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-            },
-            json={"otp_code": otp_code},
-        ).json()
+        """Return whether the upstream accepted ``otp_code``; ``False`` if it could not be asked."""
+        try:
+            r = http_client.post(
+                "/confirm-otp",
+                headers={
+                    "Authorization": f"Bearer {access_token}",
+                    "Content-Type": "application/json",
+                    "Accept": "application/json",
+                },
+                json={"otp_code": otp_code},
+            )
+            return r.json()
+        except (requests.RequestException, ValueError):
+            return False
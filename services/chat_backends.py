@@ -0,0 +1,241 @@
+"""Model backends the chat assistant streams its answers from."""
+import abc
+import asyncio
+import json
+import re
+import threading
+import unicodedata
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.chat_context import money
+from settings import (
+    API_CONNECT_TIMEOUT,
+    CHAT_API_KEY,
+    CHAT_API_URL,
+    CHAT_BACKEND,
+    CHAT_MAX_CONCURRENT,
+    CHAT_MODEL,
+    CHAT_TOKEN_TIMEOUT,
+)
+
+# A word and the whitespace after it: the stand-in's unit of streaming
+_TOKEN = re.compile(r"\S+\s*")
+_DONE = object()
+
+
+class ChatNotConfigured(ValueError):
+    """Raised when ``CHAT_BACKEND`` names an unknown backend or lacks its settings."""
+
+
+class ChatBackend(abc.ABC):
+    """
+    A model answering the last user message of a conversation about one client.
+
+    ``stream(messages, context)`` returns an async iterator of text chunks,
+    produced as the model generates them. ``messages`` are ``{"role",
+    "content"}`` dicts, oldest first, ending with the user's question;
+    ``context`` is the client's ``ClientContext``. Closing the iterator early
+    (``aclose``) must release whatever the backend holds for the answer.
+    """
+
+    @abc.abstractmethod
+    def stream(self, messages: list, context):
+        """Return an async iterator of the answer's text chunks."""
+
+
+def _normalized(text: str) -> str:
+    """Lowercase ``text`` without accents, for keyword matching."""
+    return "".join(c for c in unicodedata.normalize("NFKD", text.lower()) if not unicodedata.combining(c))
+
+
+class StandInBackend(ChatBackend):
+    """
+    Deterministic local stand-in for a model, for development, tests and benchmarks.
+
+    The topic of the answer (balances, spend, alerts, credit score, last
+    month) is picked from keywords of the question and the answer is written
+    from the client's snapshot, then streamed word by word. The same question
+    over the same snapshot always gets the same answer.
+
+    Args:
+        first_token_delay (float): Seconds before the first word, simulating a model's prefill.
+        token_delay (float): Seconds between words, simulating decoding.
+    """
+
+    # (keywords, topic), checked in order on the normalized question
+    TOPICS = (
+        (("alerta", "aviso", "riesgo de", "sospech"), "alertas"),
+        (("puntaje", "score", "credito", "crediticio"), "puntaje"),
+        (("gasto", "gaste", "gastando", "categoria", "consumo"), "gastos"),
+        (("mes", "mensual", "ultimo"), "ultimo_mes"),
+        (("saldo", "cuenta", "dinero", "plata", "balance", "tengo"), "saldos"),
+    )
+
+    def __init__(self, first_token_delay: float = 0.0, token_delay: float = 0.0):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+
+    def topic(self, question: str) -> str:
+        """Return the topic of ``question``, ``"resumen"`` if no keyword matches."""
+        question = _normalized(question)
+        for keywords, topic in self.TOPICS:
+            if any(keyword in question for keyword in keywords):
+                return topic
+        return "resumen"
+
+    def answer(self, question: str, context) -> str:
+        """Return the whole answer to ``question``."""
+        topic = self.topic(question)
+        if topic == "saldos":
+            cuentas = "; ".join(
+                f"{entidad} ({tipo}, ****{ultimos}): {money(saldo)}"
+                for entidad, tipo, saldo, ultimos in context.cuentas
+            )
+            return (
+                f"Tu saldo total es {money(context.saldo_total)} en {len(context.cuentas)} cuenta(s)"
+                + (f": {cuentas}." if cuentas else ".")
+            )
+        if topic == "gastos":
+            if not context.gastos:
+                return "No tengo gastos por categoría registrados para ti."
+            principales = ", ".join(f"{categoria} ({money(monto)})" for categoria, monto in context.gastos[:3])
+            total = sum(monto for _, monto in context.gastos)
+            return (
+                f"Has gastado {money(total)} en débitos con categoría. "
+                f"Tus categorías principales son {principales}."
+            )
+        if topic == "alertas":
+            if not context.alertas:
+                return "No tienes alertas recientes en tus movimientos."
+            fecha, titulo, mensaje, accion = context.alertas[0]
+            return (
+                f"Tienes {len(context.alertas)} alerta(s) reciente(s). La más reciente, del {fecha}: "
+                f"{titulo}. {mensaje} {accion}".rstrip()
+            )
+        if topic == "puntaje":
+            if context.puntaje_credito is None:
+                return "No tengo un puntaje de crédito registrado para ti."
+            return (
+                f"Tu puntaje de crédito es {context.puntaje_credito}, categoría {context.categoria_riesgo}. "
+                f"Tu capacidad de ahorro es {context.capacidad_ahorro:.1f}%."
+            )
+        if topic == "ultimo_mes":
+            if not context.ultimo_mes:
+                return "No tienes movimientos con fecha registrados."
+            mes, debitos, creditos = context.ultimo_mes
+            return (
+                f"En {mes} tuviste débitos por {money(debitos)} y créditos por {money(creditos)}, "
+                f"un neto de {money(creditos - debitos)}."
+            )
+        return (
+            f"Hola, {context.nombre}. Tienes {money(context.saldo_total)} en {len(context.cuentas)} cuenta(s) "
+            f"y {context.num_movimientos} movimientos. Pregúntame por tus saldos, tus gastos por categoría, "
+            "tus alertas o tu puntaje de crédito."
+        )
+
+    async def stream(self, messages: list, context):
+        text = self.answer(messages[-1]["content"], context)
+        await asyncio.sleep(self.first_token_delay)
+        for i, token in enumerate(_TOKEN.findall(text)):
+            if i:
+                # Also with no delay: lets concurrent answers interleave on the loop
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+
+def _deltas(lines):
+    """Text deltas of an OpenAI-style server-sent event stream, up to ``[DONE]``."""
+    for line in lines:
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        choices = json.loads(data).get("choices") or [{}]
+        content = (choices[0].get("delta") or {}).get("content")
+        if content:
+            yield content
+
+
+class HttpChatBackend(ChatBackend):
+    """
+    An OpenAI-compatible chat completions endpoint, streamed as server-sent events.
+
+    The client's snapshot is sent as the system prompt. ``requests`` blocks,
+    so each answer is read in a worker thread that hands every delta to the
+    event loop as it arrives; connections are pooled and kept alive between
+    answers. Closing the stream early stops the reader and drops the
+    connection instead of reading the rest of the answer.
+
+    Args:
+        url (str): Full URL of the ``/chat/completions`` endpoint.
+        model (str): Model name sent with every request.
+        api_key (str): Bearer token, if the endpoint needs one.
+        timeout (tuple): ``(connect, read)`` timeouts in seconds; the read
+            timeout applies between chunks.
+    """
+
+    def __init__(self, url: str, model: str = "", api_key: str = "",
+                 timeout=(API_CONNECT_TIMEOUT, CHAT_TOKEN_TIMEOUT), pool_maxsize: int = CHAT_MAX_CONCURRENT):
+        self.url = url
+        self.model = model
+        self.timeout = timeout
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, pool_block=False)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        if api_key:
+            self._session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def _read(self, payload: dict, deliver, stop: threading.Event):
+        try:
+            with self._session.post(self.url, json=payload, stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                for delta in _deltas(response.iter_lines(decode_unicode=True)):
+                    if stop.is_set():
+                        return
+                    deliver(delta)
+            deliver(_DONE)
+        except Exception as exc:
+            deliver(exc)
+
+    async def stream(self, messages: list, context):
+        loop = asyncio.get_running_loop()
+        deltas = asyncio.Queue()
+        stop = threading.Event()
+        payload = {
+            "model": self.model,
+            "stream": True,
+            "messages": [{"role": "system", "content": context.prompt()}, *messages],
+        }
+        loop.run_in_executor(
+            None, self._read, payload, lambda item: loop.call_soon_threadsafe(deltas.put_nowait, item), stop,
+        )
+        try:
+            while True:
+                item = await deltas.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+
+
+def create(name: str = CHAT_BACKEND) -> ChatBackend:
+    """
+    Return the chat backend called ``name`` (see ``CHAT_BACKEND``).
+
+    Raises:
+        ChatNotConfigured: If the backend is unknown, or ``http`` is picked without ``CHAT_API_URL``.
+    """
+    if name == "stand_in":
+        return StandInBackend()
+    if name == "http":
+        if not CHAT_API_URL:
+            raise ChatNotConfigured("CHAT_BACKEND 'http' needs CHAT_API_URL")
+        return HttpChatBackend(CHAT_API_URL, CHAT_MODEL, CHAT_API_KEY)
+    raise ChatNotConfigured(f"Unknown CHAT_BACKEND {name!r}; expected 'stand_in' or 'http'")
@@ -0,0 +1,180 @@
+"""Per-client snapshot of the financial facts the chat assistant answers from."""
+import math
+import weakref
+from dataclasses import dataclass
+
+from services.single_flight import SingleFlight
+from services.ttl_cache import TTLCache
+from settings import CHAT_CONTEXT_CACHE, CHAT_CONTEXT_TTL
+
+# Newest movements scanned for alerts, and alerts kept
+ALERT_SCAN = 200
+MAX_ALERTS = 5
+
+
+def _number(value) -> float:
+    value = float(value) if value is not None else math.nan
+    return 0.0 if math.isnan(value) else value
+
+
+def _text(value) -> str:
+    return value if isinstance(value, str) else ""
+
+
+def money(value: float) -> str:
+    """Format an amount the way the dashboard does, e.g. ``$1,234`` or ``-$56``."""
+    return f"{'-' if value < 0 else ''}${abs(value):,.0f}"
+
+
+@dataclass(frozen=True)
+class ClientContext:
+    """
+    What the assistant knows about one client, built once and reused for every question.
+
+    Attributes:
+        id_cliente (str): Client id.
+        nombre (str): First and last name.
+        saldo_total (float): Sum of the account balances.
+        cuentas (tuple): ``(entidad, tipo_cuenta, saldo_actual, ultimos_4)`` per account.
+        gastos (tuple): ``(categoria, monto)`` of debit spend, largest first.
+        total_debitos (float): Debits over the whole history.
+        total_creditos (float): Credits over the whole history.
+        num_movimientos (int): Movements in the history.
+        balance_mensual (float): Monthly income minus expenses.
+        capacidad_ahorro (float): Savings capacity, in percent.
+        ultimo_mes (tuple): ``(mes, debitos, creditos)`` of the latest month with movements, or ``()``.
+        puntaje_credito (int): Credit score, ``None`` without a scoring row.
+        categoria_riesgo (str): Risk category, ``None`` without a scoring row.
+        alertas (tuple): ``(fecha, titulo, mensaje, accion)`` of the latest alerts, newest first.
+    """
+
+    id_cliente: str
+    nombre: str
+    saldo_total: float
+    cuentas: tuple
+    gastos: tuple
+    total_debitos: float
+    total_creditos: float
+    num_movimientos: int
+    balance_mensual: float
+    capacidad_ahorro: float
+    ultimo_mes: tuple
+    puntaje_credito: int
+    categoria_riesgo: str
+    alertas: tuple
+
+    def prompt(self) -> str:
+        """Return the facts as the system prompt of a model backend (Spanish, one fact per line)."""
+        lines = [
+            "Eres el asistente financiero de Nuu. Responde en español, en pocas frases, "
+            "solo con los datos del cliente que siguen; si algo no está en los datos, dilo.",
+            f"Cliente: {self.nombre}",
+            f"Saldo total: {money(self.saldo_total)} en {len(self.cuentas)} cuenta(s)",
+        ]
+        lines += [
+            f"- {entidad} ({tipo}, ****{ultimos}): {money(saldo)}"
+            for entidad, tipo, saldo, ultimos in self.cuentas
+        ]
+        lines.append(
+            f"Movimientos: {self.num_movimientos}; débitos {money(self.total_debitos)}, "
+            f"créditos {money(self.total_creditos)}"
+        )
+        if self.ultimo_mes:
+            mes, debitos, creditos = self.ultimo_mes
+            lines.append(f"Último mes ({mes}): débitos {money(debitos)}, créditos {money(creditos)}")
+        lines.append("Gastos por categoría: " + (
+            ", ".join(f"{categoria} {money(monto)}" for categoria, monto in self.gastos) or "sin datos"
+        ))
+        lines.append(
+            f"Balance mensual: {money(self.balance_mensual)}; capacidad de ahorro {self.capacidad_ahorro:.1f}%"
+        )
+        if self.puntaje_credito is not None:
+            lines.append(f"Puntaje de crédito: {self.puntaje_credito} ({self.categoria_riesgo})")
+        lines += [
+            f"Alerta {fecha}: {titulo}. {mensaje} {accion}".rstrip()
+            for fecha, titulo, mensaje, accion in self.alertas
+        ]
+        return "\n".join(lines)
+
+
+def build(datos, id_cliente) -> ClientContext:
+    """
+    Build the snapshot of one client from a ``FinancialBackend``, or ``None`` if unknown.
+
+    Only per-client lookups are made: the precomputed aggregates and monthly
+    rollups, plus the newest ``ALERT_SCAN`` movements for alerts.
+    """
+    cliente = datos.cliente(id_cliente)
+    if cliente is None:
+        return None
+    agregados = datos.agregados_cliente(id_cliente)
+    cuentas = datos.cuentas_cliente(id_cliente)
+    scoring = datos.scoring_cliente(id_cliente)
+    totales = datos.tendencia_mensual(id_cliente)["totales"]
+    recientes = datos.movimientos(id_cliente, 0, ALERT_SCAN)
+    recientes = recientes[recientes["titulo_alerta"].notna()].head(MAX_ALERTS)
+
+    return ClientContext(
+        id_cliente=id_cliente,
+        nombre=f"{cliente['nombres']} {cliente['apellidos']}",
+        saldo_total=agregados["total_saldo"],
+        cuentas=tuple(
+            (c.entidad_financiera, c.tipo_cuenta, _number(c.saldo_actual), str(c.numero_cuenta)[-4:])
+            for c in cuentas.itertuples(index=False)
+        ),
+        gastos=tuple((str(c), float(m)) for c, m in agregados["gastos_por_categoria"].items()),
+        total_debitos=agregados["total_debitos"],
+        total_creditos=agregados["total_creditos"],
+        num_movimientos=agregados["num_movimientos"],
+        balance_mensual=agregados["balance_mensual"],
+        capacidad_ahorro=agregados["capacidad_ahorro"],
+        ultimo_mes=(
+            (totales.index[-1].strftime("%Y-%m"), float(totales["debitos"].iloc[-1]),
+             float(totales["creditos"].iloc[-1]))
+            if len(totales) else ()
+        ),
+        puntaje_credito=int(scoring["puntaje_credito"]) if scoring is not None else None,
+        categoria_riesgo=str(scoring["categoria_riesgo"]) if scoring is not None else None,
+        alertas=tuple(
+            (f"{a.fecha_registro:%Y-%m-%d}", a.titulo_alerta, _text(a.mensaje_alerta), _text(a.accion_recomendada))
+            for a in recientes.itertuples(index=False)
+        ),
+    )
+
+
+class ContextStore:
+    """
+    Snapshots of the clients who chat, so a question never re-reads their data.
+
+    A snapshot is kept for ``ttl`` seconds while the dataset it was built from
+    is still the current one: a reload or an ingest of new movements returns
+    a new ``FinancialBackend``, which invalidates every older snapshot. The
+    dataset is only referenced weakly, so snapshots do not keep it alive.
+    Concurrent first questions of one client build it once.
+
+    Args:
+        maxsize (int): Clients kept, least recently used first out.
+        ttl (float): Seconds a snapshot is kept.
+    """
+
+    def __init__(self, maxsize: int = CHAT_CONTEXT_CACHE, ttl: float = CHAT_CONTEXT_TTL):
+        self._snapshots = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._builds = SingleFlight()
+
+    def get(self, datos, id_cliente) -> ClientContext:
+        """Return the client's snapshot over ``datos``, building it if needed; ``None`` if unknown."""
+        cached = self._snapshots.get(id_cliente)
+        if cached is not None and cached[0]() is datos:
+            return cached[1]
+        context = self._builds.do((id(datos), id_cliente), lambda: build(datos, id_cliente))
+        if context is not None:
+            self._snapshots.set(id_cliente, (weakref.ref(datos), context))
+        return context
+
+    def stats(self) -> dict:
+        """Return the snapshot cache statistics (see ``TTLCache.stats``)."""
+        return self._snapshots.stats()
+
+
+# Shared by every session of the process
+contexts = ContextStore()
@@ -0,0 +1,170 @@
+"""Streaming of the chat assistant's answers: asyncio orchestration over a pluggable model backend."""
+import asyncio
+import collections
+import logging
+import queue
+import threading
+import time
+
+from services import chat_backends
+from settings import CHAT_FIRST_TOKEN_TIMEOUT, CHAT_HISTORY_TURNS, CHAT_MAX_CONCURRENT, CHAT_TOKEN_TIMEOUT
+
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class ChatUnavailable(Exception):
+    """Raised when an answer cannot be streamed: the backend failed or went silent."""
+
+
+class ChatService:
+    """
+    Streams answers from a ``ChatBackend`` to Streamlit script threads.
+
+    Backends are asyncio-based and Streamlit scripts are not: the service
+    runs one event loop in a daemon thread for the whole process and every
+    answer is a task on it, so waiting on a model costs no thread per
+    answer. ``stream`` hands the script a plain generator fed through a
+    queue, which ``st.write_stream`` renders as chunks arrive; chunks that
+    piled up while the script was rendering are joined into one write.
+
+    At most ``max_concurrent`` answers are generated at once; later ones wait
+    on the loop for a slot. An answer whose first chunk takes longer than
+    ``first_token_timeout`` seconds, or whose backend goes silent for
+    ``token_timeout``, ends with ``ChatUnavailable``. When the script stops
+    reading (a rerun, a closed tab) the task is cancelled, which closes the
+    backend's stream. Time to first token, chunks and duration of the last
+    ``log_size`` answers are kept for ``stats``.
+
+    Args:
+        backend (ChatBackend): Model producing the answers.
+        history_turns (int): Previous question/answer pairs sent with a question.
+    """
+
+    def __init__(self, backend: chat_backends.ChatBackend, max_concurrent: int = CHAT_MAX_CONCURRENT,
+                 first_token_timeout: float = CHAT_FIRST_TOKEN_TIMEOUT, token_timeout: float = CHAT_TOKEN_TIMEOUT,
+                 history_turns: int = CHAT_HISTORY_TURNS, log_size: int = 500):
+        self.backend = backend
+        self.max_concurrent = max_concurrent
+        self.first_token_timeout = first_token_timeout
+        self.token_timeout = token_timeout
+        self.history_turns = history_turns
+        self.log = collections.deque(maxlen=log_size)
+        self._loop = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name="chat-loop", daemon=True).start()
+                    self._slots = asyncio.Semaphore(self.max_concurrent)
+                    self._loop = loop
+        return self._loop
+
+    async def _answer(self, messages: list, context, chunks: queue.Queue, record: dict):
+        async with self._slots:
+            deltas = self.backend.stream(messages, context).__aiter__()
+            timeout = self.first_token_timeout
+            try:
+                while True:
+                    try:
+                        delta = await asyncio.wait_for(deltas.__anext__(), timeout)
+                    except StopAsyncIteration:
+                        return
+                    except asyncio.TimeoutError:
+                        raise ChatUnavailable(f"No answer from the model in {timeout:g}s") from None
+                    record["chunks"] += 1
+                    chunks.put(delta)
+                    timeout = self.token_timeout
+            finally:
+                await deltas.aclose()
+
+    def stream(self, messages: list, context):
+        """
+        Yield the answer to the last of ``messages`` as it is generated.
+
+        Only the last ``history_turns`` question/answer pairs before the
+        question are sent to the backend.
+
+        Raises:
+            ChatUnavailable: From the generator, if the backend fails or times out.
+        """
+        loop = self._event_loop()
+        messages = messages[-(2 * self.history_turns + 1):]
+        chunks = queue.Queue()
+        record = {"start": time.perf_counter(), "first": None, "chunks": 0, "outcome": "completed"}
+        task = asyncio.run_coroutine_threadsafe(self._answer(messages, context, chunks, record), loop)
+        task.add_done_callback(lambda _: chunks.put(_DONE))
+        try:
+            done = False
+            while not done:
+                parts = [chunks.get()]
+                while not chunks.empty():
+                    parts.append(chunks.get_nowait())
+                if parts[-1] is _DONE:
+                    done = True
+                    parts.pop()
+                if parts:
+                    if record["first"] is None:
+                        record["first"] = time.perf_counter()
+                    yield "".join(parts)
+            error = task.exception()
+            if error is not None:
+                record["outcome"] = "failed"
+                if isinstance(error, ChatUnavailable):
+                    raise error
+                logger.warning("Chat backend failed: %s", error)
+                raise ChatUnavailable(str(error)) from error
+        finally:
+            if not task.done():
+                task.cancel()
+                record["outcome"] = "cancelled"
+            record["end"] = time.perf_counter()
+            self.log.append(record)
+
+    def stats(self) -> dict:
+        """
+        Return statistics of the logged answers.
+
+        Returns:
+            dict: ``answers``, ``failed`` and ``cancelled`` counts, and over
+            completed answers ``ttft_p50``/``ttft_p95`` (seconds from the
+            question to the first chunk reaching the script) and
+            ``chunks_per_second`` (backend chunks over the streaming time).
+        """
+        records = list(self.log)
+        completed = [r for r in records if r["outcome"] == "completed" and r["first"] is not None]
+        ttfts = sorted(r["first"] - r["start"] for r in completed)
+        streaming = sum(r["end"] - r["first"] for r in completed)
+        return {
+            "answers": len(records),
+            "failed": sum(r["outcome"] == "failed" for r in records),
+            "cancelled": sum(r["outcome"] == "cancelled" for r in records),
+            "ttft_p50": ttfts[len(ttfts) // 2] if ttfts else None,
+            "ttft_p95": ttfts[min(len(ttfts) - 1, int(len(ttfts) * 0.95))] if ttfts else None,
+            "chunks_per_second": sum(r["chunks"] for r in completed) / streaming if streaming > 0 else None,
+        }
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared() -> ChatService:
+    """
+    Return the process-wide chat service over ``CHAT_BACKEND``, creating it on first use.
+
+    Raises:
+        chat_backends.ChatNotConfigured: If ``CHAT_BACKEND`` is misconfigured.
+    """
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = ChatService(chat_backends.create())
+    return _shared
@@ -0,0 +1,160 @@
+"""Materialized per-client aggregates for the PREMIUM analytics panel."""
+import copy
+
+import numpy as np
+import pandas as pd
+
+from services.client_index import ClientIndex
+
+
+def _floats(series: pd.Series) -> np.ndarray:
+    return series.to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _movement_sums(historial: pd.DataFrame):
+    """Additive movement metrics per client: ``(totales, gastos por categoría)``."""
+    pago = _floats(historial["pago_realizado"])
+    tipo = historial["tipo_operacion"]
+    es_debito = (tipo == "Debito").fillna(False).to_numpy(dtype=bool)
+    es_credito = (tipo == "Credito").fillna(False).to_numpy(dtype=bool)
+    # NaN payments are skipped by sum(), as in the original masks
+    pago_cero = np.nan_to_num(pago)
+
+    totales = pd.DataFrame({
+        "num_movimientos": np.ones(len(historial)),
+        "total_debitos": np.where(es_debito, pago_cero, 0.0),
+        "total_creditos": np.where(es_credito, pago_cero, 0.0),
+    }).groupby(historial["id_cliente"].to_numpy(dtype=object)).sum()
+
+    con_categoria = es_debito & historial["categoria_gasto"].notna().to_numpy(dtype=bool)
+    gastos = pd.DataFrame({
+        "id_cliente": historial["id_cliente"].to_numpy(dtype=object)[con_categoria],
+        "categoria_gasto": historial["categoria_gasto"].to_numpy(dtype=object)[con_categoria],
+        "monto": pago_cero[con_categoria],
+    }).pivot_table(index="id_cliente", columns="categoria_gasto", values="monto", aggfunc="sum")
+    gastos.columns.name = None
+    return totales, gastos
+
+
+class ClientAggregates:
+    """
+    One row of precomputed analytics per client.
+
+    Account and profile metrics are fixed per load; movement metrics are
+    additive, so rows appended later are folded into a small delta table
+    (see ``with_movements``) that is combined with the base at lookup time.
+    """
+
+    def __init__(self, clientes: pd.DataFrame, cuentas: pd.DataFrame, historial: pd.DataFrame):
+        ids_cuentas = cuentas["id_cliente"].to_numpy(dtype=object)
+        saldo = np.nan_to_num(_floats(cuentas["saldo_actual"]))
+        total_saldo = pd.Series(saldo).groupby(ids_cuentas).sum()
+        total_por_cuenta = total_saldo.reindex(ids_cuentas).to_numpy()
+        porcentaje = np.divide(
+            saldo * 100, total_por_cuenta, out=np.zeros_like(saldo), where=total_por_cuenta > 0,
+        )
+        distribucion = pd.DataFrame({
+            "id_cliente": ids_cuentas,
+            "entidad_financiera": cuentas["entidad_financiera"].to_numpy(dtype=object),
+            "porcentaje": porcentaje,
+        })
+
+        ingresos = _floats(clientes["ingresos_mensuales"])
+        balance = ingresos - _floats(clientes["gastos_mensuales"])
+        capacidad = np.divide(balance * 100, ingresos, out=np.zeros_like(balance), where=ingresos > 0)
+        perfil = pd.DataFrame(
+            {"balance_mensual": balance, "capacidad_ahorro": capacidad},
+            index=clientes["id_cliente"].to_numpy(dtype=object),
+        )
+
+        self.cuentas = pd.DataFrame({
+            "total_saldo": total_saldo,
+            "num_cuentas": pd.Series(ids_cuentas).value_counts(),
+        })
+        # Each account's share of its client's balance, in account order
+        self.distribucion = ClientIndex(distribucion)
+        self.perfil = perfil[~perfil.index.duplicated()]
+        self.totales, self.gastos = _movement_sums(historial)
+        self.delta_totales = self.delta_gastos = None
+
+    def state(self) -> dict:
+        """
+        Return the aggregates as frames, for ``from_state`` in another process (see ``shared_snapshot``).
+
+        Raises:
+            ValueError: If movements were folded in; only base aggregates are exported.
+        """
+        if self.delta_totales is not None:
+            raise ValueError("Cannot export aggregates with appended movements")
+        return {
+            "cuentas": self.cuentas,
+            "distribucion": self.distribucion.state(),
+            "perfil": self.perfil,
+            "totales": self.totales,
+            "gastos": self.gastos,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "ClientAggregates":
+        """Rebuild aggregates from ``state()`` frames without recomputing them."""
+        aggregates = cls.__new__(cls)
+        aggregates.cuentas = state["cuentas"]
+        aggregates.distribucion = ClientIndex.from_state(state["distribucion"])
+        aggregates.perfil = state["perfil"]
+        aggregates.totales = state["totales"]
+        aggregates.gastos = state["gastos"]
+        aggregates.delta_totales = aggregates.delta_gastos = None
+        return aggregates
+
+    def with_movements(self, rows: pd.DataFrame) -> "ClientAggregates":
+        """Return aggregates that also count ``rows``; cost is proportional to the new rows."""
+        totales, gastos = _movement_sums(rows)
+        new = copy.copy(self)
+        if self.delta_totales is not None:
+            totales = self.delta_totales.add(totales, fill_value=0)
+            gastos = self.delta_gastos.add(gastos, fill_value=0)
+        new.delta_totales, new.delta_gastos = totales, gastos
+        return new
+
+    @staticmethod
+    def _row(frame: pd.DataFrame, client_id):
+        if frame is None or client_id not in frame.index:
+            return None
+        return frame.loc[client_id]
+
+    def lookup(self, client_id) -> dict:
+        """
+        Return the analytics of one client.
+
+        Returns:
+            dict: ``num_movimientos``, ``total_debitos``, ``total_creditos``,
+            ``gastos_por_categoria`` (Series, descending), ``total_saldo``,
+            ``num_cuentas``, ``distribucion_saldos`` (tuple of
+            ``(entidad, porcentaje)``), ``balance_mensual`` and ``capacidad_ahorro``.
+        """
+        totales = pd.Series(0.0, index=self.totales.columns)
+        gastos = pd.Series(dtype="float64")
+        for frame_totales, frame_gastos in ((self.totales, self.gastos), (self.delta_totales, self.delta_gastos)):
+            row = self._row(frame_totales, client_id)
+            if row is not None:
+                totales = totales + row
+            row = self._row(frame_gastos, client_id)
+            if row is not None:
+                gastos = gastos.add(row.dropna(), fill_value=0)
+
+        cuentas = self._row(self.cuentas, client_id)
+        perfil = self._row(self.perfil, client_id)
+        distribucion = self.distribucion.rows(client_id)
+        return {
+            "num_movimientos": int(totales["num_movimientos"]),
+            "total_debitos": float(totales["total_debitos"]),
+            "total_creditos": float(totales["total_creditos"]),
+            "gastos_por_categoria": gastos.sort_values(ascending=False),
+            "total_saldo": float(cuentas["total_saldo"]) if cuentas is not None else 0.0,
+            "num_cuentas": int(cuentas["num_cuentas"]) if cuentas is not None else 0,
+            "distribucion_saldos": tuple(zip(
+                distribucion["entidad_financiera"].tolist(), distribucion["porcentaje"].tolist(),
+            )),
+            "balance_mensual": float(perfil["balance_mensual"]) if perfil is not None else 0.0,
+            "capacidad_ahorro": float(perfil["capacidad_ahorro"]) if perfil is not None else 0.0,
+        }
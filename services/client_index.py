@@ -0,0 +1,204 @@
+"""Index of table rows grouped by client."""
+import copy
+
+import numpy as np
+import pandas as pd
+
+# The tail is folded into the base once it holds more rows than this, or
+# than this fraction of the base, whichever is larger
+TAIL_FOLD_ROWS = 10_000
+TAIL_FOLD_FRACTION = 0.05
+
+def _unify_categories(frames: list) -> list:
+    """Give every Categorical column the same categories across ``frames`` so concat keeps the dtype."""
+    first = frames[0]
+    for column in first.columns:
+        if not isinstance(first[column].dtype, pd.CategoricalDtype):
+            continue
+        categories = first[column].cat.categories
+        for frame in frames[1:]:
+            if isinstance(frame[column].dtype, pd.CategoricalDtype):
+                categories = categories.append(frame[column].cat.categories.difference(categories, sort=False))
+        frames = [
+            frame.assign(**{column: pd.Categorical(frame[column], categories=categories)})
+            if not frame[column].dtype == pd.CategoricalDtype(categories) else frame
+            for frame in frames
+        ]
+    return frames
+
+
+def _is_sorted(df: pd.DataFrame, key: str, sort_by) -> bool:
+    """Tell, without copying, whether ``df`` is ordered by ``key`` then ``sort_by`` (nulls last)."""
+    keys = df[key]
+    if not keys.is_monotonic_increasing:
+        return False
+    if not sort_by or len(df) < 2:
+        return True
+    if len(sort_by) > 1:
+        return False
+
+    column, ascending = sort_by[0]
+    values = df[column]
+    prev, cur = values.iloc[:-1].reset_index(drop=True), values.iloc[1:].reset_index(drop=True)
+    same_client = (keys.iloc[:-1].reset_index(drop=True) == keys.iloc[1:].reset_index(drop=True)).to_numpy(dtype=bool)
+    in_order = (cur >= prev) if ascending else (cur <= prev)
+    in_order = in_order.fillna(False).to_numpy(dtype=bool) | cur.isna().to_numpy(dtype=bool)
+    null_before_value = prev.isna().to_numpy(dtype=bool) & cur.notna().to_numpy(dtype=bool)
+    return bool(np.all(~same_client | (in_order & ~null_before_value)))
+
+
+def _compare(x: pd.DataFrame, i: int, y: pd.DataFrame, j: int, sort_by) -> int:
+    """Compare row ``i`` of ``x`` with row ``j`` of ``y`` under ``sort_by`` (nulls last): -1, 0 or 1."""
+    for column, ascending in sort_by:
+        a, b = x[column].iat[i], y[column].iat[j]
+        if pd.isna(a) or pd.isna(b):
+            if pd.isna(a) and pd.isna(b):
+                continue
+            return 1 if pd.isna(a) else -1
+        if a != b:
+            return (-1 if a < b else 1) * (1 if ascending else -1)
+    return 0
+
+
+class ClientIndex:
+    """
+    Rows of a table grouped by client for O(1) lookups.
+
+    The table is reordered once so that each client's rows are contiguous;
+    a lookup is then a dict hit plus a positional slice, independent of the
+    total number of rows.
+
+    Rows that arrive later are kept in a separate tail index (see
+    ``appended``) so the base table is not rebuilt for every append; the
+    tail is folded into the base once it grows past ``TAIL_FOLD_ROWS`` or
+    ``TAIL_FOLD_FRACTION`` of the base.
+
+    Args:
+        df (pd.DataFrame): Table to index.
+        key (str): Client column.
+        sort_by (list[tuple[str, bool]]): Optional ``(column, ascending)``
+            pairs ordering the rows of each client.
+    """
+
+    def __init__(self, df: pd.DataFrame, key: str = "id_cliente", sort_by=None):
+        self.key = key
+        self.sort_by = sort_by
+        self.tail = None
+        if df[key].isna().any():
+            df = df[df[key].notna()]
+
+        # Tables coming from the columnar store are already in this order
+        if not _is_sorted(df, key, sort_by):
+            sort_columns = [key] + [column for column, _ in (sort_by or [])]
+            ascending = [True] + [asc for _, asc in (sort_by or [])]
+            df = df.sort_values(sort_columns, ascending=ascending, kind="stable")
+        if not df.index.equals(pd.RangeIndex(len(df))):
+            df = df.reset_index(drop=True)
+        self.frame = df
+
+        keys = self.frame[key]
+        starts = np.flatnonzero(keys.ne(keys.shift()).fillna(True).to_numpy(dtype=bool))
+        stops = np.append(starts[1:], len(keys))
+        self._offsets = {
+            k: (int(a), int(b)) for k, a, b in zip(keys.iloc[starts].tolist(), starts, stops)
+        }
+
+    def state(self) -> dict:
+        """
+        Return the index as frames, for ``from_state`` in another process (see ``shared_snapshot``).
+
+        Raises:
+            ValueError: If rows were appended; only a base index is exported.
+        """
+        if self.tail is not None:
+            raise ValueError("Cannot export an index with appended rows")
+        ids = list(self._offsets)
+        bounds = np.array(list(self._offsets.values()), dtype="int64").reshape(-1, 2)
+        return {
+            "frame": self.frame,
+            "offsets": pd.DataFrame({self.key: ids, "start": bounds[:, 0], "stop": bounds[:, 1]}),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict, key: str = "id_cliente", sort_by=None) -> "ClientIndex":
+        """Rebuild an index from ``state()`` frames without sorting or scanning the table."""
+        index = cls.__new__(cls)
+        index.key = key
+        index.sort_by = sort_by
+        index.tail = None
+        index.frame = state["frame"]
+        offsets = state["offsets"]
+        index._offsets = dict(zip(
+            # Through NumPy: iterating an Arrow-backed column is far slower
+            offsets[key].to_numpy(dtype=object).tolist(),
+            zip(offsets["start"].tolist(), offsets["stop"].tolist()),
+        ))
+        return index
+
+    def __contains__(self, client_id) -> bool:
+        return client_id in self._offsets or (self.tail is not None and client_id in self.tail)
+
+    def __len__(self) -> int:
+        return len(self.ids())
+
+    def ids(self) -> list:
+        """Return the indexed client ids, in table order."""
+        if self.tail is None:
+            return list(self._offsets)
+        return list(dict.fromkeys([*self._offsets, *self.tail.ids()]))
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.frame) + (self.tail.num_rows if self.tail is not None else 0)
+
+    def appended(self, rows: pd.DataFrame) -> "ClientIndex":
+        """
+        Return a new index with ``rows`` added, sharing this index's base table.
+
+        Only the tail (rows appended since the base was built) is re-indexed,
+        so the cost is proportional to the appended data until the tail is
+        folded into a new base. ``self`` is left untouched, so readers
+        holding it keep a consistent view.
+        """
+        parts = [rows] if self.tail is None else [self.tail.frame, rows]
+        _, *parts = _unify_categories([self.frame.iloc[:0], *parts])
+        tail_frame = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+        if len(tail_frame) > max(TAIL_FOLD_ROWS, TAIL_FOLD_FRACTION * len(self.frame)):
+            # Rebuilding the base is linear in the table, once every many appends
+            frame = pd.concat(_unify_categories([self.frame, tail_frame]), ignore_index=True)
+            return ClientIndex(frame, self.key, self.sort_by)
+        new = copy.copy(self)
+        new.tail = ClientIndex(tail_frame, self.key, self.sort_by)
+        return new
+
+    def rows(self, client_id) -> pd.DataFrame:
+        """Return the rows of a client (empty frame if it has none)."""
+        start, stop = self._offsets.get(client_id, (0, 0))
+        base = self.frame.iloc[start:stop]
+        if self.tail is None or client_id not in self.tail:
+            return base
+
+        tail = self.tail.rows(client_id)
+        # Each slice is already in order; appended rows usually all go after
+        # (or, newest first, all before) the client's base rows
+        if not len(base) or not self.sort_by or _compare(base, -1, tail, 0, self.sort_by) <= 0:
+            return pd.concat(_unify_categories([base, tail]), ignore_index=True)
+        if _compare(tail, -1, base, 0, self.sort_by) < 0:
+            return pd.concat(_unify_categories([tail, base]), ignore_index=True)
+
+        rows = pd.concat(_unify_categories([base, tail]), ignore_index=True)
+        return rows.sort_values(
+            [column for column, _ in self.sort_by],
+            ascending=[asc for _, asc in self.sort_by],
+            kind="stable",
+            ignore_index=True,
+        )
+
+    def first(self, client_id):
+        """Return the first row of a client as a Series, or ``None``."""
+        offsets = self._offsets.get(client_id)
+        if offsets is None:
+            return self.tail.first(client_id) if self.tail is not None else None
+        if self.sort_by and self.tail is not None and client_id in self.tail:
+            return self.rows(client_id).iloc[0]
+        return self.frame.iloc[offsets[0]]
@@ -0,0 +1,183 @@
+"""Percentile of a client's credit metrics within cohorts of similar clients."""
+import copy
+
+import numpy as np
+import pandas as pd
+
+# Columns grouping clients into cohorts, and the table each comes from
+COHORT_DIMENSIONS = {
+    "ciudad": "clientes",
+    "estrato_socioeconomico": "clientes",
+    "categoria_riesgo": "scoring",
+}
+COHORT_METRICS = ("puntaje_credito", "ratio_deuda_ingreso", "utilizacion_credito_promedio")
+
+
+def _first_per_client(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    df = df[columns]
+    return df[~df["id_cliente"].duplicated()]
+
+
+def dimension_columns(table: str) -> list:
+    """Return the cohort dimensions read from ``table``."""
+    return [dimension for dimension, source in COHORT_DIMENSIONS.items() if source == table]
+
+
+def _scores(scoring: pd.DataFrame) -> pd.DataFrame:
+    return _first_per_client(scoring, ["id_cliente", *dimension_columns("scoring"), *COHORT_METRICS])
+
+
+def _peers(perfil: pd.DataFrame, scores: pd.DataFrame, previous: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    One row per scored client, indexed by ``id_cliente``: cohort keys as objects, metrics as floats.
+
+    ``previous``, peers over the same clients in the same order, lends its
+    index and ``clientes`` columns instead of joining ``perfil`` again.
+    """
+    if previous is None:
+        merged = scores.merge(perfil, on="id_cliente", how="left")
+        columns = {d: merged[d].to_numpy(dtype=object, na_value=None) for d in dimension_columns("clientes")}
+        index = pd.Index(merged["id_cliente"].to_numpy(dtype=object), name="id_cliente")
+    else:
+        merged = scores
+        columns = {d: previous[d].to_numpy() for d in dimension_columns("clientes")}
+        index = previous.index
+    columns.update({d: merged[d].to_numpy(dtype=object, na_value=None) for d in dimension_columns("scoring")})
+    columns.update({
+        metric: merged[metric].to_numpy(dtype="float64", na_value=np.nan) for metric in COHORT_METRICS
+    })
+    return pd.DataFrame(columns, index=index)[[*COHORT_DIMENSIONS, *COHORT_METRICS]]
+
+
+def _sorted_cohorts(peers: pd.DataFrame, dimension: str, metric: str, cohorts=None) -> dict:
+    """Return ``{cohort: ascending metric values}``, restricted to ``cohorts`` if given."""
+    keys, values = peers[dimension], peers[metric]
+    valid = keys.notna() & values.notna()
+    if cohorts is not None:
+        valid &= keys.isin(cohorts)
+    groups = values[valid].groupby(keys[valid], sort=False)
+    return {cohort: np.sort(group.to_numpy()) for cohort, group in groups}
+
+
+def _replaced(values: np.ndarray, removed: np.ndarray, added: np.ndarray) -> np.ndarray:
+    """Return sorted ``values`` less one occurrence of each ``removed`` value, plus ``added``, still sorted."""
+    removed = np.sort(removed)
+    # The k-th copy of a repeated value sits k places after its first occurrence
+    repeat = np.arange(len(removed)) - np.searchsorted(removed, removed, side="left")
+    kept = np.delete(values, np.searchsorted(values, removed, side="left") + repeat)
+    added = np.sort(added)
+    return np.insert(kept, np.searchsorted(kept, added), added)
+
+
+def _updated_cohorts(cohorts: dict, old_keys, old_values, new_keys, new_values) -> dict:
+    """Move the changed clients' values from their old cohort arrays to their new ones."""
+    old_valid = pd.notna(old_keys) & ~np.isnan(old_values)
+    new_valid = pd.notna(new_keys) & ~np.isnan(new_values)
+    updated = dict(cohorts)
+    for cohort in set(old_keys[old_valid]) | set(new_keys[new_valid]):
+        values = _replaced(
+            cohorts.get(cohort, np.empty(0)),
+            old_values[old_valid & (old_keys == cohort)],
+            new_values[new_valid & (new_keys == cohort)],
+        )
+        if len(values):
+            updated[cohort] = values
+        else:
+            updated.pop(cohort, None)
+    return updated
+
+
+class CohortIndex:
+    """
+    Sorted metric values per cohort, for percentile lookups by binary search.
+
+    For every cohort dimension (``COHORT_DIMENSIONS``) and metric
+    (``COHORT_METRICS``), the metric values of each cohort's members are
+    sorted once per load. A client's percentile is then two ``searchsorted``
+    calls on its cohort's array, O(log n) in the cohort size, instead of a
+    groupby over the whole population.
+
+    When the scoring table changes, ``with_scores`` moves only the changed
+    clients' values between the cohort arrays, without sorting them again.
+
+    Args:
+        clientes (pd.DataFrame): Clients table (``ciudad``, ``estrato_socioeconomico``).
+        scoring (pd.DataFrame): Scoring table (``categoria_riesgo`` and the metrics).
+    """
+
+    def __init__(self, clientes: pd.DataFrame, scoring: pd.DataFrame):
+        self._perfil = _first_per_client(clientes, ["id_cliente", *dimension_columns("clientes")])
+        self.peers = _peers(self._perfil, _scores(scoring))
+        self._sorted = {
+            (dimension, metric): _sorted_cohorts(self.peers, dimension, metric)
+            for dimension in COHORT_DIMENSIONS for metric in COHORT_METRICS
+        }
+
+    def with_scores(self, scoring: pd.DataFrame) -> "CohortIndex":
+        """
+        Return an index over the new ``scoring`` table, updating only what changed.
+
+        When the same clients are scored, each changed client's old value is
+        removed from its cohort arrays and the new one inserted in place, so
+        no cohort is sorted again. If clients gained or lost a scoring row,
+        the index is rebuilt.
+        """
+        scores = _scores(scoring)
+        ids = scores["id_cliente"].to_numpy(dtype=object)
+        if len(ids) != len(self.peers) or not (ids == self.peers.index.to_numpy()).all():
+            return CohortIndex(self._perfil, scoring)
+
+        peers = _peers(self._perfil, scores, previous=self.peers)
+        changed = np.zeros(len(peers), dtype=bool)
+        for column in (*dimension_columns("scoring"), *COHORT_METRICS):
+            old, new = self.peers[column], peers[column]
+            changed |= ~((old == new) | (old.isna() & new.isna())).to_numpy()
+        rows = np.flatnonzero(changed)
+
+        new = copy.copy(self)
+        new.peers = peers
+        new._sorted = {}
+        for (dimension, metric), cohorts in self._sorted.items():
+            new._sorted[(dimension, metric)] = _updated_cohorts(
+                cohorts,
+                self.peers[dimension].to_numpy()[rows], self.peers[metric].to_numpy()[rows],
+                peers[dimension].to_numpy()[rows], peers[metric].to_numpy()[rows],
+            ) if len(rows) else cohorts
+        return new
+
+    def percentile(self, dimension: str, cohort, metric: str, value) -> tuple:
+        """
+        Return ``(percentile, peers)`` of ``value`` among the cohort's values of ``metric``.
+
+        The percentile is the share of peers below ``value``, counting ties
+        as half, from 0 to 100; ``None`` if the value or the cohort is missing.
+        """
+        values = self._sorted[(dimension, metric)].get(cohort)
+        if values is None or value is None or pd.isna(value):
+            return None, 0 if values is None else len(values)
+        below = int(np.searchsorted(values, value, side="left"))
+        up_to = int(np.searchsorted(values, value, side="right"))
+        return 100.0 * (below + (up_to - below) / 2) / len(values), len(values)
+
+    def compare(self, id_cliente) -> list:
+        """
+        Return one entry per cohort dimension with the client's percentile of each metric.
+
+        Entries are ``{"dimension", "cohort", "peers", <metric>: percentile}``
+        (``peers`` counted on ``puntaje_credito``); empty if the client has no
+        scoring row.
+        """
+        if id_cliente not in self.peers.index:
+            return []
+        row = self.peers.loc[id_cliente]
+        entries = []
+        for dimension in COHORT_DIMENSIONS:
+            cohort = row[dimension]
+            if cohort is None:
+                continue
+            entry = {"dimension": dimension, "cohort": cohort}
+            for metric in COHORT_METRICS:
+                entry[metric], peers = self.percentile(dimension, cohort, metric, row[metric])
+                entry.setdefault("peers", peers)
+            entries.append(entry)
+        return entries
@@ -0,0 +1,420 @@
+"""Columnar, memory-mapped copies of the financial CSV files."""
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+
+from services.financial_schema import (
+    SCHEMA_VERSION,
+    SORT_KEYS,
+    TABLE_FILES,
+    category_columns,
+    csv_types,
+    storage_schema,
+    timestamp_columns,
+)
+from settings import (
+    COLUMNAR_BLOCK_SIZE,
+    COLUMNAR_BUCKET_PREFIX,
+    COLUMNAR_DIR,
+    COLUMNAR_VERIFY_HASH,
+    DATA_DIR,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# One lock per (store, table): a page rerun, the sign-in prefetch and the
+# warm-up thread may all find the same table stale at once
+_convert_locks = {}
+_convert_locks_guard = threading.Lock()
+
+
+def _convert_lock(table: str, store_dir: str) -> threading.Lock:
+    key = (os.path.abspath(store_dir), table)
+    with _convert_locks_guard:
+        return _convert_locks.setdefault(key, threading.Lock())
+
+
+def _temp_path(path: str) -> str:
+    """Create an empty, uniquely named file next to ``path`` to be written and renamed over it."""
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=os.path.dirname(path))
+    os.close(fd)
+    return tmp_path
+
+
+def source_path(table: str, data_dir: str = DATA_DIR) -> str:
+    return os.path.join(data_dir, TABLE_FILES[table])
+
+
+def _store_paths(table: str, store_dir: str):
+    return os.path.join(store_dir, f"{table}.arrow"), os.path.join(store_dir, f"{table}.json")
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_fingerprint(path: str, with_hash: bool) -> dict:
+    stat = os.stat(path)
+    fingerprint = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    if with_hash:
+        fingerprint["sha256"] = _sha256(path)
+    return fingerprint
+
+
+def fingerprints(data_dir: str = DATA_DIR) -> dict:
+    """
+    Return a cheap ``(mtime_ns, size)`` fingerprint of every source CSV.
+
+    Raises:
+        FileNotFoundError: If a source file is missing.
+    """
+    stats = {t: os.stat(source_path(t, data_dir)) for t in TABLE_FILES}
+    return {t: (stat.st_mtime_ns, stat.st_size) for t, stat in stats.items()}
+
+
+def _complete_size(path: str, size: int) -> int:
+    """Return the length of the longest prefix of ``size`` bytes that ends with a newline."""
+    # Stop at the last newline so a row being appended concurrently is left for later
+    with open(path, "rb") as f:
+        end = size
+        while end > 0:
+            start = max(0, end - (1 << 16))
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline != -1:
+                return start + newline + 1
+            end = start
+    return 0
+
+
+class _BoundedReader(io.RawIOBase):
+    """Read-only view of the first ``limit`` bytes of a file."""
+
+    def __init__(self, path: str, limit: int):
+        self._file = open(path, "rb")
+        self._left = limit
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = min(len(buffer), self._left)
+        if n <= 0:
+            return 0
+        read = self._file.readinto(memoryview(buffer)[:n])
+        self._left -= read
+        return read
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def _convert_options(table: str) -> pv.ConvertOptions:
+    return pv.ConvertOptions(column_types=csv_types(table), strings_can_be_null=True)
+
+
+def _parse_timestamps(values: pa.ChunkedArray, arrow_type: pa.DataType) -> pa.ChunkedArray:
+    """
+    Parse timestamp text as ``arrow_type``.
+
+    ISO 8601 without an offset is cast directly. Anything else falls back to
+    pandas: fractional seconds are truncated, UTC offsets such as ``Z`` are
+    converted to UTC and slash-separated dates are read day first. Values
+    that still do not parse become nulls instead of failing the whole file.
+    """
+    try:
+        return pc.cast(values, arrow_type)
+    except pa.ArrowInvalid:
+        pass
+    parsed = pd.to_datetime(
+        pd.Series(values.to_numpy(zero_copy_only=False), dtype=object),
+        format="mixed", dayfirst=True, utc=True, errors="coerce",
+    ).dt.tz_localize(None).dt.floor("s")
+    unparsed = int(parsed.isna().sum()) - values.null_count
+    if unparsed:
+        logger.warning("%d timestamps could not be parsed and were left empty", unparsed)
+    return pa.chunked_array([pa.array(parsed, type=arrow_type, from_pandas=True)])
+
+
+def _to_storage(table: str, data: pa.Table, schema: pa.Schema) -> pa.Table:
+    """Cast CSV-parsed ``data`` to the storage ``schema``."""
+    for column in timestamp_columns(table):
+        if column in data.column_names:
+            i = data.schema.get_field_index(column)
+            data = data.set_column(i, column, _parse_timestamps(data[column], schema.field(column).type))
+    return data.cast(schema)
+
+
+def iter_csv_batches(table: str, path: str, limit: int, block_size: int = COLUMNAR_BLOCK_SIZE):
+    """
+    Stream the first ``limit`` bytes of a CSV as Arrow tables of about ``block_size`` bytes.
+
+    Declared columns are narrowed to their storage types; memory use is
+    bounded by the block size, not by the file size.
+
+    Returns:
+        tuple[pa.Schema, Iterator[pa.Table]]
+    """
+    reader = pv.open_csv(
+        pa.PythonFile(_BoundedReader(path, limit), mode="r"),
+        read_options=pv.ReadOptions(block_size=block_size),
+        convert_options=_convert_options(table),
+    )
+    schema = storage_schema(table, reader.schema)
+    return schema, (_to_storage(table, pa.Table.from_batches([batch]), schema) for batch in reader)
+
+
+def parse_rows(table: str, raw: bytes, column_names: list) -> pd.DataFrame:
+    """Parse headerless CSV rows of a table into a frame typed like ``load_frame``."""
+    data = pv.read_csv(
+        pa.BufferReader(raw),
+        read_options=pv.ReadOptions(column_names=column_names),
+        convert_options=_convert_options(table),
+    )
+    return to_frame(table, _to_storage(table, data, storage_schema(table, data.schema)))
+
+
+def _bucket_of(ids: pa.ChunkedArray, prefix_chars: int):
+    """Return ``(prefixes, codes)``: the distinct id prefixes and each row's index into them."""
+    encoded = pc.utf8_slice_codeunits(ids, 0, prefix_chars).combine_chunks().dictionary_encode()
+    codes = encoded.indices.fill_null(-1).to_numpy(zero_copy_only=False)
+    return encoded.dictionary.to_pylist(), codes
+
+
+def _write_sorted(table: str, schema: pa.Schema, batches, arrow_path: str, prefix_chars: int) -> int:
+    """
+    Write ``batches`` to ``arrow_path`` ordered by ``SORT_KEYS`` with bounded memory.
+
+    Rows are first range-partitioned into spill files by the leading
+    characters of ``id_cliente``; since every id in one bucket sorts before
+    every id of the next, sorting the buckets one at a time and writing them
+    in prefix order yields a globally sorted file.
+    """
+    spill_dir = tempfile.mkdtemp(prefix=f"{table}-", dir=os.path.dirname(arrow_path))
+    spills = {}
+    try:
+        for data in batches:
+            prefixes, codes = _bucket_of(data["id_cliente"], prefix_chars)
+            order = np.argsort(codes, kind="stable")
+            bounds = np.flatnonzero(np.diff(codes[order])) + 1
+            for segment in np.split(order, bounds):
+                if not len(segment):
+                    continue
+                code = codes[segment[0]]
+                prefix = prefixes[code] if code >= 0 else None
+                if prefix not in spills:
+                    path = os.path.join(spill_dir, f"{len(spills)}.arrows")
+                    sink = pa.OSFile(path, "wb")
+                    spills[prefix] = (path, sink, pa.ipc.new_stream(sink, schema))
+                spills[prefix][2].write_table(data.take(segment))
+
+        for _, sink, writer in spills.values():
+            writer.close()
+            sink.close()
+
+        rows = 0
+        # Null ids go last, as in an Arrow sort
+        ordered = sorted(p for p in spills if p is not None) + ([None] if None in spills else [])
+        with pa.OSFile(arrow_path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            for prefix in ordered:
+                path = spills[prefix][0]
+                bucket = pa.ipc.open_stream(pa.memory_map(path, "r")).read_all()
+                writer.write_table(bucket.sort_by(SORT_KEYS[table]))
+                rows += bucket.num_rows
+                os.remove(path)
+        return rows
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+
+def _write_manifest(manifest_path: str, manifest: dict):
+    # Unique temporary names: other threads and server processes may convert at once
+    tmp_path = _temp_path(manifest_path)
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def is_stale(table: str, data_dir: str = DATA_DIR, store_dir: str = COLUMNAR_DIR,
+             verify_hash: bool = COLUMNAR_VERIFY_HASH) -> bool:
+    """
+    Tell whether the columnar copy of a table is missing or out of date.
+
+    The source's mtime and size are compared first; with ``verify_hash`` a
+    touched-but-unchanged source is recognised by its SHA-256 and not reconverted.
+    """
+    arrow_path, manifest_path = _store_paths(table, store_dir)
+    if not (os.path.exists(arrow_path) and os.path.exists(manifest_path)):
+        return True
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("schema_version") != SCHEMA_VERSION:
+        return True
+    recorded = manifest["source"]
+    current = _source_fingerprint(source_path(table, data_dir), with_hash=False)
+    if (current["mtime_ns"], current["size"]) == (recorded["mtime_ns"], recorded["size"]):
+        return False
+    if not (verify_hash and recorded.get("sha256") and current["size"] == recorded["size"]):
+        return True
+
+    current["sha256"] = _sha256(source_path(table, data_dir))
+    if current["sha256"] != recorded["sha256"]:
+        return True
+    # Touched but unchanged: remember the new mtime so the hash is not recomputed
+    _write_manifest(manifest_path, {**manifest, "source": current})
+    return False
+
+
+def convert(table: str, data_dir: str = DATA_DIR, store_dir: str = COLUMNAR_DIR,
+            block_size: int = COLUMNAR_BLOCK_SIZE, prefix_chars: int = COLUMNAR_BUCKET_PREFIX) -> str:
+    """
+    Convert one CSV to an uncompressed Arrow IPC file sorted by client.
+
+    The CSV is streamed in blocks and sorted bucket by bucket, so files
+    larger than RAM can be converted. The file is written next to its
+    manifest and swapped in atomically.
+
+    Returns:
+        str: Path of the Arrow file.
+    """
+    source = source_path(table, data_dir)
+    arrow_path, manifest_path = _store_paths(table, store_dir)
+    os.makedirs(store_dir, exist_ok=True)
+
+    source_fingerprint = _source_fingerprint(source, with_hash=COLUMNAR_VERIFY_HASH)
+    # The manifest's offset is the byte position already ingested
+    source_fingerprint["offset"] = _complete_size(source, source_fingerprint["size"])
+
+    schema, batches = iter_csv_batches(table, source, source_fingerprint["offset"], block_size)
+    tmp_path = _temp_path(arrow_path)
+    try:
+        rows = _write_sorted(table, schema, batches, tmp_path, prefix_chars)
+        os.replace(tmp_path, arrow_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    _write_manifest(manifest_path, {
+        "source": source_fingerprint,
+        "rows": rows,
+        "schema_version": SCHEMA_VERSION,
+    })
+    return arrow_path
+
+
+def ingested_offset(table: str, store_dir: str = COLUMNAR_DIR) -> int:
+    """Return the byte offset of the source CSV covered by the columnar copy."""
+    _, manifest_path = _store_paths(table, store_dir)
+    with open(manifest_path) as f:
+        source = json.load(f)["source"]
+    return source.get("offset", source["size"])
+
+
+def refresh(table: str, data_dir: str = DATA_DIR, store_dir: str = COLUMNAR_DIR) -> bool:
+    """
+    Convert a table if its columnar copy is stale; threads of the process convert it once.
+
+    Returns:
+        bool: Whether the table was converted.
+    """
+    with _convert_lock(table, store_dir):
+        if not is_stale(table, data_dir, store_dir):
+            return False
+        convert(table, data_dir, store_dir)
+        return True
+
+
+def open_table(table: str, data_dir: str = DATA_DIR, store_dir: str = COLUMNAR_DIR) -> pa.Table:
+    """Memory-map the columnar copy of a table, converting it first if stale."""
+    refresh(table, data_dir, store_dir)
+    arrow_path, _ = _store_paths(table, store_dir)
+    return pa.ipc.open_file(pa.memory_map(arrow_path, "r")).read_all()
+
+
+def _pandas_type(arrow_type):
+    # Dictionary columns fall back to pandas' own conversion, i.e. Categorical
+    return None if pa.types.is_dictionary(arrow_type) else pd.ArrowDtype(arrow_type)
+
+
+def to_frame(table: str, data: pa.Table) -> pd.DataFrame:
+    """
+    Convert an Arrow table in storage layout to the in-memory DataFrame layout.
+
+    Columns keep their Arrow buffers through ``pd.ArrowDtype`` (no copy), except
+    the declared categories, which become pandas Categoricals.
+    """
+    for column in category_columns(table):
+        if column in data.column_names:
+            position = data.column_names.index(column)
+            data = data.set_column(position, column, data[column].dictionary_encode())
+    return data.to_pandas(types_mapper=_pandas_type)
+
+
+def load_frame(table: str, columns=None, data_dir: str = DATA_DIR, store_dir: str = COLUMNAR_DIR) -> pd.DataFrame:
+    """
+    Return a table as a DataFrame backed by the memory-mapped Arrow buffers.
+
+    Non-categorical columns are not copied; pages of a column are only read
+    from disk once the column is actually touched.
+
+    Args:
+        columns (list[str]): Restrict the frame to these columns.
+    """
+    data = open_table(table, data_dir, store_dir)
+    if columns is not None:
+        data = data.select([c for c in columns if c in data.column_names])
+    return to_frame(table, data)
+
+
+def load_all(columns=None, data_dir: str = DATA_DIR, store_dir: str = COLUMNAR_DIR) -> dict:
+    """
+    Load the four tables, keyed like ``TABLE_FILES``.
+
+    Args:
+        columns (dict[str, list[str]]): Optional column selection per table.
+    """
+    columns = columns or {}
+    return {t: load_frame(t, columns.get(t), data_dir, store_dir) for t in TABLE_FILES}
+
+
+def main():
+    """Convert every stale CSV; ``python -m services.columnar_store [--force]``."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert the financial CSVs to Arrow files.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--store-dir", default=COLUMNAR_DIR)
+    parser.add_argument("--force", action="store_true", help="Reconvert even if up to date")
+    args = parser.parse_args()
+
+    for table in TABLE_FILES:
+        if args.force or is_stale(table, args.data_dir, args.store_dir):
+            print(f"{table}: {convert(table, args.data_dir, args.store_dir)}")
+        else:
+            print(f"{table}: up to date")
+
+
+if __name__ == "__main__":
+    main()
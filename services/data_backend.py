@@ -0,0 +1,75 @@
+"""Interface between the Equipo B dashboard and the store holding the financial data."""
+import abc
+
+import pandas as pd
+
+# Movement columns the dashboard filters by value
+FILTER_COLUMNS = ("tipo_operacion", "entidad_financiera", "categoria_gasto", "canal_transaccion")
+# Filtered by a (desde, hasta) pair of dates instead of a list of values
+DATE_FILTER = "fecha_registro"
+
+
+def date_bounds(desde=None, hasta=None) -> tuple:
+    """Return ``[start, stop)`` timestamps covering the days ``desde`` to ``hasta``; ``None`` is open."""
+    start = pd.Timestamp(desde).normalize() if desde is not None else None
+    stop = pd.Timestamp(hasta).normalize() + pd.Timedelta(days=1) if hasta is not None else None
+    return start, stop
+
+
+class FinancialBackend(abc.ABC):
+    """
+    Per-client queries the dashboard makes.
+
+    Implementations: ``FinancialDataset`` (the four tables in memory, over
+    the memory-mapped columnar copy) and ``SqliteDataset`` (an indexed
+    SQLite file queried per call). Movement queries take ``filtros``, a
+    mapping of column to the allowed values (e.g. ``{"tipo_operacion":
+    ["Debito"]}``), except ``fecha_registro``, which takes a ``(desde,
+    hasta)`` pair of dates, both days included and ``None`` for an open end.
+    ``None`` or a missing column means no restriction. Movements are always
+    returned newest first.
+    """
+
+    @abc.abstractmethod
+    def cliente(self, id_cliente):
+        """Return the client row as a Series, or ``None`` if unknown."""
+
+    @abc.abstractmethod
+    def cuentas_cliente(self, id_cliente):
+        """Return the client's debit accounts as a DataFrame."""
+
+    @abc.abstractmethod
+    def scoring_cliente(self, id_cliente):
+        """Return the scoring row as a Series, or ``None`` if the client has none."""
+
+    @abc.abstractmethod
+    def agregados_cliente(self, id_cliente) -> dict:
+        """Return the PREMIUM analytics of a client (see ``ClientAggregates.lookup``)."""
+
+    @abc.abstractmethod
+    def tendencia_mensual(self, id_cliente) -> dict:
+        """Return the client's month-by-month totals, spend and balances (see ``monthly_view``)."""
+
+    @abc.abstractmethod
+    def cohortes_cliente(self, id_cliente) -> list:
+        """Return the client's credit percentiles within each of its cohorts (see ``CohortIndex.compare``)."""
+
+    @abc.abstractmethod
+    def historial_cliente(self, id_cliente):
+        """Return every movement of the client as a DataFrame."""
+
+    @abc.abstractmethod
+    def valores_historial(self, id_cliente, columna: str) -> list:
+        """Return the distinct non-null values of ``columna`` in the client's movements."""
+
+    @abc.abstractmethod
+    def rango_fechas(self, id_cliente) -> tuple:
+        """Return the ``(oldest, newest)`` movement timestamps, or ``(None, None)`` if there are none."""
+
+    @abc.abstractmethod
+    def contar_movimientos(self, id_cliente, filtros: dict = None) -> int:
+        """Return how many of the client's movements pass ``filtros``."""
+
+    @abc.abstractmethod
+    def movimientos(self, id_cliente, inicio: int, limite: int, filtros: dict = None):
+        """Return ``limite`` movements passing ``filtros`` from position ``inicio``, as a DataFrame."""
@@ -0,0 +1,322 @@
+"""Process-wide, read-only financial dataset shared by every session."""
+import logging
+import os
+import resource
+import threading
+import time
+
+import pyarrow as pa
+
+from services import columnar_store
+from services.financial_data import FinancialDataset
+from services.history_ingester import HistoryIngester
+from settings import (
+    COLUMNAR_DIR,
+    DATA_BACKEND,
+    DATA_DIR,
+    DATASET_CHECK_INTERVAL,
+    HISTORY_TAIL_INTERVAL,
+    SNAPSHOT_DIR,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def resident_memory_bytes() -> int:
+    """Return the current resident set size of the process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # Peak RSS is the best portable approximation (KB on Linux, bytes on macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class DatasetService:
+    """
+    Owns the single in-memory ``FinancialDataset`` of the process.
+
+    Every caller receives the same dataset object; the per-client frames it
+    hands out are positional slices over Arrow-backed columns, so they are
+    zero-copy and cannot modify the shared buffers.
+
+    When the source CSVs change, a new dataset is built on the side and the
+    reference is swapped under a lock. Readers still holding the previous
+    dataset keep a consistent view until they drop it. If only
+    ``historial_alertas.csv`` grew, just the appended rows are parsed and
+    merged (see ``HistoryIngester``) instead of reloading everything; if only
+    ``scoring_crediticio.csv`` changed, just that table and the cohorts it
+    affects are rebuilt.
+
+    With ``snapshots``, the dataset is not built per process: it is attached
+    from the host's current snapshot (see ``SnapshotStore``), and built and
+    published only when no snapshot matches the sources. Movements appended
+    since the snapshot are still ingested per process; any other change
+    publishes a new snapshot, and every process swaps to the version named
+    by ``CURRENT`` on its next refresh.
+
+    Sources that fail to parse (e.g. a malformed row) are logged and the
+    current dataset is kept; they are not parsed again until they change.
+    """
+
+    def __init__(self, data_dir: str = DATA_DIR, store_dir: str = COLUMNAR_DIR, snapshots=None,
+                 check_interval: float = DATASET_CHECK_INTERVAL):
+        self.data_dir = data_dir
+        self.store_dir = store_dir
+        self.snapshots = snapshots
+        self.check_interval = check_interval
+        self._checked_at = float("-inf")
+        self.snapshot_version = None
+        self._lock = threading.Lock()
+        self._dataset = None
+        self._fingerprints = None
+        # Sources that last failed to parse
+        self._rejected = None
+        self._ingester = None
+        self._tailing = None
+        self.version = 0
+        self.loaded_at = None
+        self.handouts = 0
+
+    def get(self) -> FinancialDataset:
+        """
+        Return the current dataset, loading it on first use.
+
+        Once loaded, changes to the sources are picked up by the polling
+        thread (see ``start_tailing``) or, without one, checked here at most
+        every ``check_interval`` seconds, so reruns do not stat the sources.
+
+        Raises:
+            FileNotFoundError: If a source CSV is missing.
+        """
+        if self._dataset is None or (
+            self._tailing is None and time.monotonic() - self._checked_at >= self.check_interval
+        ):
+            self.refresh()
+        self.handouts += 1
+        return self._dataset
+
+    def refresh(self):
+        """Bring the dataset up to date with the source CSVs; a source that fails to parse is skipped."""
+        self._checked_at = time.monotonic()
+        current = columnar_store.fingerprints(self.data_dir)
+        if self._dataset is None:
+            self.reload(current)
+            return
+        moved = self._snapshot_moved()
+        if not moved and current in (self._fingerprints, self._rejected):
+            return
+        try:
+            self._update(current, moved)
+        except pa.ArrowInvalid as exc:
+            self._rejected = current
+            logger.error("Sources not loaded, keeping dataset version %d: %s", self.version, exc)
+
+    def _update(self, current: dict, moved: bool):
+        if moved:
+            self.reload(current)
+            return
+        changed = {t for t in current if current[t] != self._fingerprints[t]}
+        if changed == {"historial"}:
+            try:
+                self.ingest(current)
+                return
+            except pa.ArrowInvalid:
+                raise
+            except ValueError:
+                # historial was rewritten rather than appended to
+                pass
+        if changed == {"scoring"} and self.snapshots is None:
+            self.rescore(current)
+            return
+        self.reload(current)
+
+    def reload(self, fingerprints=None, force: bool = False):
+        """
+        Build a fresh dataset and swap it in; concurrent callers wait for one load.
+
+        With snapshots, attach the current one instead if it matches the
+        sources; ``force`` publishes a new one.
+        """
+        fingerprints = fingerprints or columnar_store.fingerprints(self.data_dir)
+        with self._lock:
+            if (not force and self._dataset is not None and fingerprints == self._fingerprints
+                    and not self._snapshot_moved()):
+                return
+            if self.snapshots is None:
+                dataset, offset = self._build()
+            else:
+                dataset, offset = self._attach(fingerprints, force)
+            ingester = HistoryIngester(
+                columnar_store.source_path("historial", self.data_dir),
+                offset,
+                list(dataset.historial.frame.columns),
+            )
+            if self.snapshots is not None:
+                # Movements appended since the snapshot was published
+                rows = ingester.poll()
+                if rows is not None and len(rows):
+                    dataset = dataset.with_history(rows)
+            self._ingester = ingester
+            self._dataset, self._fingerprints = dataset, fingerprints
+            self.version += 1
+            self.loaded_at = time.time()
+
+    def _build(self) -> tuple:
+        """Load the tables and build the dataset; return it with the ingested ``historial`` offset."""
+        tables = columnar_store.load_all(data_dir=self.data_dir, store_dir=self.store_dir)
+        return (
+            FinancialDataset.from_frames(**tables),
+            columnar_store.ingested_offset("historial", self.store_dir),
+        )
+
+    def _matches(self, version, fingerprints: dict) -> bool:
+        """Tell whether snapshot ``version`` was built from the current sources, bar appended movements."""
+        if version is None:
+            return False
+        manifest = self.snapshots.manifest(version)
+        historial_size = os.path.getsize(columnar_store.source_path("historial", self.data_dir))
+        return (
+            manifest.get("layout") == self.snapshots.layout
+            and all(
+                tuple(manifest["fingerprints"][table]) == tuple(fingerprint)
+                for table, fingerprint in fingerprints.items() if table != "historial"
+            )
+            and manifest["historial_offset"] <= historial_size
+        )
+
+    def _attach(self, fingerprints: dict, force: bool) -> tuple:
+        """Attach the snapshot of the sources, publishing it first if no process did."""
+        version = self.snapshots.current()
+        if force or not self._matches(version, fingerprints):
+            with self.snapshots.publishing():
+                current = self.snapshots.current()
+                # Another process may have published it while this one waited for the lock
+                if current == version or not self._matches(current, fingerprints):
+                    dataset, offset = self._build()
+                    current = self.snapshots.publish(dataset, fingerprints=fingerprints, historial_offset=offset)
+                version = current
+        self.snapshot_version = version
+        return self.snapshots.attach(version), self.snapshots.manifest(version)["historial_offset"]
+
+    def _snapshot_moved(self) -> bool:
+        """Tell whether another process published a snapshot since this one attached."""
+        return self.snapshots is not None and self.snapshots.current() != self.snapshot_version
+
+    def ingest(self, fingerprints=None) -> int:
+        """
+        Merge rows appended to ``historial_alertas.csv`` into the dataset.
+
+        Returns:
+            int: Number of new rows.
+
+        Raises:
+            ValueError: If the file shrank and must be reloaded in full.
+        """
+        with self._lock:
+            fingerprints = fingerprints or columnar_store.fingerprints(self.data_dir)
+            rows = self._ingester.poll()
+            if rows is not None and len(rows):
+                self._dataset = self._dataset.with_history(rows)
+                self.version += 1
+            self._fingerprints = {**self._fingerprints, "historial": fingerprints["historial"]}
+            return 0 if rows is None else len(rows)
+
+    def rescore(self, fingerprints=None):
+        """Swap in a rewritten ``scoring_crediticio.csv`` without reloading the other tables."""
+        with self._lock:
+            fingerprints = fingerprints or columnar_store.fingerprints(self.data_dir)
+            scoring = columnar_store.load_frame("scoring", data_dir=self.data_dir, store_dir=self.store_dir)
+            self._dataset = self._dataset.with_scoring(scoring)
+            self._fingerprints = {**self._fingerprints, "scoring": fingerprints["scoring"]}
+            self.version += 1
+
+    def start_tailing(self, interval: float):
+        """Poll the sources every ``interval`` seconds from a daemon thread."""
+        if self._tailing is not None or interval <= 0:
+            return
+
+        def tail():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except OSError:
+                    # Source temporarily missing (e.g. being replaced); retry next tick
+                    pass
+                except Exception:
+                    # Keep polling: the next change to the sources may fix it
+                    logger.exception("Refreshing the dataset failed; retrying in %ss", interval)
+
+        self._tailing = threading.Thread(target=tail, name="history-tail", daemon=True)
+        self._tailing.start()
+
+    def memory_report(self) -> dict:
+        """
+        Report process memory next to the size of the shared dataset.
+
+        ``dataset_bytes`` counts the Arrow buffers once, however many sessions
+        hold views on them; most of it is file-backed and shared with the page
+        cache rather than anonymous memory.
+        """
+        dataset = self._dataset
+        dataset_bytes = 0
+        if dataset is not None:
+            for index in (dataset.clientes, dataset.cuentas, dataset.historial, dataset.scoring):
+                while index is not None:
+                    dataset_bytes += int(index.frame.memory_usage(index=False, deep=False).sum())
+                    index = index.tail
+        return {
+            "pid": os.getpid(),
+            "rss_bytes": resident_memory_bytes(),
+            "dataset_bytes": dataset_bytes,
+            "dataset_version": self.version,
+            "loaded_at": self.loaded_at,
+            "handouts": self.handouts,
+            "history_rows_ingested": self._ingester.rows_ingested if self._ingester else 0,
+            "snapshot_version": self.snapshot_version,
+        }
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def create(backend: str = DATA_BACKEND):
+    """
+    Return a new service for ``backend``; its ``get()`` returns a ``FinancialBackend``.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if backend == "columnar":
+        if SNAPSHOT_DIR:
+            from services.shared_snapshot import SnapshotStore
+
+            return DatasetService(snapshots=SnapshotStore())
+        return DatasetService()
+    if backend == "sqlite":
+        from services.sqlite_store import SqliteService
+
+        return SqliteService()
+    raise ValueError(f"Unknown DATA_BACKEND {backend!r}; expected 'columnar' or 'sqlite'")
+
+
+def shared():
+    """
+    Return the process-wide service of ``DATA_BACKEND``, creating it on first use.
+
+    The dashboard page and the sign-in prefetch both go through here, so the
+    dataset is loaded once per process whichever of them asks first. Rows
+    appended to ``historial_alertas.csv`` are picked up every
+    ``HISTORY_TAIL_INTERVAL`` seconds by the columnar backend.
+    """
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                service = create()
+                service.start_tailing(HISTORY_TAIL_INTERVAL)
+                _shared = service
+    return _shared
@@ -0,0 +1,144 @@
+"""Expiring cache in an SQLite file, shared by the server processes of a host."""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+
+def _digest(key) -> str:
+    # Keys are access tokens: only their hash is written to disk
+    return hashlib.sha256(str(key).encode()).hexdigest()
+
+
+class DiskCache:
+    """
+    Cache of JSON values with per-entry expiry, in an SQLite file every process of the host opens.
+
+    It sits behind a process's ``TTLCache``: a reply fetched by one server
+    process is found by the others instead of going upstream again, and
+    survives a process restart. The database runs in WAL mode, so readers
+    do not block the occasional writer. Keys are stored hashed and the file
+    is created readable by its owner only. Any SQLite error is logged and
+    treated as a miss: the cache never fails a request.
+
+    Args:
+        path (str): Database file, created if missing.
+        maxsize (int): Maximum number of entries; those expiring first are evicted.
+        ttl (float): Default time to live in seconds.
+    """
+
+    def __init__(self, path: str, maxsize: int, ttl: float, clock=time.time):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._conn = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            os.close(os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600))
+            conn = sqlite3.connect(self.path, timeout=1.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get_entry(self, key):
+        """Return ``(value, expires_at)`` for a live ``key``, or ``None``."""
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT value, expires_at FROM entries WHERE key = ? AND expires_at > ?",
+                    (_digest(key), self._clock()),
+                ).fetchone()
+        except sqlite3.Error as exc:
+            self.errors += 1
+            logger.warning("Shared cache %s unreadable: %s", self.path, exc)
+            return None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0]), row[1]
+
+    def get(self, key, default=None):
+        """Return the live value for ``key`` or ``default``."""
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key, value, expires_at: float = None):
+        """
+        Store ``value`` until ``expires_at`` or the default TTL, whichever comes first.
+
+        Expired entries, and those beyond ``maxsize`` expiring first, are
+        dropped in the same transaction.
+        """
+        now = self._clock()
+        deadline = now + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.execute(
+                        "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+                        (_digest(key), json.dumps(value), deadline),
+                    )
+                    conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+                    conn.execute(
+                        "DELETE FROM entries WHERE key IN ("
+                        "SELECT key FROM entries ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                        (self.maxsize,),
+                    )
+        except sqlite3.Error as exc:
+            self.errors += 1
+            logger.warning("Shared cache %s not written: %s", self.path, exc)
+
+    def invalidate(self, key):
+        try:
+            with self._lock:
+                self._connection().execute("DELETE FROM entries WHERE key = ?", (_digest(key),))
+        except sqlite3.Error as exc:
+            self.errors += 1
+            logger.warning("Shared cache %s not updated: %s", self.path, exc)
+
+    def stats(self) -> dict:
+        """Return this process's hit/miss/error counters and the entries in the file."""
+        try:
+            with self._lock:
+                size = self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        except sqlite3.Error:
+            size = 0
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": size,
+            "maxsize": self.maxsize,
+        }
@@ -0,0 +1,135 @@
+"""In-memory financial dataset backing the Equipo B dashboard."""
+from dataclasses import dataclass, field, replace
+
+import pandas as pd
+
+from services.client_aggregates import ClientAggregates
+from services.client_index import ClientIndex
+from services.cohort_index import CohortIndex
+from services.data_backend import FinancialBackend
+from services.monthly_rollups import MonthlyRollups
+from services.movement_filter import MovementFilter
+from settings import MONTHLY_VIEW_CACHE, MOVEMENT_FILTER_CLIENTS, MOVEMENT_FILTER_RESULTS
+
+
+# Each client's movements, newest first
+HISTORIAL_ORDER = [("fecha_registro", False)]
+
+
+@dataclass(frozen=True)
+class FinancialDataset(FinancialBackend):
+    """The four financial tables, each indexed by ``id_cliente``, plus derived aggregates, rollups and cohorts."""
+
+    clientes: ClientIndex
+    cuentas: ClientIndex
+    historial: ClientIndex
+    scoring: ClientIndex
+    agregados: ClientAggregates
+    mensual: MonthlyRollups
+    cohortes: CohortIndex
+    # Rebuilt with every dataset, so appended movements are never served from a stale filter result
+    filtro: MovementFilter = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(
+            self, "filtro", MovementFilter(self.historial_cliente, MOVEMENT_FILTER_CLIENTS, MOVEMENT_FILTER_RESULTS),
+        )
+
+    @classmethod
+    def from_frames(cls, clientes: pd.DataFrame, cuentas: pd.DataFrame,
+                    historial: pd.DataFrame, scoring: pd.DataFrame) -> "FinancialDataset":
+        """Build the per-client indexes and aggregates once per load."""
+        return cls(
+            clientes=ClientIndex(clientes),
+            cuentas=ClientIndex(cuentas),
+            historial=ClientIndex(historial, sort_by=HISTORIAL_ORDER),
+            scoring=ClientIndex(scoring),
+            agregados=ClientAggregates(clientes, cuentas, historial),
+            mensual=MonthlyRollups(historial, MONTHLY_VIEW_CACHE),
+            cohortes=CohortIndex(clientes, scoring),
+        )
+
+    def state(self) -> dict:
+        """
+        Return the indexes and derived tables as nested dicts of frames (see ``shared_snapshot``).
+
+        Cohorts are left out: they are rebuilt from the client and scoring
+        tables by ``from_state`` in a few milliseconds.
+
+        Raises:
+            ValueError: If rows were appended since the load.
+        """
+        return {
+            "clientes": self.clientes.state(),
+            "cuentas": self.cuentas.state(),
+            "historial": self.historial.state(),
+            "scoring": self.scoring.state(),
+            "agregados": self.agregados.state(),
+            "mensual": self.mensual.state(),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "FinancialDataset":
+        """Rebuild a dataset from ``state()`` frames, without sorting, grouping or rolling up."""
+        clientes = ClientIndex.from_state(state["clientes"])
+        scoring = ClientIndex.from_state(state["scoring"])
+        return cls(
+            clientes=clientes,
+            cuentas=ClientIndex.from_state(state["cuentas"]),
+            historial=ClientIndex.from_state(state["historial"], sort_by=HISTORIAL_ORDER),
+            scoring=scoring,
+            agregados=ClientAggregates.from_state(state["agregados"]),
+            mensual=MonthlyRollups.from_state(state["mensual"], MONTHLY_VIEW_CACHE),
+            cohortes=CohortIndex(clientes.frame, scoring.frame),
+        )
+
+    def with_history(self, rows: pd.DataFrame) -> "FinancialDataset":
+        """Return a dataset with ``rows`` appended to the movement history."""
+        return replace(
+            self,
+            historial=self.historial.appended(rows),
+            agregados=self.agregados.with_movements(rows),
+            mensual=self.mensual.with_movements(rows),
+        )
+
+    def with_scoring(self, scoring: pd.DataFrame) -> "FinancialDataset":
+        """Return a dataset with a new scoring table; only the cohorts it changes are rebuilt."""
+        return replace(self, scoring=ClientIndex(scoring), cohortes=self.cohortes.with_scores(scoring))
+
+    def cliente(self, id_cliente):
+        """Return the client row as a Series, or ``None`` if unknown."""
+        return self.clientes.first(id_cliente)
+
+    def cuentas_cliente(self, id_cliente) -> pd.DataFrame:
+        return self.cuentas.rows(id_cliente)
+
+    def historial_cliente(self, id_cliente) -> pd.DataFrame:
+        """Return the client's movements, newest first."""
+        return self.historial.rows(id_cliente)
+
+    def agregados_cliente(self, id_cliente) -> dict:
+        """Return the precomputed analytics of a client (see ``ClientAggregates.lookup``)."""
+        return self.agregados.lookup(id_cliente)
+
+    def scoring_cliente(self, id_cliente):
+        """Return the scoring row as a Series, or ``None`` if the client has none."""
+        return self.scoring.first(id_cliente)
+
+    def tendencia_mensual(self, id_cliente) -> dict:
+        return self.mensual.lookup(id_cliente)
+
+    def cohortes_cliente(self, id_cliente) -> list:
+        return self.cohortes.compare(id_cliente)
+
+    def valores_historial(self, id_cliente, columna: str) -> list:
+        """Return the distinct values of ``columna``, in order of the client's latest movement."""
+        return self.filtro.encoded(id_cliente).values(columna)
+
+    def rango_fechas(self, id_cliente) -> tuple:
+        return self.filtro.encoded(id_cliente).date_range()
+
+    def contar_movimientos(self, id_cliente, filtros: dict = None) -> int:
+        return self.filtro.count(id_cliente, filtros)
+
+    def movimientos(self, id_cliente, inicio: int, limite: int, filtros: dict = None) -> pd.DataFrame:
+        return self.filtro.rows(id_cliente, inicio, limite, filtros)
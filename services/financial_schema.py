@@ -0,0 +1,138 @@
+"""Declared schema of the four financial tables."""
+import pyarrow as pa
+
+
+# Bump when the on-disk layout produced from SCHEMAS/SORT_KEYS changes.
+SCHEMA_VERSION = 2
+
+# Source file of each table, relative to DATA_DIR.
+TABLE_FILES = {
+    "clientes": "clientes.csv",
+    "cuentas": "cuentas_debito.csv",
+    "historial": "historial_alertas.csv",
+    "scoring": "scoring_crediticio.csv",
+}
+
+# Explicit column types; columns not listed here are inferred.
+#   category  low-cardinality text, a pandas Categorical in memory
+#   int*      whole numbers, narrowed to the smallest type that fits the domain
+#   float32   ratios and percentages; amounts of money stay float64
+SCHEMAS = {
+    "clientes": {
+        "id_cliente": "string",
+        "email": "string",
+        "nombres": "string",
+        "apellidos": "string",
+        "cedula": "string",
+        "ciudad": "category",
+        "ingresos_mensuales": "float64",
+        "gastos_mensuales": "float64",
+        "es_cliente_premium": "bool",
+        "personas_a_cargo": "int8",
+        "estrato_socioeconomico": "int8",
+    },
+    "cuentas": {
+        "id_cliente": "string",
+        "entidad_financiera": "category",
+        "tipo_cuenta": "category",
+        "numero_cuenta": "string",
+        "saldo_actual": "float64",
+        "estado": "category",
+    },
+    "historial": {
+        "id_cliente": "string",
+        "fecha_registro": "timestamp",
+        "entidad_financiera": "category",
+        "tipo_operacion": "category",
+        "pago_realizado": "float64",
+        "categoria_gasto": "category",
+        "canal_transaccion": "category",
+        "tipo_registro": "category",
+        "saldo_anterior": "float64",
+        "saldo_posterior": "float64",
+        "estado_cuenta": "category",
+        "titulo_alerta": "category",
+        "mensaje_alerta": "string",
+        "accion_recomendada": "category",
+    },
+    "scoring": {
+        "id_cliente": "string",
+        "puntaje_credito": "int16",
+        "cambio_puntaje_mes": "int16",
+        "categoria_riesgo": "category",
+        "tendencia_score": "category",
+        "percentil_nacional": "int8",
+        "deuda_total": "float64",
+        "ratio_deuda_ingreso": "float32",
+        "utilizacion_credito_promedio": "float32",
+        "numero_cuentas_activas": "int16",
+        "porcentaje_pagos_puntuales": "float32",
+        "dias_mora_maximos": "int16",
+        "probabilidad_default": "float32",
+        "score_prediccion_6meses": "int16",
+        "principal_factor_negativo": "category",
+        "principal_oportunidad_mejora": "category",
+    },
+}
+
+# Per-table row order; each client's rows end up contiguous on disk.
+# Must match the ``sort_by`` the dataset indexes each table with.
+SORT_KEYS = {
+    "clientes": [("id_cliente", "ascending")],
+    "cuentas": [("id_cliente", "ascending")],
+    # Newest movement first, the order the dashboard shows them in
+    "historial": [("id_cliente", "ascending"), ("fecha_registro", "descending")],
+    "scoring": [("id_cliente", "ascending")],
+}
+
+# Type stored in the Arrow files. Categories are stored as plain strings and
+# dictionary-encoded when loaded, so files can be written batch by batch.
+_STORAGE_TYPES = {
+    "string": pa.string(),
+    "category": pa.string(),
+    "float64": pa.float64(),
+    "float32": pa.float32(),
+    "int8": pa.int8(),
+    "int16": pa.int16(),
+    "int32": pa.int32(),
+    "int64": pa.int64(),
+    "bool": pa.bool_(),
+    "timestamp": pa.timestamp("s"),
+}
+
+# Integers are parsed as floats first so values written as "3.0" are accepted;
+# the cast to the narrow type is checked and fails on fractional values.
+# Timestamps are read as text and parsed by ``columnar_store``, which also
+# accepts fractional seconds, UTC offsets and day-first dates.
+_CSV_TYPES = {
+    **_STORAGE_TYPES,
+    "timestamp": pa.string(),
+    "int8": pa.float64(),
+    "int16": pa.float64(),
+    "int32": pa.float64(),
+    "int64": pa.float64(),
+}
+
+
+def csv_types(table: str) -> dict:
+    """Return the Arrow types the CSV reader should parse each declared column as."""
+    return {column: _CSV_TYPES[kind] for column, kind in SCHEMAS[table].items()}
+
+
+def storage_schema(table: str, schema: pa.Schema) -> pa.Schema:
+    """Return ``schema`` (as parsed from the CSV) with declared columns narrowed for storage."""
+    declared = SCHEMAS[table]
+    return pa.schema([
+        pa.field(field.name, _STORAGE_TYPES[declared[field.name]]) if field.name in declared else field
+        for field in schema
+    ])
+
+
+def category_columns(table: str) -> list:
+    """Return the columns loaded as pandas Categoricals."""
+    return [column for column, kind in SCHEMAS[table].items() if kind == "category"]
+
+
+def timestamp_columns(table: str) -> list:
+    """Return the columns stored as timestamps."""
+    return [column for column, kind in SCHEMAS[table].items() if kind == "timestamp"]
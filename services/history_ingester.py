@@ -0,0 +1,63 @@
+"""Incremental ingestion of rows appended to historial_alertas.csv."""
+import os
+import threading
+
+from services import columnar_store
+
+
+class HistoryIngester:
+    """
+    Tail a CSV from a byte offset and parse only the rows appended since.
+
+    Only complete lines are consumed; a row still being written is picked up
+    by the next poll.
+
+    Args:
+        path (str): CSV file being appended to.
+        offset (int): Byte offset already ingested (past the header).
+        column_names (list[str]): Columns of the file, in file order.
+        table (str): Table name in ``financial_schema``, used to type the rows.
+    """
+
+    def __init__(self, path: str, offset: int, column_names: list, table: str = "historial"):
+        self.path = path
+        self.offset = offset
+        self.column_names = column_names
+        self.table = table
+        self.rows_ingested = 0
+        self._lock = threading.Lock()
+
+    def pending_bytes(self) -> int:
+        """Return how many bytes were appended since the last poll."""
+        return os.path.getsize(self.path) - self.offset
+
+    def poll(self):
+        """
+        Parse the rows appended since the last poll.
+
+        Returns:
+            pd.DataFrame | None: New rows typed like the loaded table, or
+            ``None`` if nothing complete was appended.
+
+        Raises:
+            ValueError: If the file shrank, i.e. it was rewritten rather than appended to.
+        """
+        with self._lock:
+            size = os.path.getsize(self.path)
+            if size < self.offset:
+                raise ValueError(f"{self.path} shrank below the ingested offset; reload it in full")
+            if size == self.offset:
+                return None
+
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                data = f.read(size - self.offset)
+            complete = data[:data.rfind(b"\n") + 1]
+            if not complete.strip():
+                self.offset += len(complete)
+                return None
+
+            rows = columnar_store.parse_rows(self.table, complete, self.column_names)
+            self.offset += len(complete)
+            self.rows_ingested += len(rows)
+            return rows
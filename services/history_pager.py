@@ -0,0 +1,57 @@
+"""Paginated, vectorized views over a client's movement history."""
+import math
+
+import numpy as np
+import pandas as pd
+
+
+# Column sets shown by each plan, in display order
+PREMIUM_COLUMNS = [
+    "", "Fecha", "Entidad", "Monto", "Tipo", "Categoría", "Tipo de registro", "Canal",
+    "Saldo anterior", "Saldo posterior", "Estado", "Alerta", "Mensaje", "Recomendación",
+]
+FREE_COLUMNS = ["Fecha", "Entidad", "Monto", "Tipo", "Categoría", "Canal"]
+
+
+def page_count(total_rows: int, page_size: int) -> int:
+    return max(1, math.ceil(total_rows / page_size))
+
+
+def page_start(total_rows: int, page: int, page_size: int) -> int:
+    """Return the offset of the first row of a page (1-based), clamped to the existing pages."""
+    page = min(max(page, 1), page_count(total_rows, page_size))
+    return (page - 1) * page_size
+
+
+def _text(series: pd.Series, default=None) -> pd.Series:
+    text = series.astype("string")
+    return text.fillna(default) if default is not None else text
+
+
+def format_movements(window: pd.DataFrame, columns=PREMIUM_COLUMNS) -> pd.DataFrame:
+    """
+    Build the display table of a page of movements with column-wise operations.
+
+    Amounts stay numeric; currency formatting is left to the table's column
+    configuration so no per-row string formatting happens on the server.
+    """
+    builders = {
+        "": lambda: np.where((window["tipo_operacion"] == "Debito").fillna(False), "🔴", "🟢"),
+        "Fecha": lambda: _text(window["fecha_registro"]).str.slice(0, 10),
+        "Entidad": lambda: window["entidad_financiera"],
+        "Monto": lambda: window["pago_realizado"].fillna(0),
+        "Tipo": lambda: window["tipo_operacion"],
+        "Categoría": lambda: _text(window["categoria_gasto"], "Sin categoría"),
+        "Tipo de registro": lambda: window["tipo_registro"],
+        "Canal": lambda: _text(window["canal_transaccion"], "N/A"),
+        "Saldo anterior": lambda: window["saldo_anterior"],
+        "Saldo posterior": lambda: window["saldo_posterior"],
+        "Estado": lambda: window["estado_cuenta"],
+        "Alerta": lambda: window["titulo_alerta"],
+        # Alert details only make sense for rows that carry an alert
+        "Mensaje": lambda: window["mensaje_alerta"].where(window["titulo_alerta"].notna()),
+        "Recomendación": lambda: window["accion_recomendada"].where(window["titulo_alerta"].notna()),
+    }
+    return pd.DataFrame(
+        {column: pd.Series(builders[column](), index=window.index) for column in columns}
+    ).reset_index(drop=True)
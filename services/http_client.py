@@ -0,0 +1,169 @@
+"""Process-wide pooled HTTP client for the upstream API."""
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.api_metrics import registry
+from services.resilience import CircuitBreaker, CircuitOpenError, Deadline, backoff_delay
+from settings import (
+    API_BASE,
+    API_CALL_BUDGET,
+    API_CONNECT_TIMEOUT,
+    API_POOL_CONNECTIONS,
+    API_POOL_MAXSIZE,
+    API_READ_TIMEOUT,
+    API_RETRY_BACKOFF,
+    API_RETRY_BACKOFF_MAX,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_TIMEOUT,
+)
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = (API_CONNECT_TIMEOUT, API_READ_TIMEOUT)
+
+_session = None
+_session_lock = threading.Lock()
+
+# Shared by every session of the process: opens after consecutive timeouts,
+# connection errors or 5xx replies from API_BASE
+breaker = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT)
+
+
+def _build_session(pool_connections: int, pool_maxsize: int) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=False,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Return the shared session, creating it on first use.
+
+    The session is shared by every Streamlit session and script thread of the
+    process. Connections are kept alive and reused from a pool of
+    ``API_POOL_MAXSIZE`` sockets per host.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session(API_POOL_CONNECTIONS, API_POOL_MAXSIZE)
+    return _session
+
+
+def configure(pool_connections: int = API_POOL_CONNECTIONS, pool_maxsize: int = API_POOL_MAXSIZE):
+    """Replace the shared session with one using the given pool sizes."""
+    global _session
+    with _session_lock:
+        old, _session = _session, _build_session(pool_connections, pool_maxsize)
+    if old is not None:
+        old.close()
+
+
+def _send(method: str, path: str, timeout, **kwargs) -> requests.Response:
+    start = time.perf_counter()
+    try:
+        response = get_session().request(method, f"{API_BASE}{path}", timeout=timeout, **kwargs)
+    except requests.Timeout:
+        elapsed = time.perf_counter() - start
+        registry.observe(method, path, elapsed, error="timeout")
+        logger.warning("%s %s timed out after %.3fs", method, path, elapsed)
+        raise
+    except requests.RequestException as exc:
+        registry.observe(method, path, time.perf_counter() - start, error="connection_error")
+        logger.warning("%s %s failed: %s", method, path, exc)
+        raise
+
+    elapsed = time.perf_counter() - start
+    body = response.request.body
+    registry.observe(
+        method, path, elapsed,
+        status=response.status_code,
+        request_bytes=len(body) if body else 0,
+        response_bytes=len(response.content),
+    )
+    logger.debug("%s %s -> %d in %.3fs", method, path, response.status_code, elapsed)
+    return response
+
+
+def request(method: str, path: str, timeout=DEFAULT_TIMEOUT, retries: int = 0,
+            budget: float = API_CALL_BUDGET, **kwargs) -> requests.Response:
+    """
+    Send a request to ``API_BASE`` through the shared session.
+
+    Every attempt is recorded in ``api_metrics.registry`` with its latency,
+    status code (or failure reason) and payload sizes. Attempts share one
+    deadline of ``budget`` seconds, which also caps each attempt's timeouts.
+    Timeouts, connection errors and 5xx replies are retried up to
+    ``retries`` times with full-jitter backoff, as long as the budget
+    allows; only pass ``retries`` for idempotent calls.
+
+    While ``breaker`` is open the call fails at once with ``CircuitOpenError``
+    (recorded as ``circuit_open``) instead of waiting on an unhealthy upstream.
+
+    Args:
+        method (str): HTTP method.
+        path (str): Path relative to ``API_BASE``, e.g. ``/whoami``.
+        timeout (float | tuple): ``(connect, read)`` timeouts in seconds.
+        retries (int): Extra attempts after a failed one.
+        budget (float | None): Seconds for the whole call; ``None`` leaves only the timeouts.
+
+    Returns:
+        requests.Response: The last reply, which may be a 5xx once retries run out.
+
+    Raises:
+        requests.RequestException: The last failure, ``resilience.DeadlineExceeded``
+            or ``resilience.CircuitOpenError``.
+    """
+    deadline = Deadline(budget)
+    attempt = 0
+    while True:
+        attempt_timeout = deadline.clamp(timeout)
+        if not breaker.allow():
+            registry.observe(method, path, 0.0, error="circuit_open")
+            raise CircuitOpenError(f"{method} {path}: circuit open, upstream unhealthy")
+
+        failure = response = None
+        try:
+            response = _send(method, path, attempt_timeout, **kwargs)
+        except requests.RequestException as exc:
+            failure = exc
+            breaker.record_failure()
+        except BaseException:
+            # Whatever went wrong, release the half-open trial slot
+            breaker.record_failure()
+            raise
+        else:
+            if response.status_code < 500:
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+
+        delay = backoff_delay(attempt, API_RETRY_BACKOFF, API_RETRY_BACKOFF_MAX)
+        if attempt >= retries or delay >= deadline.remaining():
+            if failure is not None:
+                raise failure
+            return response
+        time.sleep(delay)
+        attempt += 1
+        logger.info("Retrying %s %s (attempt %d of %d)", method, path, attempt + 1, retries + 1)
+
+
+def get(path: str, **kwargs) -> requests.Response:
+    return request("GET", path, **kwargs)
+
+
+def post(path: str, **kwargs) -> requests.Response:
+    return request("POST", path, **kwargs)
@@ -0,0 +1,226 @@
+"""Month-by-month rollups of the clients' movements for the PREMIUM trend charts."""
+import copy
+import math
+
+import numpy as np
+import pandas as pd
+
+from services.client_index import ClientIndex
+from services.ttl_cache import TTLCache
+
+# Rollup rows of each client, oldest month first
+MONTH_ORDER = [("mes", True)]
+TOTAL_COLUMNS = ["debitos", "creditos", "movimientos"]
+
+
+def _codes(values) -> tuple:
+    """Integer codes of ``values`` (-1 for missing) and the distinct values they stand for."""
+    codes, uniques = pd.factorize(values)
+    return codes.astype("int64"), np.asarray(uniques, dtype=object)
+
+
+def _grouped(keys: np.ndarray, *sums: np.ndarray) -> tuple:
+    """Distinct ``keys`` in ascending order and the per-key sum of each of ``sums``."""
+    distinct, group = np.unique(keys, return_inverse=True)
+    return distinct, [np.bincount(group, weights=s, minlength=len(distinct)) for s in sums]
+
+
+def _latest(keys: np.ndarray, instants: np.ndarray, balances: np.ndarray) -> np.ndarray:
+    """
+    Position of the latest row of each distinct key, in ascending key order.
+
+    Ties on the instant go to the higher balance, the same on every backend.
+    Two max-reductions over the key-sorted rows instead of a three-column sort.
+    """
+    if not len(keys):
+        return np.empty(0, dtype="int64")
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    first = np.append(True, sorted_keys[1:] != sorted_keys[:-1])
+    starts, group = np.flatnonzero(first), np.cumsum(first) - 1
+    instants = instants[order]
+    latest = instants == np.maximum.reduceat(instants, starts)[group]
+    balances = np.where(latest, balances[order], -np.inf)
+    picked = np.flatnonzero(latest & (balances == np.maximum.reduceat(balances, starts)[group]))
+    return order[picked[np.append(True, group[picked][1:] != group[picked][:-1])]]
+
+
+def monthly_rows(historial: pd.DataFrame) -> dict:
+    """
+    Roll movements up per client and month, in one vectorized pass per table.
+
+    Clients, months and the grouping columns are turned into integer codes
+    once and combined into a single int64 key per table, so grouping is a
+    sort of integers instead of a groupby over strings.
+
+    Movements without a date are left out. Amounts follow the rules of
+    ``ClientAggregates``: missing payments count as zero and category spend
+    only counts debits.
+
+    Returns:
+        dict: Long tables keyed by ``id_cliente`` and ``mes`` (month start):
+        ``totales`` (debitos, creditos, movimientos), ``gastos`` (monto per
+        ``categoria_gasto``) and ``saldos`` (the ``saldo_posterior`` of the
+        latest movement per ``entidad_financiera``, with its ``fecha_registro``).
+    """
+    cliente, clientes = _codes(historial["id_cliente"])
+    fechas = historial["fecha_registro"].to_numpy(dtype="datetime64[ns]", na_value=np.datetime64("NaT"))
+    fechado = ~np.isnat(fechas) & (cliente >= 0)
+    meses = fechas.astype("datetime64[M]").astype("int64")
+    primero = meses[fechado].min() if fechado.any() else 0
+    n_meses = int(meses[fechado].max() - primero + 1) if fechado.any() else 1
+    # One key per (client, month)
+    clave = cliente * n_meses + np.where(fechado, meses - primero, 0)
+
+    def client_month(keys: np.ndarray) -> dict:
+        return {
+            "id_cliente": clientes[keys // n_meses],
+            "mes": (keys % n_meses + primero).astype("datetime64[M]").astype("datetime64[ns]"),
+        }
+
+    pago = np.nan_to_num(historial["pago_realizado"].to_numpy(dtype="float64", na_value=np.nan))
+    tipo = historial["tipo_operacion"]
+    es_debito = (tipo == "Debito").fillna(False).to_numpy(dtype=bool)
+    es_credito = (tipo == "Credito").fillna(False).to_numpy(dtype=bool)
+
+    claves, (debitos, creditos, movimientos) = _grouped(
+        clave[fechado], np.where(es_debito, pago, 0.0)[fechado], np.where(es_credito, pago, 0.0)[fechado],
+        np.ones(int(fechado.sum())),
+    )
+    totales = pd.DataFrame({
+        **client_month(claves), "debitos": debitos, "creditos": creditos,
+        "movimientos": movimientos.astype("int64"),
+    })
+
+    categoria, categorias = _codes(historial["categoria_gasto"])
+    con_categoria = fechado & es_debito & (categoria >= 0)
+    claves, (monto,) = _grouped(
+        clave[con_categoria] * len(categorias) + categoria[con_categoria], pago[con_categoria],
+    )
+    gastos = pd.DataFrame({
+        **client_month(claves // max(len(categorias), 1)),
+        "categoria_gasto": categorias[claves % max(len(categorias), 1)], "monto": monto,
+    })
+
+    entidad, entidades = _codes(historial["entidad_financiera"])
+    saldo = historial["saldo_posterior"].to_numpy(dtype="float64", na_value=np.nan)
+    con_saldo = fechado & ~np.isnan(saldo) & (entidad >= 0)
+    claves = clave[con_saldo] * len(entidades) + entidad[con_saldo]
+    ultimo = _latest(claves, fechas[con_saldo].view("int64"), saldo[con_saldo])
+    saldos = pd.DataFrame({
+        **client_month(claves[ultimo] // max(len(entidades), 1)),
+        "entidad_financiera": entidades[claves[ultimo] % max(len(entidades), 1)],
+        "fecha_registro": fechas[con_saldo][ultimo],
+        "saldo_posterior": saldo[con_saldo][ultimo],
+    })
+    return {"totales": totales, "gastos": gastos, "saldos": saldos}
+
+
+def _latest_balances(saldos: pd.DataFrame, keys: list) -> pd.DataFrame:
+    # Ties on the timestamp go to the higher balance, the same on every backend
+    ordered = saldos.sort_values(["fecha_registro", "saldo_posterior"], kind="stable")
+    return ordered.drop_duplicates(keys, keep="last").reset_index(drop=True)
+
+
+def monthly_view(totales: pd.DataFrame, gastos: pd.DataFrame, saldos: pd.DataFrame) -> dict:
+    """
+    Shape one client's rollup rows into month-indexed tables for the charts.
+
+    A (month, key) pair may appear more than once when later movements were
+    rolled up separately: sums are added and the latest balance wins. Months
+    without movements are filled in, with zero amounts and balances carried
+    forward.
+
+    Returns:
+        dict: ``totales`` (debitos, creditos, movimientos), ``gastos`` (debit
+        spend per category, largest first), ``saldos`` (ending balance per
+        entity) and ``saldo_total`` (their sum), all indexed by month start;
+        empty frames if the client has no dated movements.
+    """
+    if not len(totales):
+        vacio = pd.DatetimeIndex([], name="mes")
+        return {
+            "totales": pd.DataFrame(columns=TOTAL_COLUMNS, index=vacio),
+            "gastos": pd.DataFrame(index=vacio),
+            "saldos": pd.DataFrame(index=vacio),
+            "saldo_total": pd.Series(index=vacio, dtype="float64"),
+        }
+
+    meses = pd.date_range(totales["mes"].min(), totales["mes"].max(), freq="MS", name="mes")
+    por_mes = totales.groupby("mes")[TOTAL_COLUMNS].sum().reindex(meses, fill_value=0)
+
+    por_categoria = pd.DataFrame(index=meses)
+    if len(gastos):
+        por_categoria = gastos.pivot_table(
+            index="mes", columns="categoria_gasto", values="monto", aggfunc="sum", observed=True,
+        ).reindex(meses).fillna(0.0)
+        por_categoria = por_categoria[por_categoria.sum().sort_values(ascending=False).index]
+        por_categoria.columns.name = None
+
+    por_entidad = pd.DataFrame(index=meses)
+    if len(saldos):
+        ultimos = _latest_balances(saldos, ["mes", "entidad_financiera"])
+        por_entidad = ultimos.pivot(index="mes", columns="entidad_financiera", values="saldo_posterior")
+        por_entidad = por_entidad.reindex(meses).ffill().sort_index(axis=1)
+        por_entidad.columns.name = None
+
+    return {
+        "totales": por_mes,
+        "gastos": por_categoria,
+        "saldos": por_entidad,
+        # Months before an entity's first movement do not count towards the total
+        "saldo_total": por_entidad.sum(axis=1, min_count=1),
+    }
+
+
+class MonthlyRollups:
+    """
+    Per-client monthly rollups of the movement history.
+
+    The three rollup tables are computed once per load and indexed by client
+    (see ``ClientIndex``). Rows appended later are rolled up on their own
+    and kept in each index's tail (see ``with_movements``); ``monthly_view``
+    merges base and tail rows for the few months of one client. Shaped views
+    of the last ``cache_size`` clients are kept.
+    """
+
+    def __init__(self, historial: pd.DataFrame, cache_size: int = 256):
+        rows = monthly_rows(historial)
+        self.totales = ClientIndex(rows["totales"], sort_by=MONTH_ORDER)
+        self.gastos = ClientIndex(rows["gastos"], sort_by=MONTH_ORDER)
+        self.saldos = ClientIndex(rows["saldos"], sort_by=MONTH_ORDER)
+        self._views = TTLCache(maxsize=cache_size, ttl=math.inf)
+
+    def with_movements(self, rows: pd.DataFrame) -> "MonthlyRollups":
+        """Return rollups that also count ``rows``; cost is proportional to the new rows."""
+        parts = monthly_rows(rows)
+        new = copy.copy(self)
+        new.totales = self.totales.appended(parts["totales"])
+        new.gastos = self.gastos.appended(parts["gastos"])
+        new.saldos = self.saldos.appended(parts["saldos"])
+        new._views = TTLCache(maxsize=self._views.maxsize, ttl=math.inf)
+        return new
+
+    def state(self) -> dict:
+        """Return the rollups as frames, for ``from_state`` in another process (see ``shared_snapshot``)."""
+        return {"totales": self.totales.state(), "gastos": self.gastos.state(), "saldos": self.saldos.state()}
+
+    @classmethod
+    def from_state(cls, state: dict, cache_size: int = 256) -> "MonthlyRollups":
+        """Rebuild rollups from ``state()`` frames without rolling the history up again."""
+        rollups = cls.__new__(cls)
+        rollups.totales = ClientIndex.from_state(state["totales"], sort_by=MONTH_ORDER)
+        rollups.gastos = ClientIndex.from_state(state["gastos"], sort_by=MONTH_ORDER)
+        rollups.saldos = ClientIndex.from_state(state["saldos"], sort_by=MONTH_ORDER)
+        rollups._views = TTLCache(maxsize=cache_size, ttl=math.inf)
+        return rollups
+
+    def lookup(self, id_cliente) -> dict:
+        """Return the monthly trend of one client (see ``monthly_view``); treat it as read-only."""
+        view = self._views.get(id_cliente)
+        if view is None:
+            view = monthly_view(
+                self.totales.rows(id_cliente), self.gastos.rows(id_cliente), self.saldos.rows(id_cliente),
+            )
+            self._views.set(id_cliente, view)
+        return view
@@ -0,0 +1,149 @@
+"""Bitmap filtering of the clients' movements, memoized per filter set."""
+import math
+
+import numpy as np
+import pandas as pd
+
+from services.data_backend import DATE_FILTER, date_bounds
+from services.ttl_cache import TTLCache
+
+
+def filter_key(filtros: dict = None) -> tuple:
+    """Return a hashable form of ``filtros`` that ignores the order of columns and values."""
+    key = []
+    for columna, valores in sorted((filtros or {}).items()):
+        if columna == DATE_FILTER:
+            key.append((columna, date_bounds(*valores)))
+        else:
+            key.append((columna, frozenset(valores)))
+    return tuple(key)
+
+
+class EncodedHistory:
+    """
+    A client's movements encoded once for repeated filtering.
+
+    On first use, a filter column is factorized into integer codes and each
+    code gets a bitmap (one bit per row, packed) of the rows holding it. A
+    filter set is then an OR of the selected bitmaps within a column and an
+    AND across columns, over ``rows / 8`` bytes, whatever the dimensions.
+
+    Args:
+        historial (pd.DataFrame): The client's movements, in display order.
+    """
+
+    def __init__(self, historial: pd.DataFrame):
+        self.frame = historial
+        self.size = len(historial)
+        self._values = {}
+        self._bitmaps = {}
+        self._dates = None
+
+    def _encode(self, columna: str) -> dict:
+        bitmaps = self._bitmaps.get(columna)
+        if bitmaps is None:
+            if columna not in self.frame.columns:
+                raise ValueError(f"Unknown movement column {columna!r}")
+            codes, uniques = pd.factorize(self.frame[columna])
+            # Appearance order, i.e. the order of each value's latest movement
+            self._values[columna] = uniques.tolist()
+            bitmaps = {value: np.packbits(codes == code) for code, value in enumerate(self._values[columna])}
+            self._bitmaps[columna] = bitmaps
+        return bitmaps
+
+    def _date_bitmap(self, desde, hasta) -> np.ndarray:
+        if self._dates is None:
+            self._dates = self.frame[DATE_FILTER].to_numpy(dtype="datetime64[ns]", na_value=np.datetime64("NaT"))
+        start, stop = date_bounds(desde, hasta)
+        # NaT compares False, so undated movements fall outside any range
+        mask = ~np.isnat(self._dates)
+        if start is not None:
+            mask &= self._dates >= start.to_datetime64()
+        if stop is not None:
+            mask &= self._dates < stop.to_datetime64()
+        return np.packbits(mask)
+
+    def values(self, columna: str) -> list:
+        """Return the distinct non-null values of ``columna``, in order of the latest movement."""
+        self._encode(columna)
+        return self._values[columna]
+
+    def date_range(self) -> tuple:
+        """Return the ``(oldest, newest)`` movement timestamps, or ``(None, None)`` if undated."""
+        self._date_bitmap(None, None)
+        dated = self._dates[~np.isnat(self._dates)]
+        if not len(dated):
+            return None, None
+        return pd.Timestamp(dated.min()), pd.Timestamp(dated.max())
+
+    def select(self, filtros: dict = None) -> np.ndarray:
+        """Return the positions of the rows passing ``filtros``, in row order."""
+        bits = None
+        for columna, valores in (filtros or {}).items():
+            if columna == DATE_FILTER:
+                part = self._date_bitmap(*valores)
+            else:
+                bitmaps = self._encode(columna)
+                part = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+                for valor in valores:
+                    bitmap = bitmaps.get(valor)
+                    if bitmap is not None:
+                        part |= bitmap
+            bits = part if bits is None else bits & part
+        if bits is None:
+            return np.arange(self.size, dtype=np.int32)
+        return np.flatnonzero(np.unpackbits(bits, count=self.size)).astype(np.int32)
+
+
+class MovementFilter:
+    """
+    Filtered views of the clients' movements, cached at two levels.
+
+    The encoded history of the last ``max_clients`` clients and the row
+    positions of the last ``max_results`` (client, filter set) pairs are
+    kept in LRUs, so re-applying a recent filter set (e.g. toggling a
+    multiselect back) costs a dict lookup plus slicing the visible page.
+
+    Args:
+        load (callable): ``load(id_cliente)`` returns the client's movements
+            in display order; it is called once per encoded client.
+        max_clients (int): Encoded histories kept.
+        max_results (int): Filter results kept.
+    """
+
+    def __init__(self, load, max_clients: int, max_results: int):
+        self._load = load
+        self._encoded = TTLCache(maxsize=max_clients, ttl=math.inf)
+        self._results = TTLCache(maxsize=max_results, ttl=math.inf)
+
+    def encoded(self, id_cliente) -> EncodedHistory:
+        encoded = self._encoded.get(id_cliente)
+        if encoded is None:
+            encoded = EncodedHistory(self._load(id_cliente))
+            self._encoded.set(id_cliente, encoded)
+        return encoded
+
+    def positions(self, id_cliente, filtros: dict = None) -> np.ndarray:
+        """Return the positions of the client's movements passing ``filtros`` (read-only)."""
+        key = (id_cliente, filter_key(filtros))
+        positions = self._results.get(key)
+        if positions is None:
+            positions = self.encoded(id_cliente).select(filtros)
+            positions.flags.writeable = False
+            self._results.set(key, positions)
+        return positions
+
+    def count(self, id_cliente, filtros: dict = None) -> int:
+        return len(self.positions(id_cliente, filtros))
+
+    def rows(self, id_cliente, inicio: int, limite: int, filtros: dict = None) -> pd.DataFrame:
+        window = self.positions(id_cliente, filtros)[inicio:inicio + limite]
+        frame = self.encoded(id_cliente).frame
+        if len(window) and window[-1] - window[0] == len(window) - 1:
+            # Contiguous rows (e.g. no filter): a slice is a view, not a copy
+            return frame.iloc[window[0]:window[-1] + 1]
+        return frame.iloc[window]
+
+    def stats(self) -> dict:
+        """Return hit/miss counters of both caches."""
+        return {"encoded": self._encoded.stats(), "results": self._results.stats()}
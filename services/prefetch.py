@@ -0,0 +1,171 @@
+"""Background prefetch of a user's Equipo B dashboard right after sign-in."""
+import logging
+import re
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from services import token_claims
+from services.ttl_cache import TTLCache
+from settings import PREFETCH_MAX_PENDING, PREFETCH_TTL, PREFETCH_WORKERS
+
+
+logger = logging.getLogger(__name__)
+
+_UUID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+
+class Cancelled(Exception):
+    """Raised inside a prefetch job once its token was cancelled."""
+
+
+def _shared_dataset():
+    # pandas/pyarrow are only loaded once a prefetch actually runs
+    from services import dataset_service
+
+    return dataset_service.shared().get()
+
+
+class _Job:
+    def __init__(self, token: str):
+        self.token = token
+        self.cancelled = threading.Event()
+        self.timings = {}
+
+    def step(self, name: str, fn):
+        if self.cancelled.is_set():
+            raise Cancelled(name)
+        start = time.perf_counter()
+        value = fn()
+        self.timings[name] = time.perf_counter() - start
+        return value
+
+
+class Prefetcher:
+    """
+    Loads what the dashboard's first render needs while the user is elsewhere.
+
+    ``start(token)`` queues a job on a small thread pool that resolves the
+    user id (from the JWT, else through the cached whoami), warms the shared
+    dataset, looks up the client's rows and aggregates and prepares the
+    movement filters. The page picks the
+    result up once with ``take(token)``. ``cancel(token)`` (on logout) stops
+    the job before its next step and drops any result; a step already running,
+    such as the dataset load, finishes, since its result is shared anyway.
+
+    Args:
+        workers (int): Threads running jobs.
+        max_pending (int): Jobs queued or running before new sign-ins are skipped.
+        ttl (float): Seconds a result waits to be taken.
+        load_dataset (callable): Returns the current ``FinancialDataset``.
+    """
+
+    def __init__(self, workers: int = PREFETCH_WORKERS, max_pending: int = PREFETCH_MAX_PENDING,
+                 ttl: float = PREFETCH_TTL, load_dataset=_shared_dataset):
+        self.max_pending = max_pending
+        self._load_dataset = load_dataset
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._jobs = {}
+        self._results = TTLCache(maxsize=max(max_pending, 1) * 4, ttl=ttl)
+        self._lock = threading.Lock()
+        self.counts = {"started": 0, "completed": 0, "failed": 0, "cancelled": 0, "skipped": 0, "used": 0}
+
+    def start(self, token: str) -> bool:
+        """Queue a prefetch for ``token``; return ``False`` if one is running or the queue is full."""
+        with self._lock:
+            if token in self._jobs:
+                return False
+            if len(self._jobs) >= self.max_pending:
+                self.counts["skipped"] += 1
+                return False
+            job = self._jobs[token] = _Job(token)
+            self.counts["started"] += 1
+        self._pool.submit(self._run, job)
+        return True
+
+    def _run(self, job: _Job):
+        outcome, result = "completed", None
+        try:
+            result = self._prefetch(job)
+        except Cancelled:
+            outcome = "cancelled"
+        except Exception:
+            # The page loads everything itself if the prefetch is missing
+            logger.exception("Prefetch failed")
+            outcome = "failed"
+
+        with self._lock:
+            self._jobs.pop(job.token, None)
+            if outcome == "completed" and job.cancelled.is_set():
+                outcome = "cancelled"
+            if outcome == "completed":
+                self._results.set(job.token, result, expires_at=token_claims.expires_at(job.token))
+            self.counts[outcome] += 1
+
+    def _prefetch(self, job: _Job) -> dict:
+        from services.data_backend import FILTER_COLUMNS
+
+        token = job.token
+        user_id = job.step("identity", lambda: token_claims.user_id(token) or self._whoami_user_id(token))
+        datos = job.step("dataset", self._load_dataset)
+        cliente = job.step("client", lambda: datos.cliente(user_id) if user_id else None)
+        # Only a weak reference: a result waiting to be taken must not keep a
+        # reloaded-away dataset (and its mapped files) alive next to the new one
+        result = {"datos": weakref.ref(datos), "id_usuario": user_id, "cliente": cliente, "timings": job.timings}
+        if cliente is None:
+            return result
+
+        id_cliente = cliente["id_cliente"]
+        result.update(job.step("client_rows", lambda: {
+            "id_cliente": id_cliente,
+            "cuentas": datos.cuentas_cliente(id_cliente),
+            "scoring": datos.scoring_cliente(id_cliente),
+        }))
+        if cliente["es_cliente_premium"]:
+            result["agregados"] = job.step("aggregates", lambda: datos.agregados_cliente(id_cliente))
+            # Encodes the history for the movement filters; the dataset keeps it for the page
+            job.step("filters", lambda: [datos.valores_historial(id_cliente, columna) for columna in FILTER_COLUMNS])
+        return result
+
+    @staticmethod
+    def _whoami_user_id(token: str):
+        # Also leaves the reply in the whoami cache for the page
+        from services.auth_service import AuthService
+
+        match = _UUID.search(str(AuthService.whoami(token)))
+        return match.group(0) if match else None
+
+    def take(self, token: str):
+        """
+        Return the finished prefetch of ``token`` once, or ``None``.
+
+        Returns:
+            dict | None: ``datos`` (a weak reference to the dataset it was
+            built from; ``None`` once that dataset was dropped),
+            ``id_usuario``, ``cliente``, ``timings`` and, if the client was
+            found, ``id_cliente``, ``cuentas``, ``scoring`` and, for
+            PREMIUM, ``agregados``.
+        """
+        result = self._results.get(token)
+        if result is not None:
+            self._results.invalidate(token)
+            with self._lock:
+                self.counts["used"] += 1
+        return result
+
+    def cancel(self, token: str):
+        """Stop the prefetch of ``token`` and drop its result, e.g. on logout."""
+        with self._lock:
+            job = self._jobs.get(token)
+            if job is not None:
+                job.cancelled.set()
+        self._results.invalidate(token)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counts, "running": len(self._jobs)}
+
+
+# Shared by every session of the process
+prefetcher = Prefetcher()
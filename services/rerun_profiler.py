@@ -0,0 +1,184 @@
+"""
+Opt-in timing of named sections of a Streamlit rerun.
+
+``main.py`` opens a profile at the top of a rerun with ``begin`` and closes
+it with ``end``; page scripts wrap their hot spots in ``section(name)``.
+Streamlit runs each session's script on its own thread, so the current
+profile is kept per thread. With no profile open, ``section`` is a no-op,
+so pages also run unprofiled on their own (e.g. under ``AppTest``).
+
+Finished reruns go to a rolling, process-wide ``RerunLog`` that aggregates
+sections across sessions, and optionally to a JSON-lines file that
+``python -m services.rerun_profiler <file>`` summarizes across processes.
+"""
+import argparse
+import collections
+import contextlib
+import json
+import threading
+import time
+
+from settings import PROFILE_LOG_FILE, PROFILE_LOG_SIZE
+
+
+_local = threading.local()
+
+
+class RerunProfile:
+    """
+    Timings of one rerun, in the order sections were entered.
+
+    Attributes:
+        page (str): Page that ran; ``main`` until navigation resolves it.
+        sections (list[tuple]): ``(name, depth, seconds)``; ``depth`` counts
+            enclosing sections.
+        total (float): Seconds from ``begin`` to ``end``.
+    """
+
+    def __init__(self, page: str = "main"):
+        self.page = page
+        self.sections = []
+        self.total = None
+        self._depth = 0
+        self._started = time.perf_counter()
+
+    @contextlib.contextmanager
+    def section(self, name: str):
+        index = len(self.sections)
+        self.sections.append((name, self._depth, 0.0))
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.sections[index] = (name, self._depth, time.perf_counter() - start)
+
+    def finish(self):
+        self.total = time.perf_counter() - self._started
+
+    def as_dict(self) -> dict:
+        return {
+            "time": time.time(),
+            "page": self.page,
+            "total": self.total,
+            "sections": [{"name": name, "depth": depth, "seconds": seconds} for name, depth, seconds in self.sections],
+        }
+
+
+def _aggregate(records) -> list:
+    # Only the diagnostics page aggregates; keep numpy off the startup path
+    import numpy as np
+
+    samples = collections.defaultdict(list)
+    for record in records:
+        samples[(record["page"], "(total)")].append(record["total"])
+        for section in record["sections"]:
+            samples[(record["page"], section["name"])].append(section["seconds"])
+
+    rows = []
+    for (page, name), seconds in sorted(samples.items()):
+        ms = np.array(seconds) * 1e3
+        rows.append({
+            "page": page,
+            "section": name,
+            "count": len(ms),
+            "mean_ms": float(ms.mean()),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "max_ms": float(ms.max()),
+        })
+    return rows
+
+
+class RerunLog:
+    """
+    Rolling log of the last ``maxlen`` profiled reruns of every session.
+
+    Args:
+        maxlen (int): Reruns kept in memory.
+        path (str): JSON-lines file each rerun is also appended to; empty disables it.
+    """
+
+    def __init__(self, maxlen: int = PROFILE_LOG_SIZE, path: str = PROFILE_LOG_FILE):
+        self.path = path
+        self._records = collections.deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, profile: RerunProfile):
+        record = profile.as_dict()
+        with self._lock:
+            self._records.append(record)
+            if self.path:
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+
+    def __len__(self):
+        return len(self._records)
+
+    def aggregate(self) -> list:
+        """
+        Return per-section statistics over the logged reruns.
+
+        Returns:
+            list[dict]: ``page``, ``section``, ``count``, ``mean_ms``,
+            ``p50_ms``, ``p95_ms`` and ``max_ms``; the whole rerun appears as
+            section ``(total)``.
+        """
+        with self._lock:
+            records = list(self._records)
+        return _aggregate(records)
+
+
+# Shared by every session of the process
+log = RerunLog()
+
+
+def begin(page: str = "main") -> RerunProfile:
+    """Open a profile for the rerun running on this thread."""
+    _local.profile = RerunProfile(page)
+    return _local.profile
+
+
+def current():
+    """Return the profile open on this thread, or ``None``."""
+    return getattr(_local, "profile", None)
+
+
+def section(name: str):
+    """Context manager timing ``name`` in the current rerun; a no-op when profiling is off."""
+    profile = current()
+    return profile.section(name) if profile is not None else contextlib.nullcontext()
+
+
+def end():
+    """Close the profile of this thread, add it to ``log`` and return it (``None`` if none was open)."""
+    profile = current()
+    if profile is None:
+        return None
+    _local.profile = None
+    profile.finish()
+    log.record(profile)
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a rerun profile log (JSON lines).")
+    parser.add_argument("path", nargs="?", default=PROFILE_LOG_FILE)
+    args = parser.parse_args()
+    if not args.path:
+        parser.error("no log file given and PROFILE_LOG_FILE is not set")
+
+    with open(args.path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    print(f"{len(records)} reruns")
+    print(f"{'page':<20} {'section':<24} {'count':>6} {'mean':>9} {'p50':>9} {'p95':>9} {'max':>9}")
+    for row in _aggregate(records):
+        print(
+            f"{row['page']:<20} {row['section']:<24} {row['count']:>6} {row['mean_ms']:>7.1f}ms "
+            f"{row['p50_ms']:>7.1f}ms {row['p95_ms']:>7.1f}ms {row['max_ms']:>7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Deadline budgets, jittered backoff and a circuit breaker for upstream calls."""
+import random
+import threading
+import time
+
+import requests
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of calling the upstream while the circuit breaker is open."""
+
+
+class DeadlineExceeded(requests.Timeout):
+    """Raised when a call's time budget is spent before it could be (re)tried."""
+
+
+class Deadline:
+    """
+    Time budget shared by every attempt of one call.
+
+    Args:
+        budget (float | None): Seconds available; ``None`` means unbounded.
+    """
+
+    def __init__(self, budget: float = None, clock=time.monotonic):
+        self._clock = clock
+        self.expires_at = None if budget is None else clock() + budget
+
+    def remaining(self) -> float:
+        if self.expires_at is None:
+            return float("inf")
+        return max(0.0, self.expires_at - self._clock())
+
+    def clamp(self, timeout):
+        """
+        Return ``timeout`` (a number or ``(connect, read)``) cut to the remaining budget.
+
+        ``requests`` applies the read timeout to each socket read, so a reply
+        trickling in can still overrun the budget slightly.
+
+        Raises:
+            DeadlineExceeded: If nothing is left of the budget.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("Deadline exceeded before the request was sent")
+        if isinstance(timeout, tuple):
+            return tuple(min(t, remaining) for t in timeout)
+        return min(timeout, remaining)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform in ``[0, min(cap, base * 2**attempt)]``."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail fast. Once ``reset_timeout`` seconds have passed a single
+    trial call is let through (half-open); its outcome closes or reopens
+    the circuit.
+
+    Args:
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_timeout (float): Seconds the circuit stays open before a trial call.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Return whether a call may go out now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self._clock() - self._opened_at < self.reset_timeout:
+                return False
+            # Half-open: one trial call at a time
+            if self._trial_in_flight:
+                return False
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+    def reset(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
@@ -0,0 +1,257 @@
+"""
+Versioned, memory-mapped dataset snapshots shared by the server processes of a host.
+
+Publish the current sources as a new version (e.g. from a deploy hook)::
+
+    python -m services.shared_snapshot [--root /var/cache/web_app/snapshots]
+"""
+import argparse
+import contextlib
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from services.financial_data import FinancialDataset
+from settings import SNAPSHOT_DIR, SNAPSHOT_KEEP
+
+# Bumped whenever ``FinancialDataset.state`` changes shape; older versions are then rebuilt
+LAYOUT_VERSION = 1
+
+_CURRENT = "CURRENT"
+_MANIFEST = "manifest.json"
+_LOCK = ".lock"
+_STAGING = ".staging-"
+_INDEX = "__index__"
+# Schema metadata key holding how to turn each column back into its pandas dtype
+_METADATA = b"snapshot"
+
+
+def _encode(values) -> tuple:
+    """Return ``(arrow array, description)`` for a column or index, without copying where Arrow allows."""
+    dtype = values.dtype
+    if isinstance(dtype, pd.ArrowDtype):
+        return pa.chunked_array(values.array.__arrow_array__()).combine_chunks(), {"kind": "arrow"}
+    if isinstance(dtype, pd.CategoricalDtype):
+        # Codes as plain integers, -1 for nulls, so they map straight back into a Categorical
+        return pa.array(np.asarray(values.codes if isinstance(values, pd.Index) else values.cat.codes)), {
+            "kind": "category",
+            "categories": dtype.categories.tolist(),
+            "ordered": bool(dtype.ordered),
+        }
+    if dtype == object:
+        return pa.array(np.asarray(values, dtype=object), type=pa.string(), from_pandas=True), {"kind": "arrow"}
+    array = np.asarray(values)
+    if dtype.kind in "mMb":
+        # Raw integers: Arrow packs booleans into bits and turns NaT into nulls
+        array = array.view(f"i{dtype.itemsize}")
+    return pa.array(array, from_pandas=False), {"kind": "numpy", "dtype": dtype.str}
+
+
+def _decode(column: pa.ChunkedArray, description: dict):
+    """Return the pandas values of ``column``; NumPy and Arrow values stay views on the mapped file."""
+    kind = description["kind"]
+    if kind == "arrow":
+        return pd.arrays.ArrowExtensionArray(column)
+    values = column.to_numpy()
+    if kind == "category":
+        dtype = pd.CategoricalDtype(description["categories"], ordered=description["ordered"])
+        return pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+    return values.view(np.dtype(description["dtype"]))
+
+
+def frame_to_table(df: pd.DataFrame) -> pa.Table:
+    """Convert ``df`` to an Arrow table that ``table_to_frame`` turns back into the same frame."""
+    names, arrays, descriptions = [], [], {}
+    if not isinstance(df.index, pd.RangeIndex):
+        array, descriptions[_INDEX] = _encode(df.index)
+        names.append(_INDEX)
+        arrays.append(array)
+    for column in df.columns:
+        array, descriptions[column] = _encode(df[column])
+        names.append(column)
+        arrays.append(array)
+    metadata = {"columns": descriptions, "index_name": df.index.name, "rows": len(df)}
+    return pa.table(arrays, names=names, metadata={_METADATA: json.dumps(metadata)})
+
+
+def table_to_frame(table: pa.Table) -> pd.DataFrame:
+    """Convert a ``frame_to_table`` table back to a frame, sharing its buffers."""
+    metadata = json.loads(table.schema.metadata[_METADATA])
+    descriptions = metadata["columns"]
+    data = {name: _decode(table[name], descriptions[name]) for name in table.column_names}
+    if _INDEX in data:
+        index = pd.Index(data.pop(_INDEX), name=metadata["index_name"], copy=False)
+    else:
+        index = pd.RangeIndex(metadata["rows"])
+    return pd.DataFrame(data, index=index, columns=list(data), copy=False)
+
+
+def _write_state(directory: str, state: dict) -> int:
+    """Write nested dicts of frames as directories of Arrow files; return the bytes written."""
+    os.makedirs(directory, exist_ok=True)
+    written = 0
+    for name, value in state.items():
+        path = os.path.join(directory, name)
+        if isinstance(value, dict):
+            written += _write_state(path, value)
+            continue
+        table = frame_to_table(value)
+        with pa.OSFile(f"{path}.arrow", "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        written += os.path.getsize(f"{path}.arrow")
+    return written
+
+
+def _read_state(directory: str) -> dict:
+    """Memory-map what ``_write_state`` wrote, as nested dicts of frames."""
+    state = {}
+    for entry in os.scandir(directory):
+        if entry.is_dir():
+            state[entry.name] = _read_state(entry.path)
+        elif entry.name.endswith(".arrow"):
+            table = pa.ipc.open_file(pa.memory_map(entry.path, "r")).read_all()
+            state[entry.name[:-len(".arrow")]] = table_to_frame(table)
+    return state
+
+
+class SnapshotStore:
+    """
+    Read-only dataset snapshots under ``root``, shared by every server process of the host.
+
+    A version is a directory of uncompressed Arrow files holding the four
+    tables and the indexes, aggregates and rollups built from them (see
+    ``FinancialDataset.state``). It is written under a temporary name and
+    renamed into place, then ``CURRENT`` is replaced to name it, so readers
+    see either the previous version or the new one in full. Versions are
+    never modified: a process attaching to one memory-maps its files, so all
+    processes share the same page-cache pages instead of each holding a
+    private copy, and attaching costs no parsing, sorting or grouping.
+
+    Publishers serialize on a lock file (see ``publishing``), so a version is
+    built once however many processes start together. Only the newest
+    ``keep`` versions are kept on disk; a process still mapping a removed one
+    keeps reading it until it attaches to a newer one.
+
+    Args:
+        root (str): Directory of the versions.
+        keep (int): Versions kept on disk, the current one included.
+    """
+
+    layout = LAYOUT_VERSION
+
+    def __init__(self, root: str = SNAPSHOT_DIR, keep: int = SNAPSHOT_KEEP):
+        self.root = root
+        self.keep = max(keep, 1)
+
+    @contextlib.contextmanager
+    def publishing(self):
+        """Hold the host-wide publisher lock for the duration of the block."""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, _LOCK), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def current(self):
+        """Return the current version, or ``None`` if none was published."""
+        try:
+            with open(os.path.join(self.root, _CURRENT)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def manifest(self, version: str) -> dict:
+        """Return what ``publish`` recorded about ``version``."""
+        with open(os.path.join(self.root, version, _MANIFEST)) as f:
+            return json.load(f)
+
+    def versions(self) -> list:
+        """Return the published versions on disk, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if name.isdigit())
+
+    def publish(self, dataset: FinancialDataset, **meta) -> str:
+        """
+        Write ``dataset`` as a new version and make it current; call it within ``publishing``.
+
+        Args:
+            dataset (FinancialDataset): A freshly loaded dataset, with no appended rows.
+            **meta: JSON-serializable values recorded in the version's manifest.
+
+        Returns:
+            str: The new version.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=_STAGING, dir=self.root)
+        try:
+            written = _write_state(staging, dataset.state())
+            manifest = {
+                "layout": LAYOUT_VERSION,
+                "created_at": time.time(),
+                "pid": os.getpid(),
+                "bytes": written,
+                **meta,
+            }
+            with open(os.path.join(staging, _MANIFEST), "w") as f:
+                json.dump(manifest, f)
+            versions = self.versions()
+            version = f"{int(versions[-1]) + 1 if versions else 1:08d}"
+            os.rename(staging, os.path.join(self.root, version))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        pointer = os.path.join(self.root, f"{_CURRENT}.{os.getpid()}.tmp")
+        with open(pointer, "w") as f:
+            f.write(version)
+        os.replace(pointer, os.path.join(self.root, _CURRENT))
+        self._prune(version)
+        return version
+
+    def attach(self, version: str) -> FinancialDataset:
+        """
+        Map ``version`` into this process.
+
+        Raises:
+            ValueError: If the version was written by an incompatible layout.
+        """
+        layout = self.manifest(version).get("layout")
+        if layout != self.layout:
+            raise ValueError(f"Snapshot {version} has layout {layout}, expected {self.layout}")
+        return FinancialDataset.from_state(_read_state(os.path.join(self.root, version)))
+
+    def _prune(self, current: str):
+        """Drop versions beyond ``keep`` and staging directories left by crashed publishers."""
+        others = [version for version in self.versions() if version != current]
+        stale = set(others[:max(len(others) - (self.keep - 1), 0)])
+        for name in os.listdir(self.root):
+            if name.startswith(_STAGING) or name in stale:
+                # Unlinked files stay readable by the processes still mapping them
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+
+def main():
+    from services.dataset_service import DatasetService
+
+    parser = argparse.ArgumentParser(description="Publish a dataset snapshot of the current sources.")
+    parser.add_argument("--root", default=SNAPSHOT_DIR or None, required=not SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    service = DatasetService(snapshots=SnapshotStore(args.root))
+    service.reload(force=True)
+    manifest = service.snapshots.manifest(service.snapshot_version)
+    print(f"Published snapshot {service.snapshot_version} ({manifest['bytes'] / 1e6:.1f} MB) in {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Coalescing of concurrent identical calls into one in-flight call."""
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time; concurrent callers share its outcome.
+
+    The first caller of a key (the leader) runs the function; callers that
+    arrive while it is running wait for it and get the same result, or the
+    same exception. Nothing is kept once the call returns, so a later caller
+    starts a new call; caching is left to the caller.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        """Return ``fn()``, or the result of the call already running for ``key``."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                call.waiters += 1
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> dict:
+        """Return ``leaders`` (calls made), ``shared`` (calls saved) and ``in_flight``."""
+        with self._lock:
+            total = self.leaders + self.shared
+            return {
+                "leaders": self.leaders,
+                "shared": self.shared,
+                "in_flight": len(self._calls),
+                "saved_rate": self.shared / total if total else 0.0,
+            }
@@ -0,0 +1,427 @@
+"""
+Indexed SQLite copy of the financial CSVs, queried per client.
+
+Unlike the columnar backend, nothing is held in the server process: each
+dashboard query reads only the current client's rows through an index, and
+filters, paging and the PREMIUM aggregates run inside SQLite. Build or
+refresh the file with ``python -m services.sqlite_store``; a running server
+picks up a rebuilt file on the next ``get``.
+"""
+import contextlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from services import columnar_store
+from services.cohort_index import COHORT_METRICS, CohortIndex, dimension_columns
+from services.data_backend import DATE_FILTER, FinancialBackend, date_bounds
+from services.financial_schema import SCHEMA_VERSION, SCHEMAS, TABLE_FILES
+from services.monthly_rollups import monthly_view
+from settings import DATA_DIR, SQLITE_MMAP_SIZE, SQLITE_PATH
+
+
+INDEXES = {
+    "clientes": [("id_cliente",)],
+    "cuentas": [("id_cliente",)],
+    "historial": [
+        ("id_cliente",),
+        ("id_cliente", "fecha_registro"),
+        ("id_cliente", "tipo_operacion", "entidad_financiera"),
+    ],
+    "scoring": [("id_cliente",)],
+}
+
+# Monthly rollups (see services/monthly_rollups.py), materialized once per import
+ROLLUPS = {
+    "mensual_totales": """
+        SELECT id_cliente, substr(fecha_registro, 1, 7) || '-01' AS mes,
+               SUM(CASE WHEN tipo_operacion = 'Debito' THEN COALESCE(pago_realizado, 0) ELSE 0 END) AS debitos,
+               SUM(CASE WHEN tipo_operacion = 'Credito' THEN COALESCE(pago_realizado, 0) ELSE 0 END) AS creditos,
+               COUNT(*) AS movimientos
+        FROM historial WHERE fecha_registro IS NOT NULL
+        GROUP BY id_cliente, mes""",
+    "mensual_gastos": """
+        SELECT id_cliente, substr(fecha_registro, 1, 7) || '-01' AS mes, categoria_gasto,
+               SUM(COALESCE(pago_realizado, 0)) AS monto
+        FROM historial
+        WHERE fecha_registro IS NOT NULL AND tipo_operacion = 'Debito' AND categoria_gasto IS NOT NULL
+        GROUP BY id_cliente, mes, categoria_gasto""",
+    "mensual_saldos": """
+        SELECT id_cliente, mes, entidad_financiera, fecha_registro, saldo_posterior FROM (
+            SELECT id_cliente, substr(fecha_registro, 1, 7) || '-01' AS mes, entidad_financiera,
+                   fecha_registro, saldo_posterior,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY id_cliente, substr(fecha_registro, 1, 7), entidad_financiera
+                       ORDER BY fecha_registro DESC, saldo_posterior DESC
+                   ) AS orden
+            FROM historial
+            WHERE fecha_registro IS NOT NULL AND saldo_posterior IS NOT NULL AND entidad_financiera IS NOT NULL
+        ) WHERE orden = 1""",
+}
+# Bump when tables or indexes derived from the CSVs change, so older files are rebuilt
+LAYOUT_VERSION = 1
+
+# Newest first; rowid keeps ties in file order, like the stable sort of the columnar backend
+_MOVEMENT_ORDER = "ORDER BY fecha_registro DESC, rowid"
+_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _sql_type(arrow_type) -> str:
+    if pa.types.is_floating(arrow_type):
+        return "REAL"
+    if pa.types.is_integer(arrow_type) or pa.types.is_boolean(arrow_type):
+        return "INTEGER"
+    return "TEXT"
+
+
+def _python_columns(data: pa.Table) -> list:
+    columns = []
+    for column in data.columns:
+        if pa.types.is_timestamp(column.type):
+            column = pc.strftime(column, format=_TIMESTAMP_FORMAT)
+        columns.append(column.to_pylist())
+    return columns
+
+
+def _read_meta(conn) -> dict:
+    return {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM meta")}
+
+
+def is_stale(data_dir: str = DATA_DIR, path: str = SQLITE_PATH) -> bool:
+    """Return whether ``path`` is missing or was built from other CSVs or another schema version."""
+    if not os.path.exists(path):
+        return True
+    try:
+        with contextlib.closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as conn:
+            meta = _read_meta(conn)
+    except sqlite3.Error:
+        return True
+    # Compared after a JSON round trip, as stored
+    sources = json.loads(json.dumps(columnar_store.fingerprints(data_dir)))
+    return (
+        meta.get("schema_version") != SCHEMA_VERSION
+        or meta.get("layout_version") != LAYOUT_VERSION
+        or meta.get("sources") != sources
+    )
+
+
+def build(data_dir: str = DATA_DIR, path: str = SQLITE_PATH) -> dict:
+    """
+    Import the four CSVs into a new SQLite file and atomically replace ``path``.
+
+    Rows are streamed block by block (see ``columnar_store.iter_csv_batches``),
+    so memory use does not depend on the size of the CSVs. Indexes are
+    created after the load, and the query planner statistics are gathered.
+
+    Returns:
+        dict: Rows imported per table.
+    """
+    sources = columnar_store.fingerprints(data_dir)
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    counts = {}
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        for table in TABLE_FILES:
+            source = columnar_store.source_path(table, data_dir)
+            schema, batches = columnar_store.iter_csv_batches(table, source, os.path.getsize(source))
+            columns = ", ".join(f'"{field.name}" {_sql_type(field.type)}' for field in schema)
+            conn.execute(f"CREATE TABLE {table} ({columns})")
+            insert = f"INSERT INTO {table} VALUES ({', '.join('?' * len(schema))})"
+            counts[table] = 0
+            for batch in batches:
+                conn.executemany(insert, zip(*_python_columns(batch)))
+                counts[table] += batch.num_rows
+
+            for columns in INDEXES[table]:
+                conn.execute(f"CREATE INDEX ix_{table}_{'_'.join(columns)} ON {table} ({', '.join(columns)})")
+
+        for rollup, select in ROLLUPS.items():
+            conn.execute(f"CREATE TABLE {rollup} AS {select}")
+            conn.execute(f"CREATE INDEX ix_{rollup}_id_cliente ON {rollup} (id_cliente, mes)")
+
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("schema_version", json.dumps(SCHEMA_VERSION)),
+            ("layout_version", json.dumps(LAYOUT_VERSION)),
+            ("sources", json.dumps(sources)),
+            ("built_at", json.dumps(time.time())),
+        ])
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return counts
+
+
+class SqliteDataset(FinancialBackend):
+    """
+    Dashboard queries over the SQLite file, one read-only connection per thread.
+
+    Connections are held in a ``threading.local``: each is closed when its
+    thread exits or when the dataset is garbage-collected, i.e. once the
+    last session holding a replaced dataset drops it.
+
+    Args:
+        path (str): File built by ``build``.
+        mmap_size (int): Bytes of the file SQLite may memory-map (shared with the page cache).
+    """
+
+    def __init__(self, path: str = SQLITE_PATH, mmap_size: int = SQLITE_MMAP_SIZE):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found; build it with python -m services.sqlite_store")
+        self.path = path
+        self.mmap_size = mmap_size
+        self._local = threading.local()
+        self._cohortes = None
+        self._cohortes_lock = threading.Lock()
+        self.columns = {
+            table: [row[1] for row in self._conn().execute(f"PRAGMA table_info({table})")]
+            for table in TABLE_FILES
+        }
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+            conn.execute("PRAGMA query_only = 1")
+            self._local.conn = conn
+        return conn
+
+    def _frame(self, table: str, sql: str, params=()) -> pd.DataFrame:
+        cursor = self._conn().execute(sql, params)
+        names = [d[0] for d in cursor.description]
+        frame = pd.DataFrame.from_records(cursor.fetchall(), columns=names)
+        for column, kind in SCHEMAS[table].items():
+            if column not in frame.columns:
+                continue
+            if kind == "timestamp":
+                frame[column] = pd.to_datetime(frame[column], format=_TIMESTAMP_FORMAT)
+            elif kind == "bool":
+                frame[column] = frame[column].astype("boolean")
+        return frame
+
+    def _first(self, table: str, id_cliente):
+        frame = self._frame(table, f"SELECT * FROM {table} WHERE id_cliente = ? LIMIT 1", (id_cliente,))
+        return frame.iloc[0] if len(frame) else None
+
+    def _where(self, id_cliente, filtros: dict = None):
+        """Return the ``WHERE`` clause and its parameters, or ``None`` if a filter allows nothing."""
+        clauses, params = ["id_cliente = ?"], [id_cliente]
+        for columna, valores in (filtros or {}).items():
+            if columna not in self.columns["historial"]:
+                raise ValueError(f"Unknown movement column {columna!r}")
+            if columna == DATE_FILTER:
+                for operador, limite in zip((">=", "<"), date_bounds(*valores)):
+                    if limite is not None:
+                        clauses.append(f'"{columna}" {operador} ?')
+                        params.append(limite.strftime(_TIMESTAMP_FORMAT))
+                continue
+            valores = list(valores)
+            if not valores:
+                return None
+            clauses.append(f'"{columna}" IN ({", ".join("?" * len(valores))})')
+            params += valores
+        return " AND ".join(clauses), params
+
+    def cliente(self, id_cliente):
+        return self._first("clientes", id_cliente)
+
+    def cuentas_cliente(self, id_cliente) -> pd.DataFrame:
+        return self._frame("cuentas", "SELECT * FROM cuentas WHERE id_cliente = ? ORDER BY rowid", (id_cliente,))
+
+    def scoring_cliente(self, id_cliente):
+        return self._first("scoring", id_cliente)
+
+    def tendencia_mensual(self, id_cliente) -> dict:
+        """Shape the client's rows of the rollup tables built at import time."""
+        frames = {}
+        for rollup in ROLLUPS:
+            cursor = self._conn().execute(f"SELECT * FROM {rollup} WHERE id_cliente = ? ORDER BY mes", (id_cliente,))
+            frame = pd.DataFrame.from_records(cursor.fetchall(), columns=[d[0] for d in cursor.description])
+            frame["mes"] = pd.to_datetime(frame["mes"], format="%Y-%m-%d")
+            if "fecha_registro" in frame.columns:
+                frame["fecha_registro"] = pd.to_datetime(frame["fecha_registro"], format=_TIMESTAMP_FORMAT)
+            frames[rollup] = frame
+        return monthly_view(frames["mensual_totales"], frames["mensual_gastos"], frames["mensual_saldos"])
+
+    def cohortes_cliente(self, id_cliente) -> list:
+        """Rank the client within its cohorts; the cohort index is built from two small column scans on first use."""
+        if self._cohortes is None:
+            with self._cohortes_lock:
+                if self._cohortes is None:
+                    clientes = self._frame(
+                        "clientes", f"SELECT id_cliente, {', '.join(dimension_columns('clientes'))} FROM clientes",
+                    )
+                    scoring = self._frame(
+                        "scoring",
+                        f"SELECT id_cliente, {', '.join([*dimension_columns('scoring'), *COHORT_METRICS])} FROM scoring",
+                    )
+                    self._cohortes = CohortIndex(clientes, scoring)
+        return self._cohortes.compare(id_cliente)
+
+    def historial_cliente(self, id_cliente) -> pd.DataFrame:
+        return self._frame(
+            "historial", f"SELECT * FROM historial WHERE id_cliente = ? {_MOVEMENT_ORDER}", (id_cliente,),
+        )
+
+    def valores_historial(self, id_cliente, columna: str) -> list:
+        """Return the distinct values of ``columna``, in order of the client's latest movement."""
+        if columna not in self.columns["historial"]:
+            raise ValueError(f"Unknown movement column {columna!r}")
+        rows = self._conn().execute(
+            f'SELECT "{columna}" FROM historial WHERE id_cliente = ? AND "{columna}" IS NOT NULL '
+            f'GROUP BY "{columna}" ORDER BY MAX(fecha_registro) DESC',
+            (id_cliente,),
+        )
+        return [value for value, in rows]
+
+    def rango_fechas(self, id_cliente) -> tuple:
+        oldest, newest = self._conn().execute(
+            "SELECT MIN(fecha_registro), MAX(fecha_registro) FROM historial WHERE id_cliente = ?", (id_cliente,),
+        ).fetchone()
+        if oldest is None:
+            return None, None
+        return pd.Timestamp(oldest), pd.Timestamp(newest)
+
+    def contar_movimientos(self, id_cliente, filtros: dict = None) -> int:
+        where = self._where(id_cliente, filtros)
+        if where is None:
+            return 0
+        clause, params = where
+        return self._conn().execute(f"SELECT COUNT(*) FROM historial WHERE {clause}", params).fetchone()[0]
+
+    def movimientos(self, id_cliente, inicio: int, limite: int, filtros: dict = None) -> pd.DataFrame:
+        where = self._where(id_cliente, filtros)
+        if where is None:
+            return self._frame("historial", "SELECT * FROM historial WHERE 0")
+        clause, params = where
+        return self._frame(
+            "historial",
+            f"SELECT * FROM historial WHERE {clause} {_MOVEMENT_ORDER} LIMIT ? OFFSET ?",
+            (*params, limite, inicio),
+        )
+
+    def agregados_cliente(self, id_cliente) -> dict:
+        """Compute the PREMIUM analytics in SQLite; same keys and rules as ``ClientAggregates.lookup``."""
+        conn = self._conn()
+        num, debitos, creditos = conn.execute(
+            "SELECT COUNT(*),"
+            " TOTAL(CASE WHEN tipo_operacion = 'Debito' THEN pago_realizado END),"
+            " TOTAL(CASE WHEN tipo_operacion = 'Credito' THEN pago_realizado END)"
+            " FROM historial WHERE id_cliente = ?",
+            (id_cliente,),
+        ).fetchone()
+        gastos = dict(conn.execute(
+            "SELECT categoria_gasto, TOTAL(pago_realizado) FROM historial"
+            " WHERE id_cliente = ? AND tipo_operacion = 'Debito' AND categoria_gasto IS NOT NULL"
+            " GROUP BY categoria_gasto",
+            (id_cliente,),
+        ).fetchall())
+
+        cuentas = conn.execute(
+            "SELECT entidad_financiera, COALESCE(saldo_actual, 0) FROM cuentas WHERE id_cliente = ? ORDER BY rowid",
+            (id_cliente,),
+        ).fetchall()
+        total_saldo = sum(saldo for _, saldo in cuentas)
+        distribucion = tuple(
+            (entidad, saldo * 100 / total_saldo if total_saldo > 0 else 0.0) for entidad, saldo in cuentas
+        )
+
+        balance = capacidad = 0.0
+        perfil = conn.execute(
+            "SELECT ingresos_mensuales, gastos_mensuales FROM clientes WHERE id_cliente = ? LIMIT 1", (id_cliente,),
+        ).fetchone()
+        if perfil is not None:
+            ingresos, gastos_mensuales = (math.nan if v is None else v for v in perfil)
+            balance = ingresos - gastos_mensuales
+            capacidad = balance * 100 / ingresos if ingresos > 0 else 0.0
+
+        return {
+            "num_movimientos": int(num),
+            "total_debitos": float(debitos),
+            "total_creditos": float(creditos),
+            "gastos_por_categoria": pd.Series(gastos, dtype="float64").sort_values(ascending=False),
+            "total_saldo": float(total_saldo),
+            "num_cuentas": len(cuentas),
+            "distribucion_saldos": distribucion,
+            "balance_mensual": float(balance),
+            "capacidad_ahorro": float(capacidad),
+        }
+
+
+class SqliteService:
+    """
+    Hands out the ``SqliteDataset`` of the SQLite file, reopening it when the file is rebuilt.
+
+    Same role as ``DatasetService`` for the columnar backend; the file is
+    not rebuilt here, since importing large CSVs belongs in a deploy step.
+    """
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dataset = None
+        self._mtime = None
+        self.version = 0
+        self.loaded_at = None
+        self.handouts = 0
+
+    def get(self) -> SqliteDataset:
+        """
+        Return the dataset over the current file.
+
+        Raises:
+            FileNotFoundError: If the file has not been built.
+        """
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    # Not closed here: sessions and prefetch jobs may still be querying the
+                    # previous dataset; its connections close once the last of them drops it
+                    self._dataset = SqliteDataset(self.path)
+                    self._mtime = mtime
+                    self.version += 1
+                    self.loaded_at = time.time()
+        self.handouts += 1
+        return self._dataset
+
+    def start_tailing(self, interval: float):
+        """Appended CSV rows reach this backend through a rebuild; nothing to poll."""
+
+
+def main():
+    """Build the SQLite store; ``python -m services.sqlite_store [--force]``."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import the financial CSVs into an indexed SQLite file.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--output", default=SQLITE_PATH)
+    parser.add_argument("--force", action="store_true", help="Rebuild even if up to date")
+    args = parser.parse_args()
+
+    if not args.force and not is_stale(args.data_dir, args.output):
+        print(f"{args.output}: up to date")
+        return
+    start = time.perf_counter()
+    counts = build(args.data_dir, args.output)
+    print(f"{args.output}: {counts} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
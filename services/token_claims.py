@@ -0,0 +1,126 @@
+"""Local decoding of JWT access-token claims."""
+import base64
+import hashlib
+import hmac
+import json
+import re
+import time
+
+from schemas.token import TokenClaims
+from services.ttl_cache import TTLCache
+from settings import JWT_ALGORITHM, JWT_SECRET_KEY, TOKEN_CLAIMS_CACHE_MAXSIZE
+
+
+UUID_PATTERN = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+_HMAC_ALGORITHMS = {
+    "HS256": hashlib.sha256,
+    "HS384": hashlib.sha384,
+    "HS512": hashlib.sha512,
+}
+
+# Claims never outlive the token; tokens without ``exp`` are kept for a day.
+_claims_cache = TTLCache(maxsize=TOKEN_CLAIMS_CACHE_MAXSIZE, ttl=24 * 60 * 60)
+
+
+class InvalidTokenError(ValueError):
+    """Raised when a token is malformed or its signature does not verify."""
+
+
+def _b64decode(segment: str) -> bytes:
+    # Add padding so length is a multiple of 4
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _verify_signature(token: str, key: str, algorithm: str):
+    digestmod = _HMAC_ALGORITHMS.get(algorithm)
+    if digestmod is None:
+        raise InvalidTokenError(f"Unsupported JWT algorithm: {algorithm}")
+
+    signing_input, _, signature = token.rpartition(".")
+    expected = hmac.new(key.encode(), signing_input.encode(), digestmod).digest()
+    try:
+        actual = _b64decode(signature)
+    except ValueError as exc:
+        raise InvalidTokenError("Malformed token signature") from exc
+    if not hmac.compare_digest(expected, actual):
+        raise InvalidTokenError("Invalid token signature")
+
+
+def _resolve_user_id(payload: dict):
+    for claim in ("id", "user_id", "uuid", "sub"):
+        value = payload.get(claim)
+        if value and UUID_PATTERN.fullmatch(str(value).lower()):
+            return str(value)
+    return None
+
+
+def decode_claims(token: str, key: str = JWT_SECRET_KEY, algorithm: str = JWT_ALGORITHM) -> TokenClaims:
+    """
+    Parse the payload of a JWT without memoization.
+
+    Args:
+        token (str): Encoded JWT.
+        key (str): Shared secret; when given the signature is verified first.
+        algorithm (str): HMAC algorithm of the token (HS256, HS384 or HS512).
+
+    Returns:
+        TokenClaims
+
+    Raises:
+        InvalidTokenError: If the token is malformed or the signature does not verify.
+    """
+    try:
+        payload = json.loads(_b64decode(token.split(".")[1]))
+    except (AttributeError, IndexError, ValueError) as exc:
+        raise InvalidTokenError("Malformed token") from exc
+    if not isinstance(payload, dict):
+        raise InvalidTokenError("Malformed token")
+
+    if key:
+        _verify_signature(token, key, algorithm)
+
+    try:
+        return TokenClaims(**{**payload, "user_id": _resolve_user_id(payload)})
+    except ValueError as exc:
+        raise InvalidTokenError("Unexpected token claims") from exc
+
+
+def get_claims(token: str) -> TokenClaims:
+    """Return the claims of a token, parsing its payload only once per token."""
+    claims = _claims_cache.get(token)
+    if claims is None:
+        claims = decode_claims(token)
+        _claims_cache.set(token, claims, expires_at=claims.exp)
+    return claims
+
+
+def user_id(token: str):
+    """Return the user UUID carried by the token, or ``None`` if it has none."""
+    try:
+        return get_claims(token).user_id
+    except InvalidTokenError:
+        return None
+
+
+def expires_at(token: str):
+    """Return the ``exp`` claim of the token, or ``None``."""
+    try:
+        return get_claims(token).exp
+    except InvalidTokenError:
+        return None
+
+
+def is_expired(token: str, leeway: float = 0) -> bool:
+    """
+    Tell whether a token is past its ``exp`` claim.
+
+    Tokens without a readable ``exp`` are left to the upstream API to reject.
+    """
+    exp = expires_at(token)
+    return exp is not None and exp <= time.time() + leeway
+
+
+def forget(token: str):
+    """Drop the memoized claims of a token."""
+    _claims_cache.invalidate(token)
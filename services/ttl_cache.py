@@ -0,0 +1,76 @@
+"""Bounded, thread-safe cache with per-entry expiry."""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    LRU cache whose entries expire after ``ttl`` seconds or at an explicit deadline.
+
+    Args:
+        maxsize (int): Maximum number of entries kept; least recently used are evicted.
+        ttl (float): Default time to live in seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock=time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Return the live value for ``key`` or ``default``."""
+        now = self._clock()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, expires_at: float = None):
+        """
+        Store ``value`` until ``expires_at`` or the default TTL, whichever comes first.
+
+        Args:
+            expires_at (float): Absolute expiry as a Unix timestamp, e.g. a JWT ``exp``.
+        """
+        deadline = self._clock() + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        with self._lock:
+            self._data[key] = (value, deadline)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
@@ -0,0 +1,70 @@
+"""Background warm-up of heavy modules and the columnar store after startup."""
+import importlib
+import logging
+import threading
+import time
+
+from settings import COLUMNAR_DIR, DATA_BACKEND, DATA_DIR, SNAPSHOT_DIR, WARMUP_DELAY, WARMUP_MODULES
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds each step took, for the diagnostics page
+timings = {}
+
+
+def _run(modules, data_dir: str, store_dir: str, delay: float, convert: bool):
+    # Let the rerun that started us reach the browser first
+    time.sleep(delay)
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            logger.exception("Warm-up could not import %s", name)
+            continue
+        timings[name] = time.perf_counter() - start
+    if not convert:
+        return
+
+    # Convert stale CSVs now so the first dashboard visit only maps the files
+    from services import columnar_store
+    from services.financial_schema import TABLE_FILES
+
+    for table in TABLE_FILES:
+        start = time.perf_counter()
+        try:
+            # Under the same per-table lock as the pages' loads
+            columnar_store.refresh(table, data_dir, store_dir)
+        except OSError:
+            # Missing data is reported by the page that needs it
+            logger.warning("Warm-up skipped the %s table: %s not readable", table, data_dir)
+            continue
+        except ValueError as exc:
+            # Malformed CSV (pyarrow.ArrowInvalid); the previous conversion is kept
+            logger.warning("Warm-up could not convert the %s table: %s", table, exc)
+            continue
+        timings[f"columnar:{table}"] = time.perf_counter() - start
+
+
+def start(modules=WARMUP_MODULES, data_dir: str = DATA_DIR, store_dir: str = COLUMNAR_DIR,
+          delay: float = WARMUP_DELAY, convert: bool = None) -> threading.Thread:
+    """
+    Import ``modules`` and bring the columnar store up to date in a daemon thread.
+
+    Pages import what they need on first use; this moves that cost off the
+    first request of each page once the server is up. Work starts after
+    ``delay`` seconds.
+
+    Args:
+        convert (bool): Convert stale CSVs to the columnar store. By default
+            only when pages read it: the columnar backend without snapshots
+            (with ``SNAPSHOT_DIR``, pages attach the published snapshot).
+    """
+    if convert is None:
+        convert = DATA_BACKEND == "columnar" and not SNAPSHOT_DIR
+    thread = threading.Thread(
+        target=_run, args=(modules, data_dir, store_dir, delay, convert), daemon=True, name="warmup",
+    )
+    thread.start()
+    return thread
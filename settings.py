@@ -1,5 +1,130 @@
 """Module for settings."""
+import os
 
 # API_BASE = "http://localhost:8000"
 
-API_BASE = "http://api-server-2"
\ No newline at end of file
+API_BASE = os.getenv("API_BASE", "http://api-server-2")
+
+# HTTP client (see services/http_client.py)
+API_POOL_CONNECTIONS = int(os.getenv("API_POOL_CONNECTIONS", "4"))
+API_POOL_MAXSIZE = int(os.getenv("API_POOL_MAXSIZE", "32"))
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "3.05"))
+API_READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "10"))
+
+# Upstream resilience (see services/resilience.py): total seconds a call may
+# take across retries, retries of idempotent calls with full-jitter backoff,
+# and the circuit breaker that fails fast while the upstream is unhealthy
+API_CALL_BUDGET = float(os.getenv("API_CALL_BUDGET", "5"))
+WHOAMI_BUDGET = float(os.getenv("WHOAMI_BUDGET", "2"))
+API_RETRIES = int(os.getenv("API_RETRIES", "2"))
+API_RETRY_BACKOFF = float(os.getenv("API_RETRY_BACKOFF", "0.1"))
+API_RETRY_BACKOFF_MAX = float(os.getenv("API_RETRY_BACKOFF_MAX", "1"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+# whoami cache (see AuthService.whoami)
+WHOAMI_CACHE_TTL = float(os.getenv("WHOAMI_CACHE_TTL", "300"))
+WHOAMI_CACHE_MAXSIZE = int(os.getenv("WHOAMI_CACHE_MAXSIZE", "4096"))
+# Host-wide whoami cache shared by the server processes (see
+# services/disk_cache.py): an SQLite file path; empty disables it
+WHOAMI_DISK_CACHE = os.getenv("WHOAMI_DISK_CACHE", "")
+# Last good whoami/otp replies, served while the upstream fails (kept until the JWT expires)
+LAST_GOOD_CACHE_MAXSIZE = int(os.getenv("LAST_GOOD_CACHE_MAXSIZE", "4096"))
+
+# JWT claims (see services/token_claims.py). When JWT_SECRET_KEY is set,
+# token signatures are verified locally before the claims are trusted.
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+TOKEN_CLAIMS_CACHE_MAXSIZE = int(os.getenv("TOKEN_CLAIMS_CACHE_MAXSIZE", "4096"))
+
+# Financial data (see services/columnar_store.py)
+DATA_DIR = os.getenv("DATA_DIR", "data")
+COLUMNAR_DIR = os.getenv("COLUMNAR_DIR", os.path.join(DATA_DIR, ".columnar"))
+COLUMNAR_VERIFY_HASH = os.getenv("COLUMNAR_VERIFY_HASH", "0") == "1"
+# Seconds between polls of historial_alertas.csv for appended rows; 0 disables
+HISTORY_TAIL_INTERVAL = float(os.getenv("HISTORY_TAIL_INTERVAL", "2"))
+# Without that poller, minimum seconds between source checks made by page reruns
+DATASET_CHECK_INTERVAL = float(os.getenv("DATASET_CHECK_INTERVAL", "2"))
+# Conversion of CSVs larger than RAM: bytes parsed per block, and leading
+# characters of id_cliente used to range-partition rows before sorting
+COLUMNAR_BLOCK_SIZE = int(os.getenv("COLUMNAR_BLOCK_SIZE", str(64 << 20)))
+COLUMNAR_BUCKET_PREFIX = int(os.getenv("COLUMNAR_BUCKET_PREFIX", "2"))
+# Store the dashboard reads from: "columnar" (every table in memory over the
+# memory-mapped Arrow copy) or "sqlite" (an indexed SQLite file queried per
+# client, see services/sqlite_store.py; build it with python -m services.sqlite_store)
+DATA_BACKEND = os.getenv("DATA_BACKEND", "columnar")
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(DATA_DIR, "financial.sqlite3"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 << 20)))
+# Memory-mapped dataset snapshots shared by the server processes of a host
+# (see services/shared_snapshot.py): directory of the versions, empty
+# disables sharing; and versions kept on disk
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "")
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "2"))
+# Movement filters on the columnar backend (see services/movement_filter.py):
+# clients whose history is kept bitmap-encoded, and (client, filter set)
+# results kept, both least recently used first out
+MOVEMENT_FILTER_CLIENTS = int(os.getenv("MOVEMENT_FILTER_CLIENTS", "64"))
+MOVEMENT_FILTER_RESULTS = int(os.getenv("MOVEMENT_FILTER_RESULTS", "512"))
+# Clients whose monthly trend (see services/monthly_rollups.py) is kept shaped for the charts
+MONTHLY_VIEW_CACHE = int(os.getenv("MONTHLY_VIEW_CACHE", "256"))
+
+# Equipo Chat assistant (see services/chat_service.py): model backend
+# ("stand_in", a deterministic local answerer, or "http", an OpenAI-compatible
+# streaming chat completions endpoint), concurrent generations per process,
+# and seconds to wait for the first token and between tokens
+CHAT_BACKEND = os.getenv("CHAT_BACKEND", "stand_in")
+CHAT_API_URL = os.getenv("CHAT_API_URL", "")
+CHAT_API_KEY = os.getenv("CHAT_API_KEY", "")
+CHAT_MODEL = os.getenv("CHAT_MODEL", "")
+CHAT_MAX_CONCURRENT = int(os.getenv("CHAT_MAX_CONCURRENT", "8"))
+CHAT_FIRST_TOKEN_TIMEOUT = float(os.getenv("CHAT_FIRST_TOKEN_TIMEOUT", "10"))
+CHAT_TOKEN_TIMEOUT = float(os.getenv("CHAT_TOKEN_TIMEOUT", "30"))
+# Previous turns sent along with a question
+CHAT_HISTORY_TURNS = int(os.getenv("CHAT_HISTORY_TURNS", "6"))
+# Per-client context snapshots (see services/chat_context.py), kept until
+# the dataset changes or CHAT_CONTEXT_TTL seconds pass
+CHAT_CONTEXT_CACHE = int(os.getenv("CHAT_CONTEXT_CACHE", "1024"))
+CHAT_CONTEXT_TTL = float(os.getenv("CHAT_CONTEXT_TTL", "600"))
+
+# Prefetch of the dashboard on sign-in (see services/prefetch.py): identity,
+# shared dataset and the client's rows are loaded by PREFETCH_WORKERS threads
+# while the user is still on the auth page; results unused after PREFETCH_TTL
+# seconds are dropped, and sign-ins beyond PREFETCH_MAX_PENDING queued jobs are skipped
+PREFETCH_ON_SIGNIN = os.getenv("PREFETCH_ON_SIGNIN", "1") == "1"
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "2"))
+PREFETCH_MAX_PENDING = int(os.getenv("PREFETCH_MAX_PENDING", "16"))
+PREFETCH_TTL = float(os.getenv("PREFETCH_TTL", "300"))
+
+# OTP provisioning QR (see services/otp_qr.py): "png_min" (smallest payload),
+# "svg" (vector, scales crisply) or "png" (the original 10px-per-module PNG)
+OTP_QR_FORMAT = os.getenv("OTP_QR_FORMAT", "png_min")
+OTP_QR_CACHE_TTL = float(os.getenv("OTP_QR_CACHE_TTL", "600"))
+OTP_QR_CACHE_MAXSIZE = int(os.getenv("OTP_QR_CACHE_MAXSIZE", "1024"))
+
+# Upstream API metrics (see services/api_metrics.py): a local /metrics port
+# and/or a Prometheus textfile rewritten every METRICS_TEXTFILE_INTERVAL seconds
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "")
+METRICS_TEXTFILE_INTERVAL = float(os.getenv("METRICS_TEXTFILE_INTERVAL", "15"))
+# Usernames allowed to open the diagnostics page, comma-separated
+ADMIN_USERS = {u.strip() for u in os.getenv("ADMIN_USERS", "").split(",") if u.strip()}
+
+# Per-rerun profiling (see services/rerun_profiler.py). Enabled for every
+# session with PROFILE_RERUNS=1, or per session with the ?profile=1 query parameter
+PROFILE_RERUNS = os.getenv("PROFILE_RERUNS", "0") == "1"
+PROFILE_LOG_SIZE = int(os.getenv("PROFILE_LOG_SIZE", "2000"))
+# JSON-lines file every profiled rerun is appended to; empty disables it
+PROFILE_LOG_FILE = os.getenv("PROFILE_LOG_FILE", "")
+
+# Startup (see services/warmup.py): modules imported, and stale CSVs converted
+# for the columnar backend, in a background thread once the server is up, off
+# the first request's path
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "1") == "1"
+WARMUP_DELAY = float(os.getenv("WARMUP_DELAY", "1"))
+WARMUP_MODULES = [
+    m.strip() for m in os.getenv(
+        "WARMUP_MODULES",
+        "services.auth_service,services.otp_qr,qrcode,PIL.Image,pandas,pyarrow,"
+        "services.dataset_service,services.history_pager",
+    ).split(",") if m.strip()
+]
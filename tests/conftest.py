@@ -0,0 +1,31 @@
+import pytest
+
+from benchmarks.stand_in_api import start_server
+from services import http_client
+from services.auth_service import AuthService
+from services.resilience import CircuitBreaker
+from services.single_flight import SingleFlight
+from services.ttl_cache import TTLCache
+
+
+@pytest.fixture
+def stand_in(monkeypatch):
+    """Local stand-in API that ``http_client`` talks to, with fresh breaker and caches."""
+    server, base_url = start_server()
+    monkeypatch.setattr(http_client, "API_BASE", base_url)
+    monkeypatch.setattr(http_client, "API_RETRY_BACKOFF", 0.01)
+    monkeypatch.setattr(http_client, "breaker", CircuitBreaker(failure_threshold=100, reset_timeout=60))
+    monkeypatch.setattr(AuthService, "_whoami_cache", TTLCache(maxsize=100, ttl=60))
+    monkeypatch.setattr(AuthService, "_whoami_disk", None)
+    monkeypatch.setattr(AuthService, "_last_good", TTLCache(maxsize=100, ttl=float("inf")))
+    monkeypatch.setattr(AuthService, "_in_flight", SingleFlight())
+    monkeypatch.setattr(AuthService, "stale_served", 0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def token(stand_in):
+    """Access token of a user registered with the stand-in."""
+    return stand_in.issue_token(stand_in.add_user("ana@example.com", "secreto"))
@@ -0,0 +1,106 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_data import write_dataset
+from services import sqlite_store
+from services.dataset_service import DatasetService
+
+
+@pytest.fixture(scope="module")
+def backends(tmp_path_factory):
+    """The same synthetic data through the columnar and the SQLite backend."""
+    data_dir = str(tmp_path_factory.mktemp("data"))
+    ids = write_dataset(data_dir, clients=300, movements=20_000, seed=7)
+    path = f"{data_dir}/financial.sqlite3"
+    sqlite_store.build(data_dir, path)
+    columnar = DatasetService(data_dir, f"{data_dir}/.columnar").get()
+    return columnar, sqlite_store.SqliteDataset(path), random.Random(3).sample(ids, 40)
+
+
+def _filters(datos, id_cliente) -> list:
+    tipos = datos.valores_historial(id_cliente, "tipo_operacion")[:1]
+    entidades = datos.valores_historial(id_cliente, "entidad_financiera")[:2]
+    fechas = datos.rango_fechas(id_cliente)
+    desde = fechas[0] + (fechas[1] - fechas[0]) / 3 if fechas[0] is not None else None
+    return [
+        None,
+        {"tipo_operacion": tipos},
+        {"tipo_operacion": tipos, "entidad_financiera": entidades},
+        {"fecha_registro": (desde, None)},
+    ]
+
+
+def _values(frame: pd.DataFrame, column: str) -> list:
+    values = frame[column]
+    if column == "fecha_registro":
+        return values.astype("datetime64[ns]").tolist()
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def test_unknown_client(backends):
+    columnar, sqlite, _ = backends
+    assert columnar.cliente("no-such-client") is None
+    assert sqlite.cliente("no-such-client") is None
+    assert columnar.contar_movimientos("no-such-client") == sqlite.contar_movimientos("no-such-client") == 0
+
+
+def test_profile_accounts_and_scoring_match(backends):
+    columnar, sqlite, ids = backends
+    for id_cliente in ids:
+        assert columnar.cliente(id_cliente)["email"] == sqlite.cliente(id_cliente)["email"]
+        assert (
+            sorted(columnar.cuentas_cliente(id_cliente)["numero_cuenta"])
+            == sorted(sqlite.cuentas_cliente(id_cliente)["numero_cuenta"])
+        )
+        a, b = columnar.scoring_cliente(id_cliente), sqlite.scoring_cliente(id_cliente)
+        assert (a is None) == (b is None)
+        if a is not None:
+            assert int(a["puntaje_credito"]) == int(b["puntaje_credito"])
+
+
+def test_aggregates_match(backends):
+    columnar, sqlite, ids = backends
+    for id_cliente in ids:
+        a, b = columnar.agregados_cliente(id_cliente), sqlite.agregados_cliente(id_cliente)
+        assert a.keys() == b.keys()
+        for key, value in a.items():
+            if isinstance(value, pd.Series):
+                pd.testing.assert_series_equal(value, b[key], check_names=False, check_index_type=False)
+            elif isinstance(value, tuple):
+                assert [e for e, _ in value] == [e for e, _ in b[key]]
+                np.testing.assert_allclose([p for _, p in value], [p for _, p in b[key]])
+            else:
+                assert value == pytest.approx(b[key]), key
+
+
+def test_movement_pages_match(backends):
+    columnar, sqlite, ids = backends
+    for id_cliente in ids:
+        assert columnar.rango_fechas(id_cliente) == sqlite.rango_fechas(id_cliente)
+        for column in ("tipo_operacion", "entidad_financiera", "categoria_gasto"):
+            a, b = columnar.valores_historial(id_cliente, column), sqlite.valores_historial(id_cliente, column)
+            assert set(a) == set(b)
+        for filtros in _filters(columnar, id_cliente):
+            total = columnar.contar_movimientos(id_cliente, filtros)
+            assert total == sqlite.contar_movimientos(id_cliente, filtros)
+            for inicio in (0, max(total - 7, 0)):
+                a = columnar.movimientos(id_cliente, inicio, 20, filtros)
+                b = sqlite.movimientos(id_cliente, inicio, 20, filtros)
+                for column in ("fecha_registro", "pago_realizado", "tipo_operacion"):
+                    assert _values(a, column) == _values(b, column), (id_cliente, filtros, column)
+
+
+def test_monthly_trend_and_cohorts_match(backends):
+    columnar, sqlite, ids = backends
+    for id_cliente in ids:
+        a, b = columnar.tendencia_mensual(id_cliente), sqlite.tendencia_mensual(id_cliente)
+        assert a.keys() == b.keys()
+        for key, value in a.items():
+            if isinstance(value, pd.DataFrame):
+                pd.testing.assert_frame_equal(value, b[key], check_dtype=False, check_freq=False)
+            else:
+                pd.testing.assert_series_equal(value, b[key], check_dtype=False, check_freq=False, check_names=False)
+        assert columnar.cohortes_cliente(id_cliente) == pytest.approx(sqlite.cohortes_cliente(id_cliente))
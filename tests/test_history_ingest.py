@@ -0,0 +1,152 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic_data import write_dataset
+from services import client_index
+from services.client_index import ClientIndex
+from services.dataset_service import DatasetService
+
+
+HISTORIAL = "historial_alertas.csv"
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    data_dir = tmp_path / "data"
+    ids = write_dataset(str(data_dir), clients=40, movements=2_000, seed=5)
+    return data_dir, ids
+
+
+def _service(data_dir) -> DatasetService:
+    return DatasetService(str(data_dir), str(data_dir / ".columnar"), check_interval=0)
+
+
+def _lines(data_dir, count: int) -> list:
+    """Existing movements moved a year ahead, to append as new ones."""
+    lines = (data_dir / HISTORIAL).read_text(encoding="utf-8").splitlines()[1:count + 1]
+    return [line.replace('","2023-', '","2025-').replace('","2024-', '","2026-') for line in lines]
+
+
+def _append(data_dir, text: str):
+    with open(data_dir / HISTORIAL, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _reference(data_dir, tmp_path) -> DatasetService:
+    """A service loading a copy of the sources from scratch."""
+    copy = tmp_path / "reference"
+    shutil.copytree(data_dir, copy, ignore=shutil.ignore_patterns(".columnar"))
+    return _service(copy)
+
+
+def _assert_same_aggregates(a: dict, b: dict):
+    assert a.keys() == b.keys()
+    for key, value in a.items():
+        if isinstance(value, pd.Series):
+            pd.testing.assert_series_equal(value.sort_index(), b[key].sort_index(), check_names=False)
+        elif isinstance(value, tuple):
+            assert dict(value) == pytest.approx(dict(b[key])), key
+        else:
+            assert value == pytest.approx(b[key]), key
+
+
+def test_appended_rows_are_ingested(data_dir, tmp_path):
+    data_dir, ids = data_dir
+    service = _service(data_dir)
+    before = service.get()
+    version = service.version
+
+    _append(data_dir, "\n".join(_lines(data_dir, 50)) + "\n")
+    after = service.get()
+
+    assert service.version == version + 1
+    assert service._ingester.rows_ingested == 50
+    assert before.historial.num_rows == 2_000
+    assert after.historial.num_rows == 2_050
+
+    reference = _reference(data_dir, tmp_path).get()
+    for id_cliente in ids:
+        pd.testing.assert_frame_equal(
+            after.historial_cliente(id_cliente).reset_index(drop=True),
+            reference.historial_cliente(id_cliente).reset_index(drop=True),
+            # Appended values extend the categories instead of re-sorting them
+            check_categorical=False,
+        )
+        _assert_same_aggregates(after.agregados_cliente(id_cliente), reference.agregados_cliente(id_cliente))
+
+
+def test_partial_row_waits_for_its_newline(data_dir):
+    data_dir, _ = data_dir
+    service = _service(data_dir)
+    service.get()
+    line = _lines(data_dir, 1)[0]
+
+    _append(data_dir, line[:20])
+    assert service._ingester.poll() is None
+    assert service.get().historial.num_rows == 2_000
+    _append(data_dir, line[20:] + "\n")
+    assert service.get().historial.num_rows == 2_001
+
+
+def test_malformed_row_keeps_the_dataset(data_dir):
+    data_dir, _ = data_dir
+    service = _service(data_dir)
+    dataset = service.get()
+    version = service.version
+
+    fields = _lines(data_dir, 1)[0].split(",")
+    fields[4] = "no-es-un-numero"
+    _append(data_dir, ",".join(fields) + "\n")
+
+    assert service.get() is dataset
+    assert service.version == version
+
+
+def test_rewritten_history_is_reloaded(data_dir, tmp_path):
+    data_dir, ids = data_dir
+    service = _service(data_dir)
+    service.get()
+    path = data_dir / HISTORIAL
+    lines = path.read_text(encoding="utf-8").splitlines(keepends=True)
+    path.write_text("".join(lines[:1001]), encoding="utf-8")
+
+    dataset = service.get()
+
+    assert dataset.historial.num_rows == 1_000
+    reference = _reference(data_dir, tmp_path).get()
+    for id_cliente in ids[:10]:
+        pd.testing.assert_frame_equal(dataset.historial_cliente(id_cliente), reference.historial_cliente(id_cliente))
+
+
+@pytest.mark.parametrize("fold_rows", [10_000, 100])
+def test_appended_index_matches_a_full_sort(monkeypatch, fold_rows):
+    monkeypatch.setattr(client_index, "TAIL_FOLD_ROWS", fold_rows)
+    rng = np.random.default_rng(0)
+    order = [("fecha", False)]
+
+    def rows(count):
+        return pd.DataFrame({
+            "id_cliente": rng.choice(["a", "b", "c", "d"], count),
+            "fecha": rng.integers(0, 1_000, count),
+            "valor": rng.uniform(size=count),
+        })
+
+    frames = [rows(500)]
+    index = ClientIndex(frames[0], sort_by=order)
+    base = index
+    for _ in range(4):
+        frames.append(rows(60))
+        index = index.appended(frames[-1])
+
+    assert base.num_rows == 500
+    assert index.num_rows == 740
+    assert (index.tail is None) == (fold_rows == 100)
+    full = ClientIndex(pd.concat(frames, ignore_index=True), sort_by=order)
+    for id_cliente in ["a", "b", "c", "d", "z"]:
+        expected = full.rows(id_cliente).reset_index(drop=True)
+        actual = index.rows(id_cliente).reset_index(drop=True)
+        pd.testing.assert_series_equal(actual["fecha"], expected["fecha"])
+        assert sorted(actual["valor"]) == sorted(expected["valor"])
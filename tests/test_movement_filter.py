@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.data_backend import date_bounds
+from services.movement_filter import EncodedHistory, MovementFilter, filter_key
+
+
+def _history(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    fechas = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 90 * 86400, rows), unit="s")
+    frame = pd.DataFrame({
+        "fecha_registro": fechas.sort_values(ascending=False),
+        "tipo_operacion": pd.Categorical(rng.choice(["Debito", "Credito", None], rows)),
+        "entidad_financiera": pd.Categorical(rng.choice(["BBVA", "Nequi", "Davivienda"], rows)),
+        "pago_realizado": rng.uniform(0, 1e5, rows),
+    })
+    frame.loc[rng.choice(rows, rows // 10, replace=False), "fecha_registro"] = pd.NaT
+    return frame
+
+
+def _expected(frame: pd.DataFrame, filtros: dict) -> np.ndarray:
+    mask = pd.Series(True, index=frame.index)
+    for columna, valores in filtros.items():
+        if columna == "fecha_registro":
+            start, stop = date_bounds(*valores)
+            fechas = frame[columna]
+            mask &= fechas.notna()
+            if start is not None:
+                mask &= fechas >= start
+            if stop is not None:
+                mask &= fechas < stop
+        else:
+            mask &= frame[columna].isin(valores)
+    return np.flatnonzero(mask.to_numpy(dtype=bool))
+
+
+FILTERS = [
+    {},
+    {"tipo_operacion": ["Debito"]},
+    {"tipo_operacion": ["Debito", "Credito"], "entidad_financiera": ["Nequi"]},
+    {"entidad_financiera": []},
+    {"entidad_financiera": ["No existe"]},
+    {"fecha_registro": (pd.Timestamp("2024-02-01"), None)},
+    {"fecha_registro": (pd.Timestamp("2024-01-15"), pd.Timestamp("2024-02-15")), "tipo_operacion": ["Credito"]},
+]
+
+
+@pytest.mark.parametrize("rows", [0, 1, 13, 1000])
+@pytest.mark.parametrize("filtros", FILTERS)
+def test_bitmaps_match_boolean_masks(rows, filtros):
+    frame = _history(rows)
+    np.testing.assert_array_equal(EncodedHistory(frame).select(filtros), _expected(frame, filtros))
+
+
+def test_values_and_date_range():
+    frame = _history(500)
+    encoded = EncodedHistory(frame)
+    assert encoded.values("tipo_operacion") == frame["tipo_operacion"].dropna().unique().tolist()
+    fechas = frame["fecha_registro"].dropna()
+    assert encoded.date_range() == (fechas.min(), fechas.max())
+    assert EncodedHistory(_history(0)).date_range() == (None, None)
+
+
+def test_unknown_column_is_rejected():
+    with pytest.raises(ValueError):
+        EncodedHistory(_history(10)).select({"no_existe": ["x"]})
+
+
+def test_filter_key_ignores_order():
+    assert filter_key({"a": ["x", "y"], "b": ["z"]}) == filter_key({"b": ["z"], "a": ["y", "x"]})
+    assert filter_key(None) == filter_key({})
+
+
+def test_results_are_cached_per_client_and_filter_set():
+    frames = {"c1": _history(300, seed=1), "c2": _history(200, seed=2)}
+    loads = []
+    movement_filter = MovementFilter(lambda c: loads.append(c) or frames[c], max_clients=4, max_results=8)
+    filtros = {"tipo_operacion": ["Debito"], "entidad_financiera": ["BBVA", "Nequi"]}
+
+    for id_cliente, frame in frames.items():
+        expected = _expected(frame, filtros)
+        assert movement_filter.count(id_cliente, filtros) == len(expected)
+        page = movement_filter.rows(id_cliente, 5, 10, filtros)
+        pd.testing.assert_frame_equal(page, frame.iloc[expected[5:15]])
+
+    reordered = {"entidad_financiera": ["Nequi", "BBVA"], "tipo_operacion": ["Debito"]}
+    assert movement_filter.count("c1", reordered) == len(_expected(frames["c1"], filtros))
+    assert loads == ["c1", "c2"]
+    assert movement_filter.stats()["results"]["hits"] >= 3
+
+    with pytest.raises(ValueError):
+        movement_filter.positions("c1", filtros)[0] = 1
+
+
+def test_unfiltered_page_is_a_slice():
+    frame = _history(100)
+    movement_filter = MovementFilter(lambda c: frame, max_clients=1, max_results=1)
+    pd.testing.assert_frame_equal(movement_filter.rows("c", 20, 10), frame.iloc[20:30])
@@ -0,0 +1,152 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from benchmarks.stand_in_api import Faults
+from services import auth_service, http_client
+from services.auth_service import UNAVAILABLE, AuthService
+from services.resilience import CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def _breaker(monkeypatch, clock, failure_threshold: int, reset_timeout: float = 30) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold, reset_timeout, clock=clock)
+    monkeypatch.setattr(http_client, "breaker", breaker)
+    return breaker
+
+
+def test_only_whoami_and_otp_are_retried(stand_in, token, monkeypatch):
+    monkeypatch.setattr(auth_service, "API_RETRIES", 2)
+    stand_in.faults = Faults(error_rate=1.0)
+
+    assert AuthService.whoami(token) == {"detail": UNAVAILABLE}
+    assert AuthService.configure_otp(token) is None
+    assert AuthService.authenticate_user("ana@example.com", "secreto") == (False, UNAVAILABLE)
+    AuthService.signup("luis@example.com", "secreto")
+    AuthService.validate_otp_client_configuration(token, "123456")
+
+    assert stand_in.hits["/whoami"] == 3
+    assert stand_in.hits["/otp"] == 3
+    assert stand_in.hits["/account/signin"] == 1
+    assert stand_in.hits["/account/signup"] == 1
+    assert stand_in.hits["/confirm-otp"] == 1
+
+
+def test_budget_caps_wall_time_across_retries(stand_in):
+    stand_in.faults = Faults(latency=2.0, paths=("/whoami",))
+    start = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        http_client.get("/whoami", retries=5, budget=0.5, timeout=(1.0, 1.0))
+    assert time.monotonic() - start < 1.0
+    assert stand_in.hits["/whoami"] == 1
+
+
+def test_whoami_budget_caps_wall_time(stand_in, token, monkeypatch):
+    monkeypatch.setattr(auth_service, "WHOAMI_BUDGET", 0.5)
+    stand_in.faults = Faults(latency=2.0, paths=("/whoami",))
+    start = time.monotonic()
+    assert AuthService.whoami(token) == {"detail": UNAVAILABLE}
+    assert time.monotonic() - start < 1.0
+
+
+def test_breaker_opens_after_failure_threshold(stand_in, monkeypatch, clock):
+    breaker = _breaker(monkeypatch, clock, failure_threshold=3)
+    stand_in.faults = Faults(error_rate=1.0)
+
+    for _ in range(2):
+        assert http_client.get("/whoami").status_code == 503
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert http_client.get("/whoami").status_code == 503
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        http_client.get("/whoami")
+    assert stand_in.hits["/whoami"] == 3
+
+
+def test_half_open_lets_a_single_trial_through(stand_in, monkeypatch, clock):
+    breaker = _breaker(monkeypatch, clock, failure_threshold=1, reset_timeout=30)
+    stand_in.faults = Faults(error_rate=1.0)
+    http_client.get("/whoami")
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 31
+    stand_in.faults = Faults(latency=0.3)
+
+    def call():
+        try:
+            return http_client.get("/whoami").status_code
+        except CircuitOpenError:
+            return "open"
+
+    with ThreadPoolExecutor(5) as pool:
+        outcomes = list(pool.map(lambda _: call(), range(5)))
+
+    assert sorted(outcomes, key=str) == [401] + ["open"] * 4
+    assert stand_in.hits["/whoami"] == 2
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_unexpected_error_releases_the_trial(stand_in, monkeypatch, clock):
+    breaker = _breaker(monkeypatch, clock, failure_threshold=1, reset_timeout=30)
+    stand_in.faults = Faults(error_rate=1.0)
+    http_client.get("/whoami")
+    clock.now = 31
+
+    send = http_client._send
+    monkeypatch.setattr(http_client, "_send", lambda *args, **kwargs: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        http_client.get("/whoami")
+    assert breaker.state == CircuitBreaker.OPEN
+
+    monkeypatch.setattr(http_client, "_send", send)
+    stand_in.faults = Faults()
+    clock.now = 62
+    assert http_client.get("/whoami").status_code == 401
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_last_good_reply_served_while_breaker_open(stand_in, token, monkeypatch, clock):
+    good = AuthService.whoami(token)
+    assert "message" in good
+
+    breaker = _breaker(monkeypatch, clock, failure_threshold=1)
+    stand_in.faults = Faults(error_rate=1.0)
+    AuthService._whoami_cache.invalidate(token)
+    assert AuthService.whoami(token) == good
+    assert breaker.state == CircuitBreaker.OPEN
+
+    hits = stand_in.hits["/whoami"]
+    AuthService._whoami_cache.invalidate(token)
+    assert AuthService.whoami(token) == good
+    assert stand_in.hits["/whoami"] == hits
+    assert AuthService.stale_served == 2
+
+
+def test_sign_in_returns_the_token_claims(stand_in):
+    user = stand_in.add_user("ana@example.com", "secreto", membership="PREMIUM")
+    ok, session = AuthService.authenticate_user("ana@example.com", "secreto")
+    assert ok
+    assert (session["user_id"], session["membership"]) == (user["user_id"], "PREMIUM")
+
+
+@pytest.mark.parametrize("status", [200, 502])
+def test_sign_in_survives_a_reply_that_is_not_json(stand_in, status):
+    stand_in.faults = Faults(
+        error_rate=1.0, error_status=status, error_body=b"<html>Bad gateway</html>", paths=("/account/signin",),
+    )
+    assert AuthService.authenticate_user("ana@example.com", "secreto") == (False, UNAVAILABLE)
@@ -0,0 +1,76 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.stand_in_api import Faults
+from services.auth_service import AuthService
+from services.single_flight import SingleFlight
+
+
+def _herd(fn, callers: int) -> list:
+    with ThreadPoolExecutor(callers) as pool:
+        return list(pool.map(lambda _: fn(), range(callers)))
+
+
+def test_concurrent_callers_share_one_call():
+    flight, release, calls = SingleFlight(), threading.Event(), []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "reply"
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(flight.do, "key", slow) for _ in range(8)]
+        while flight.stats()["in_flight"] == 0 or flight.shared < 7:
+            threading.Event().wait(0.01)
+        release.set()
+        assert [f.result() for f in futures] == ["reply"] * 8
+    assert len(calls) == 1
+    assert (flight.leaders, flight.shared) == (1, 7)
+
+
+def test_callers_share_the_leaders_exception():
+    flight, release = SingleFlight(), threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ValueError("upstream")
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(flight.do, "key", failing) for _ in range(4)]
+        while flight.shared < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError, match="upstream"):
+                future.result()
+
+
+def test_nothing_is_kept_after_the_call():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_whoami_herd_makes_one_upstream_call(stand_in, token):
+    stand_in.faults = Faults(latency=0.3, paths=("/whoami",))
+    replies = _herd(lambda: AuthService.whoami(token), 16)
+    assert all("message" in reply for reply in replies)
+    assert stand_in.hits["/whoami"] == 1
+
+
+def test_leader_checks_the_cache_again(stand_in, token):
+    reply = AuthService.whoami(token)
+    # A caller that missed the cache just before the previous leader stored its reply
+    assert AuthService._fetch_whoami(token) == reply
+    assert stand_in.hits["/whoami"] == 1
+
+
+def test_different_tokens_are_not_coalesced(stand_in):
+    tokens = [stand_in.issue_token(stand_in.add_user(f"user{i}@example.com", "secreto")) for i in range(3)]
+    stand_in.faults = Faults(latency=0.2, paths=("/whoami",))
+    _herd(lambda: [AuthService.whoami(t) for t in tokens], 4)
+    assert stand_in.hits["/whoami"] == 3
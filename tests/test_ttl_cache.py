@@ -0,0 +1,83 @@
+import time
+
+from benchmarks.stand_in_api import Faults
+from services.auth_service import UNAVAILABLE, AuthService
+from services.ttl_cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_the_ttl():
+    clock = Clock()
+    cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("a", 1)
+    clock.now += 59
+    assert cache.get("a") == 1
+    clock.now += 1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_explicit_deadline_shortens_the_ttl():
+    clock = Clock()
+    cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("a", 1, expires_at=clock.now + 10)
+    cache.set("b", 2, expires_at=clock.now + 600)
+    clock.now += 10
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    clock.now += 50
+    assert cache.get("b") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_stats_count_hits_and_misses():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "size": 1, "maxsize": 2}
+
+
+def test_whoami_is_served_from_cache(stand_in, token):
+    reply = AuthService.whoami(token)
+    assert "message" in reply
+    assert AuthService.whoami(token) == reply
+    assert stand_in.hits["/whoami"] == 1
+
+
+def test_whoami_entry_expires_with_the_token(stand_in):
+    stand_in.token_ttl = 1
+    token = stand_in.issue_token(stand_in.add_user("ana@example.com", "secreto"))
+    AuthService.whoami(token)
+    time.sleep(1.1)
+    AuthService.whoami(token)
+    assert stand_in.hits["/whoami"] == 2
+
+
+def test_whoami_errors_are_not_cached(stand_in, token):
+    stand_in.faults = Faults(error_rate=1.0, paths=("/whoami",))
+    assert AuthService.whoami(token) == {"detail": UNAVAILABLE}
+    stand_in.faults = Faults()
+    assert "message" in AuthService.whoami(token)
+
+
+def test_invalidate_drops_the_cached_reply(stand_in, token):
+    AuthService.whoami(token)
+    AuthService.invalidate_whoami(token)
+    AuthService.whoami(token)
+    assert stand_in.hits["/whoami"] == 2